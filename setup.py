@@ -45,6 +45,7 @@ setup(
         "rollbar==0.14.7",
         "requests",
     ],
+    extras_require={"speedups": ["orjson"], "async": ["aiohttp"], "batch": ["zstandard", "pyarrow"]},
     python_requires=">=3.6",
     entry_points={"console_scripts": ["tap-dayforce = tap_dayforce:main"]},
 )
@@ -1,14 +1,16 @@
 import json
 import os
 import sys
+from typing import Dict, List
 
-import rollbar
 import singer
 
+from .client import DayforceClient
+from .instrumentation import get_instrumentation
 from .streams import EmployeePunchesStream, EmployeeRawPunchesStream, EmployeesStream, PaySummaryReportStream
-from .utils import load_schema, parse_args
+from .utils import bounded_ordered_map, load_schema, parse_args
 
-AVAILABLE_STREAMS = {EmployeePunchesStream, EmployeeRawPunchesStream, EmployeesStream, PaySummaryReportStream}
+AVAILABLE_STREAMS = (EmployeesStream, EmployeePunchesStream, EmployeeRawPunchesStream, PaySummaryReportStream)
 
 LOGGER = singer.get_logger()
 
@@ -19,14 +21,22 @@ except KeyError:
     LOGGER.info("Required env vars for Rollbar logging not found. Rollbar logging disabled..")
     log_to_rollbar = False
 else:
-    rollbar.init(ROLLBAR_ACCESS_TOKEN, ROLLBAR_ENVIRONMENT)
     log_to_rollbar = True
 
 
-def discover(args, select_all=False):
-    LOGGER.info("Starting discovery..")
+def report_exception_to_rollbar():
+    # rollbar is one of the slowest imports of the tap and is only needed once a run has failed,
+    # so it is imported and initialized here rather than on every startup.
+    import rollbar
+
+    rollbar.init(ROLLBAR_ACCESS_TOKEN, ROLLBAR_ENVIRONMENT)
+    LOGGER.info("Reporting exception info to Rollbar..")
+    rollbar.report_exc_info()
+
 
-    catalog = {"streams": []}
+def get_catalog(select_all: bool = False) -> Dict:
+    """Catalog of AVAILABLE_STREAMS, with every stream selected if `select_all`."""
+    catalog: Dict[str, List[Dict]] = {"streams": []}
     for stream in AVAILABLE_STREAMS:
         schema = load_schema(stream.tap_stream_id)
         catalog_entry = {
@@ -44,31 +54,71 @@ def discover(args, select_all=False):
         if select_all is True:
             catalog_entry["metadata"][0]["metadata"]["selected"] = True
         catalog["streams"].append(catalog_entry)
+    return catalog
 
-    print(json.dumps(catalog, indent=2))
+
+def discover(args, select_all=False):
+    LOGGER.info("Starting discovery..")
+    print(json.dumps(get_catalog(select_all=select_all), indent=2))
     LOGGER.info("Finished discovery..")
 
 
+def get_stream_order(config):
+    """Order AVAILABLE_STREAMS by the optional `stream_order` config. Streams it doesn't list
+    keep their default order and are synced after the listed ones."""
+    streams = {stream.tap_stream_id: stream for stream in AVAILABLE_STREAMS}
+    stream_order = config.get("stream_order", [])
+    unknown_streams = [tap_stream_id for tap_stream_id in stream_order if tap_stream_id not in streams]
+    if unknown_streams:
+        raise Exception(f"Config stream_order contains unknown streams: {unknown_streams}")
+    return [streams[tap_stream_id] for tap_stream_id in stream_order] + [
+        stream for stream in AVAILABLE_STREAMS if stream.tap_stream_id not in stream_order
+    ]
+
+
+def sync_stream(stream):
+    LOGGER.info(f"Starting sync for Stream {stream.tap_stream_id}..")
+    with stream.writer.lock:
+        singer.bookmarks.set_currently_syncing(state=stream.state, tap_stream_id=stream.tap_stream_id)
+        stream.writer.write_state(stream.state)
+        stream.writer.write_schema(
+            stream_name=stream.tap_stream_id,
+            schema=stream.schema,
+            key_properties=stream.key_properties,
+        )
+    stream.sync()
+    with stream.writer.lock:
+        # Streams synced concurrently may have marked themselves as currently syncing since.
+        if singer.bookmarks.get_currently_syncing(stream.state) == stream.tap_stream_id:
+            singer.bookmarks.set_currently_syncing(state=stream.state, tap_stream_id=None)
+        stream.writer.write_state(stream.state)
+    LOGGER.info(f"Finished sync for Stream {stream.tap_stream_id}..")
+
+
 def sync(args):
     LOGGER.info("Starting sync..")
 
     selected_streams = {catalog_entry.stream for catalog_entry in args.catalog.get_selected_streams(args.state)}
     LOGGER.info(f"Selected Streams: {selected_streams}")
 
-    for available_stream in AVAILABLE_STREAMS:
-        stream = available_stream.from_args(args)
-        if stream.tap_stream_id in selected_streams:
-            LOGGER.info(f"Starting sync for Stream {stream.tap_stream_id}..")
-            singer.bookmarks.set_currently_syncing(state=stream.state, tap_stream_id=stream.tap_stream_id)
-            singer.write_state(stream.state)
-            singer.write_schema(
-                stream_name=stream.tap_stream_id,
-                schema=stream.get_schema(tap_stream_id=stream.tap_stream_id, catalog=stream.catalog),
-                key_properties=stream.key_properties,
-            )
-            stream.sync()
-            singer.bookmarks.set_currently_syncing(state=stream.state, tap_stream_id=None)
-            singer.write_state(stream.state)
+    if getattr(args, "client", None) is None:
+        args.client = DayforceClient.from_config(args.config)
+    streams = [
+        available_stream.from_args(args)
+        for available_stream in get_stream_order(args.config)
+        if available_stream.tap_stream_id in selected_streams
+    ]
+    stream_workers = int(args.config.get("stream_workers", 1))
+    try:
+        for _ in bounded_ordered_map(sync_stream, streams, max_workers=stream_workers, prefetch=stream_workers):
+            pass
+    finally:
+        if isinstance(args.client, DayforceClient):
+            LOGGER.info(f"HTTP connection stats: {args.client.connection_stats()}")
+        instrumentation = get_instrumentation()
+        instrumentation.emit_metrics(LOGGER)
+        if args.config.get("metrics_summary_path"):
+            instrumentation.write_summary(args.config["metrics_summary_path"])
 
 
 def _main():
@@ -86,8 +136,7 @@ def main():
         _main()
     except Exception:
         if log_to_rollbar is True:
-            LOGGER.info("Reporting exception info to Rollbar..")
-            rollbar.report_exc_info()
+            report_exception_to_rollbar()
         LOGGER.exception(msg="Uncaught Exception..")
         sys.exit(1)
 
@@ -0,0 +1,220 @@
+import asyncio
+import collections
+import json
+import time
+from datetime import datetime
+from typing import Any, AsyncGenerator, AsyncIterator, Dict, Iterator, Optional, Tuple
+
+import attr
+import requests
+import singer
+
+from .cache import DetailCache
+from .client import DayforceClient
+from .instrumentation import endpoint_name
+from .ratelimit import parse_retry_after
+
+LOGGER = singer.get_logger()
+
+
+def _http_error(url: str, status: int, headers, body: bytes) -> requests.exceptions.HTTPError:
+    """Build the HTTPError requests would have raised, so callers can handle both engines alike."""
+    response = requests.Response()
+    response.status_code = status
+    response.url = url
+    response.headers = requests.structures.CaseInsensitiveDict(headers)
+    response._content = body
+    return requests.exceptions.HTTPError(f"{status} Error for url: {url}", response=response)
+
+
+@attr.s
+class AsyncEmployeesEngine(object):
+    """Fetches the Employees listing, details and schedules on a single asyncio event loop.
+
+    At most `concurrency` requests are in flight at once, each bounded by the client's
+    timeout, and never more than the RateLimiter's `max_concurrent_requests` across all
+    streams. Requests are paced by the client's RateLimiter, 429s are re-issued after their
+    `Retry-After` period, and failures are raised as the same `requests` exceptions the
+    threaded engine raises, so the stream's backoff and 401 handling apply unchanged.
+    Requires the optional `aiohttp` dependency (`pip install tap-dayforce[async]`).
+    """
+
+    client: DayforceClient = attr.ib()
+    details_expand: str = attr.ib()
+    schedules_expand: str = attr.ib()
+    concurrency: int = attr.ib(default=50)
+    detail_cache: Optional[DetailCache] = attr.ib(default=None, repr=False)
+    cache_namespace: str = attr.ib(default="employees")
+    fetch_schedules: bool = attr.ib(default=True)
+    slot_poll_interval: float = attr.ib(default=0.01, repr=False)
+    _semaphore: Optional[asyncio.Semaphore] = attr.ib(init=False, default=None, repr=False)
+    _aiohttp: Any = attr.ib(init=False, default=None, repr=False)
+
+    def __attrs_post_init__(self):
+        # aiohttp takes longer to import than the rest of the tap, so only import it once the
+        # engine is actually used.
+        try:
+            import aiohttp
+        except ImportError:  # pragma: no cover
+            raise RuntimeError("The async employees engine requires aiohttp: pip install tap-dayforce[async]")
+        self._aiohttp = aiohttp
+
+    def iter_employee_payloads(self, start: datetime, end: datetime) -> Iterator[Tuple[str, Tuple[Dict, Dict]]]:
+        """Yield `(xrefcode, (details, schedules))` for every employee updated between `start`
+        and `end`, in listing order."""
+        loop = asyncio.new_event_loop()
+        payloads = self._employee_payloads(start, end)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(payloads.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(payloads.aclose())
+            loop.close()
+
+    async def _employee_payloads(
+        self, start: datetime, end: datetime
+    ) -> AsyncGenerator[Tuple[str, Tuple[Dict, Dict]], None]:
+        self._semaphore = asyncio.Semaphore(self.concurrency)
+        aiohttp = self._aiohttp
+        if hasattr(aiohttp, "encode_basic_auth"):
+            authorization = aiohttp.encode_basic_auth(self.client.username, self.client.password)
+        else:
+            # Older aiohttp releases only encode credentials through BasicAuth.
+            authorization = aiohttp.BasicAuth(self.client.username, self.client.password).encode()
+        async with aiohttp.ClientSession(
+            headers={**self.client._construct_headers(), "Authorization": authorization},
+            timeout=aiohttp.ClientTimeout(total=self.client.timeout),
+            connector=aiohttp.TCPConnector(limit=self.concurrency),
+        ) as session:
+            pending: collections.deque = collections.deque()
+            try:
+                async for employee in self._get_records(
+                    session,
+                    "Employees",
+                    {
+                        "filterUpdatedStartDate": singer.utils.strftime(start),
+                        "filterUpdatedEndDate": singer.utils.strftime(end),
+                    },
+                ):
+                    pending.append(asyncio.ensure_future(self._get_employee_payloads(session, employee, start, end)))
+                    if len(pending) >= 2 * self.concurrency:
+                        yield await pending.popleft()
+                while pending:
+                    yield await pending.popleft()
+            finally:
+                for task in pending:
+                    task.cancel()
+                await asyncio.gather(*pending, return_exceptions=True)
+
+    async def _acquire(self):
+        """Wait until the RateLimiter allows a request, like `RateLimiter.acquire` but without
+        blocking the event loop. The concurrency slot it takes is shared with the other streams'
+        threads, so it is polled for rather than awaited; it must be given back with `release`."""
+        rate_limiter = self.client.rate_limiter
+        while not rate_limiter.acquire_slot(blocking=False):
+            await asyncio.sleep(self.slot_poll_interval)
+        try:
+            while True:
+                wait = rate_limiter.try_acquire()
+                if wait <= 0:
+                    return
+                await asyncio.sleep(wait)
+        except BaseException:
+            rate_limiter.release()
+            raise
+
+    async def _request(self, session, url: str, params: Optional[Dict] = None) -> Dict:
+        assert self._semaphore is not None
+        retries = 0
+        while True:
+            async with self._semaphore:
+                await self._acquire()
+                started = time.perf_counter()
+                try:
+                    async with session.get(url, params=params) as response:
+                        status, headers, body = response.status, response.headers, await response.read()
+                except asyncio.TimeoutError as e:
+                    raise requests.exceptions.Timeout(f"Timed out requesting {url}") from e
+                except self._aiohttp.ClientError as e:
+                    raise requests.exceptions.ConnectionError(str(e)) from e
+                finally:
+                    self.client.rate_limiter.release()
+            endpoint = endpoint_name(url, self.client.url)
+            self.client.instrumentation.observe_request(endpoint, time.perf_counter() - started, status, len(body))
+
+            if status == 429 and retries < self.client.max_rate_limit_retries:
+                retries += 1
+                retry_after = parse_retry_after(headers.get("Retry-After"))
+                self.client.rate_limiter.on_rate_limited(retry_after)
+                self.client.instrumentation.increment("rate_limit_retries", endpoint)
+                self.client.instrumentation.increment("rate_limit_seconds", endpoint, retry_after)
+                LOGGER.info(f"Rate limit reached. Retrying in {retry_after} seconds..")
+                continue
+            if status >= 400:
+                raise _http_error(url, status, headers, body)
+            self.client.rate_limiter.on_success()
+            return json.loads(body)
+
+    async def _get_records(self, session, resource: str, params: Dict) -> AsyncIterator[Dict]:
+        url = f"{self.client.url}/{resource}"
+        while True:
+            payload = await self._request(session, url, params)
+            for record in payload.get("Data") or []:
+                if record:
+                    yield record
+            next_page = (payload.get("Paging") or {}).get("Next")
+            if not next_page:
+                return
+            url = next_page
+
+    async def _get_employee_details(self, session, employee: Dict) -> Dict:
+        xrefcode = employee["XRefCode"]
+        url = f"{self.client.url}/Employees/{xrefcode}"
+        version = None
+        if self.detail_cache is not None:
+            version = employee.get("LastModifiedTimestamp")
+            if version is None:
+                version = (await self._request(session, url)).get("Data", {}).get("LastModifiedTimestamp")
+            if version is not None:
+                cached = self.detail_cache.get(self.cache_namespace, xrefcode, version)
+                if cached is not None:
+                    LOGGER.debug(f"Using cached details for XRefCode: {xrefcode}")
+                    return cached
+
+        details = (await self._request(session, url, {"expand": self.details_expand})).get("Data") or {}
+        if self.detail_cache is not None and version is not None and details.get("XRefCode") is not None:
+            self.detail_cache.put(self.cache_namespace, xrefcode, version, details)
+        return details
+
+    async def _get_employee_schedules(self, session, xrefcode: str, start: datetime, end: datetime) -> Dict:
+        try:
+            return await self._request(
+                session,
+                f"{self.client.url}/Employees/{xrefcode}/Schedules",
+                {
+                    "filterScheduleStartDate": singer.utils.strftime(start),
+                    "filterScheduleEndDate": singer.utils.strftime(end),
+                    "expand": self.schedules_expand,
+                },
+            )
+        except requests.exceptions.HTTPError as e:
+            if e.response.status_code == 401:
+                LOGGER.debug(f"Unauthorized access for XRefCode: {xrefcode}; returning null.")
+            else:
+                LOGGER.warn(f"HTTP Error occurred on xrefcode: {xrefcode} with error {e}")
+            return {"error": None}
+
+    async def _get_employee_payloads(
+        self, session, employee: Dict, start: datetime, end: datetime
+    ) -> Tuple[str, Tuple[Dict, Dict]]:
+        xrefcode = employee["XRefCode"]
+        if not self.fetch_schedules:
+            return xrefcode, (await self._get_employee_details(session, employee), {})
+        details, schedules = await asyncio.gather(
+            self._get_employee_details(session, employee),
+            self._get_employee_schedules(session, xrefcode, start, end),
+        )
+        return xrefcode, (details, schedules)
@@ -0,0 +1,101 @@
+import sqlite3
+import threading
+import time
+import zlib
+from typing import Dict, Optional
+
+import attr
+import simplejson
+
+_DETAIL_CACHES: Dict[str, "DetailCache"] = {}
+_DETAIL_CACHES_LOCK = threading.Lock()
+
+
+@attr.s
+class DetailCache(object):
+    """Persistent cache of Dayforce response payloads, backed by SQLite.
+
+    Payloads are stored zlib-compressed under a key together with the `version` they were
+    fetched at (e.g. an employee's `LastModifiedTimestamp`), and are only served back for
+    that same version and for at most `ttl_seconds`. Expired entries are dropped on
+    `commit`, which also evicts the least recently used entries once the compressed
+    payloads take up more than `max_bytes`.
+    """
+
+    path: str = attr.ib()
+    ttl_seconds: float = attr.ib(default=7 * 24 * 3600)
+    max_bytes: int = attr.ib(default=512 * 1024 * 1024)
+    _connection: sqlite3.Connection = attr.ib(init=False, repr=False)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def __attrs_post_init__(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS responses "
+            "(namespace TEXT NOT NULL, key TEXT NOT NULL, version TEXT NOT NULL, payload BLOB NOT NULL, "
+            "size INTEGER NOT NULL, stored_at REAL NOT NULL, used_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS responses_used_at ON responses (used_at)")
+        self._connection.commit()
+
+    def get(self, namespace: str, key: str, version: str) -> Optional[Dict]:
+        """Return the payload cached for `key` at `version`, or None if there is no fresh one."""
+        now = time.time()
+        with self._lock:
+            row = self._connection.execute(
+                "SELECT payload FROM responses WHERE namespace = ? AND key = ? AND version = ? AND stored_at > ?",
+                (namespace, key, version, now - self.ttl_seconds),
+            ).fetchone()
+            if row is None:
+                return None
+            self._connection.execute(
+                "UPDATE responses SET used_at = ? WHERE namespace = ? AND key = ?", (now, namespace, key)
+            )
+        return simplejson.loads(zlib.decompress(row[0]).decode("utf-8"))
+
+    def put(self, namespace: str, key: str, version: str, value: Dict):
+        """Cache `value` as the payload of `key` at `version`, replacing any older version."""
+        payload = zlib.compress(simplejson.dumps(value, use_decimal=True).encode("utf-8"))
+        now = time.time()
+        with self._lock:
+            self._connection.execute(
+                "INSERT OR REPLACE INTO responses (namespace, key, version, payload, size, stored_at, used_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (namespace, key, version, payload, len(payload), now, now),
+            )
+
+    def commit(self):
+        """Persist the payloads cached so far, dropping expired and least recently used ones."""
+        with self._lock:
+            self._connection.execute("DELETE FROM responses WHERE stored_at <= ?", (time.time() - self.ttl_seconds,))
+            (total,) = self._connection.execute("SELECT COALESCE(SUM(size), 0) FROM responses").fetchone()
+            if total > self.max_bytes:
+                evicted = 0
+                rowids = []
+                for rowid, size in self._connection.execute("SELECT rowid, size FROM responses ORDER BY used_at"):
+                    if total - evicted <= self.max_bytes:
+                        break
+                    rowids.append((rowid,))
+                    evicted += size
+                self._connection.executemany("DELETE FROM responses WHERE rowid = ?", rowids)
+            self._connection.commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def get_detail_cache(config: Dict) -> Optional[DetailCache]:
+    """Return the process-wide DetailCache configured by `detail_cache_path`, if any."""
+    path = config.get("detail_cache_path")
+    if path is None:
+        return None
+    with _DETAIL_CACHES_LOCK:
+        if path not in _DETAIL_CACHES:
+            _DETAIL_CACHES[path] = DetailCache(
+                path=path,
+                ttl_seconds=float(config.get("detail_cache_ttl_hours", 7 * 24)) * 3600,
+                max_bytes=int(float(config.get("detail_cache_max_mb", 512)) * 1024 * 1024),
+            )
+        return _DETAIL_CACHES[path]
@@ -0,0 +1,143 @@
+import collections
+import time
+from typing import Dict, Iterator, Optional, Tuple
+
+import requests
+import singer
+from dayforce_client import Dayforce
+from dayforce_client.client import DayforceResponse
+
+from .instrumentation import endpoint_name, get_instrumentation
+from .ratelimit import RateLimiter, get_rate_limiter, parse_retry_after
+from .reports import ReportPageReader, paging_next
+
+LOGGER = singer.get_logger()
+
+
+def build_session(pool_size: int = 10) -> requests.Session:
+    """Build a Session whose connections to Dayforce are kept alive and reused by up to
+    `pool_size` concurrent requests."""
+    session = requests.Session()
+    adapter = requests.adapters.HTTPAdapter(pool_connections=1, pool_maxsize=pool_size)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+class DayforceClient(Dayforce):
+    """Dayforce client that paces every request (including pagination requests) through
+    a shared RateLimiter and transparently re-issues requests rejected with a 429.
+
+    Requests are sent through a single pooled Session, so one client can be shared by every
+    stream and worker thread of the tap without setting up a new connection per request."""
+
+    def __attrs_post_init__(self):
+        super().__attrs_post_init__()
+        self.rate_limiter = RateLimiter()
+        self.max_rate_limit_retries = 5
+        self.timeout = 30.0
+        self.session = build_session()
+        self.instrumentation = get_instrumentation()
+        self.stream_chunk_size = 64 * 1024
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "DayforceClient":
+        client = cls(
+            username=config.get("username"),
+            password=config.get("password"),
+            client_namespace=config.get("client_namespace"),
+            dayforce_release=config.get("dayforce_release", "241"),
+            api_version=config.get("api_version", "V1"),
+            test=config.get("test", False),
+        )
+        client.rate_limiter = get_rate_limiter(config)
+        client.max_rate_limit_retries = int(config.get("rate_limit_max_retries", 5))
+        client.timeout = float(config.get("request_timeout", 30))
+        client.session = build_session(pool_size=int(config.get("http_pool_size", 10)))
+        return client
+
+    def get_resource(self, *, resource: str, params: Optional[Dict] = None) -> DayforceResponse:
+        """Get any Dayforce resource, including ones dayforce-client has no getter for (e.g. the
+        paged `EmployeeSchedules` endpoint)."""
+        return self._get_resource(resource=resource, params=params)
+
+    def iter_report_rows(
+        self, *, xrefcode: str, params: Optional[Dict] = None, limit: Optional[Tuple[int, int]] = None
+    ) -> Iterator[Dict]:
+        """Yield the rows of every page of a report while each page's body is still streaming in,
+        instead of parsing whole pages first like `get_report(...).yield_report_rows()` does.
+        `limit` has the same meaning as for `yield_report_rows`."""
+        url: Optional[str] = f"{self.url}/Reports/{xrefcode}"
+        times: collections.deque = collections.deque()
+        while url is not None:
+            response = self._request(method="GET", url=url, params=params, stream=True)
+            times.appendleft(time.time())
+            with response:
+                page = ReportPageReader(response.iter_content(chunk_size=self.stream_chunk_size))
+                yield from page
+            self.instrumentation.increment("http_bytes_received", endpoint_name(url, self.url), page.bytes_read)
+            url = paging_next(page.envelope)
+            if url is not None and limit is not None:
+                DayforceResponse._rate_limit(times, limit)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """Number of requests sent through the Session's connection pools, and how many of them
+        had to open a new connection rather than reuse a kept-alive one."""
+        stats = {"requests": 0, "connections_opened": 0, "connections_reused": 0}
+        for adapter in set(self.session.adapters.values()):
+            pools = adapter.poolmanager.pools
+            for key in pools.keys():
+                pool = pools[key]
+                stats["requests"] += pool.num_requests
+                stats["connections_opened"] += pool.num_connections
+        stats["connections_reused"] = max(stats["requests"] - stats["connections_opened"], 0)
+        return stats
+
+    def _paced_request(
+        self, *, method: str, url: str, params: Optional[Dict] = None, data: Optional[Dict] = None, stream: bool = False
+    ) -> requests.Response:
+        """Send a request once the RateLimiter allows it. With `stream`, only the headers have been
+        read when this returns, so the body is not included in the request's duration or bytes."""
+        self.rate_limiter.acquire()
+        started = time.perf_counter()
+        try:
+            response = self.session.request(
+                method=method,
+                url=url,
+                auth=(self.username, self.password),
+                headers=self._construct_headers(),
+                params=params,
+                data=data,
+                timeout=self.timeout,
+                stream=stream,
+            )
+        finally:
+            self.rate_limiter.release()
+        self.instrumentation.observe_request(
+            endpoint_name(url, self.url),
+            time.perf_counter() - started,
+            response.status_code,
+            0 if stream and response.ok else len(response.content),
+        )
+        response.raise_for_status()
+        return response
+
+    def _request(
+        self, *, method: str, url: str, params: Optional[Dict] = None, data: Optional[Dict] = None, stream: bool = False
+    ) -> requests.Response:
+        retries = 0
+        while True:
+            try:
+                response = self._paced_request(method=method, url=url, params=params, data=data, stream=stream)
+            except requests.exceptions.HTTPError as e:
+                if e.response is None or e.response.status_code != 429 or retries >= self.max_rate_limit_retries:
+                    raise
+                retries += 1
+                retry_after = parse_retry_after(e.response.headers.get("Retry-After"))
+                self.rate_limiter.on_rate_limited(retry_after)
+                self.instrumentation.increment("rate_limit_retries", endpoint_name(url, self.url))
+                self.instrumentation.increment("rate_limit_seconds", endpoint_name(url, self.url), retry_after)
+                LOGGER.info(f"Rate limit reached. Retrying in {retry_after} seconds..")
+            else:
+                self.rate_limiter.on_success()
+                return response
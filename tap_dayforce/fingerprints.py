@@ -0,0 +1,97 @@
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from typing import Dict, Optional
+
+import attr
+
+_FINGERPRINT_STORES: Dict[str, "FingerprintStore"] = {}
+_FINGERPRINT_STORES_LOCK = threading.Lock()
+
+
+def fingerprint(record: Dict) -> str:
+    """Content hash of `record` that does not depend on key order."""
+    return hashlib.md5(json.dumps(record, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+
+
+@attr.s
+class FingerprintStore(object):
+    """Persistent map of record keys to content fingerprints, backed by SQLite.
+
+    Used to suppress records that have not changed since they were last emitted. Once
+    the store holds more than `max_entries` fingerprints, the least recently seen ones
+    are evicted on `save`.
+
+    Streams should only `save` the fingerprints of records once they have been emitted
+    and checkpointed, so that a failed run never suppresses records it didn't emit.
+    """
+
+    path: str = attr.ib()
+    max_entries: int = attr.ib(default=1000000)
+    _connection: sqlite3.Connection = attr.ib(init=False, repr=False)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def __attrs_post_init__(self):
+        self._connection = sqlite3.connect(self.path, check_same_thread=False)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS fingerprints "
+            "(namespace TEXT NOT NULL, key TEXT NOT NULL, fingerprint TEXT NOT NULL, seen_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS fingerprints_seen_at ON fingerprints (seen_at)")
+        self._connection.commit()
+
+    def _get(self, namespace: str, key: str) -> Optional[str]:
+        row = self._connection.execute(
+            "SELECT fingerprint FROM fingerprints WHERE namespace = ? AND key = ?", (namespace, key)
+        ).fetchone()
+        return row[0] if row is not None else None
+
+    def _put(self, namespace: str, key: str, value: str):
+        self._connection.execute(
+            "INSERT OR REPLACE INTO fingerprints (namespace, key, fingerprint, seen_at) VALUES (?, ?, ?, ?)",
+            (namespace, key, value, time.time()),
+        )
+
+    def get(self, namespace: str, key: str) -> Optional[str]:
+        """The fingerprint stored for `key`, if any."""
+        with self._lock:
+            return self._get(namespace, key)
+
+    def _commit(self):
+        """Persist the fingerprints recorded so far, evicting the least recently seen ones."""
+        (count,) = self._connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone()
+        if count > self.max_entries:
+            self._connection.execute(
+                "DELETE FROM fingerprints WHERE rowid IN " "(SELECT rowid FROM fingerprints ORDER BY seen_at LIMIT ?)",
+                (count - self.max_entries,),
+            )
+        self._connection.commit()
+
+    def save(self, namespace: str, fingerprints: Dict[str, str]):
+        """Remember and persist the fingerprints of the `{key: fingerprint}` records a stream has
+        emitted. The store is shared by streams syncing on other threads, so the fingerprints are
+        written and committed together, and a stream never persists another's pending ones."""
+        with self._lock:
+            for key, value in fingerprints.items():
+                self._put(namespace, key, value)
+            self._commit()
+
+    def close(self):
+        with self._lock:
+            self._connection.close()
+
+
+def get_fingerprint_store(config: Dict) -> Optional[FingerprintStore]:
+    """Return the process-wide FingerprintStore configured by `fingerprint_db_path`, if any."""
+    path = config.get("fingerprint_db_path")
+    if path is None:
+        return None
+    with _FINGERPRINT_STORES_LOCK:
+        if path not in _FINGERPRINT_STORES:
+            _FINGERPRINT_STORES[path] = FingerprintStore(
+                path=path, max_entries=int(config.get("fingerprint_max_entries", 1000000))
+            )
+        return _FINGERPRINT_STORES[path]
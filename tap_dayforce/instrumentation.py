@@ -0,0 +1,187 @@
+import contextlib
+import json
+import re
+import threading
+import time
+from typing import Dict, Iterator, List, Tuple
+
+import attr
+import singer
+
+LATENCY_BUCKETS: Tuple[float, ...] = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+_XREFCODE_PATH = re.compile(r"^Employees/[^/]+")
+
+
+def endpoint_name(url: str, base_url: str) -> str:
+    """Name of the Dayforce resource requested by `url`, with XRefCodes replaced by a placeholder
+    so that every employee's details or schedules are accounted to the same endpoint."""
+    path = url.split("?", 1)[0]
+    if path.startswith(base_url):
+        path = path.replace(base_url, "", 1)
+    return _XREFCODE_PATH.sub("Employees/{xrefcode}", path.strip("/"))
+
+
+@attr.s
+class Histogram(object):
+    """Fixed-bucket histogram of durations in seconds."""
+
+    buckets: Tuple[float, ...] = attr.ib(default=LATENCY_BUCKETS)
+    counts: List[int] = attr.ib(init=False)
+    count: int = attr.ib(init=False, default=0)
+    total: float = attr.ib(init=False, default=0.0)
+    max: float = attr.ib(init=False, default=0.0)
+
+    def __attrs_post_init__(self):
+        self.counts = [0] * (len(self.buckets) + 1)
+
+    def observe(self, value: float):
+        index = len(self.buckets)
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                index = i
+                break
+        self.counts[index] += 1
+        self.count += 1
+        self.total += value
+        self.max = max(self.max, value)
+
+    def quantile(self, q: float) -> float:
+        """Upper bound of the bucket holding the `q` quantile, or the maximum for the last bucket."""
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if seen >= rank and count:
+                return min(bound, self.max)
+        return self.max
+
+    def asdict(self) -> Dict:
+        return {
+            "count": self.count,
+            "total": self.total,
+            "max": self.max,
+            "p50": self.quantile(0.5),
+            "p95": self.quantile(0.95),
+            "buckets": {str(bound): count for bound, count in zip(self.buckets + ("inf",), self.counts)},
+        }
+
+
+@attr.s
+class Instrumentation(object):
+    """Thread-safe collector of per-endpoint request metrics and per-stream stage timings.
+
+    Requests are recorded by the client (`observe_request`), 429s and backoff retries by
+    the code that handles them (`increment`, `on_backoff`) and time spent transforming,
+    whitelisting and writing records by the streams (`add_duration`). At the end of a run the
+    totals are logged as Singer METRIC messages (`emit_metrics`) and can be written to a
+    JSON file (`write_summary`).
+    """
+
+    latencies: Dict[str, Histogram] = attr.ib(init=False, factory=dict)
+    counters: Dict[Tuple[str, str], float] = attr.ib(init=False, factory=dict)
+    durations: Dict[Tuple[str, str], float] = attr.ib(init=False, factory=dict)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+
+    def observe_request(self, endpoint: str, seconds: float, status_code: int, bytes_received: int):
+        with self._lock:
+            self.latencies.setdefault(endpoint, Histogram()).observe(seconds)
+        self.increment("http_bytes_received", endpoint, bytes_received)
+        if status_code >= 400:
+            self.increment(f"http_{status_code}_responses", endpoint)
+
+    def increment(self, metric: str, endpoint: str, value: float = 1):
+        with self._lock:
+            self.counters[(metric, endpoint)] = self.counters.get((metric, endpoint), 0) + value
+
+    def add_duration(self, stream: str, stage: str, seconds: float):
+        with self._lock:
+            self.durations[(stream, stage)] = self.durations.get((stream, stage), 0.0) + seconds
+
+    @contextlib.contextmanager
+    def timer(self, stream: str, stage: str) -> Iterator[None]:
+        """Add the time spent in the block to the `stage` duration of `stream`."""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_duration(stream, stage, time.perf_counter() - started)
+
+    def on_backoff(self, details: Dict):
+        """`backoff` handler counting retries, and the time slept before them, per retried function."""
+        target = details["target"].__qualname__
+        self.increment("backoff_retries", target)
+        self.increment("backoff_seconds", target, details.get("wait") or 0.0)
+
+    def summary(self) -> Dict:
+        with self._lock:
+            return {
+                "endpoints": {endpoint: histogram.asdict() for endpoint, histogram in sorted(self.latencies.items())},
+                "counters": [
+                    {"metric": metric, "endpoint": endpoint, "value": value}
+                    for (metric, endpoint), value in sorted(self.counters.items())
+                ],
+                "stages": [
+                    {"stream": stream, "stage": stage, "seconds": seconds}
+                    for (stream, stage), seconds in sorted(self.durations.items())
+                ],
+            }
+
+    def emit_metrics(self, logger):
+        summary = self.summary()
+        for endpoint, latency in summary["endpoints"].items():
+            singer.metrics.log(
+                logger,
+                singer.metrics.Point(
+                    "timer",
+                    singer.metrics.Metric.http_request_duration,
+                    latency["total"],
+                    {
+                        singer.metrics.Tag.endpoint: endpoint,
+                        "count": latency["count"],
+                        "p50": latency["p50"],
+                        "p95": latency["p95"],
+                        "max": latency["max"],
+                    },
+                ),
+            )
+        for counter in summary["counters"]:
+            singer.metrics.log(
+                logger,
+                singer.metrics.Point(
+                    "counter", counter["metric"], counter["value"], {singer.metrics.Tag.endpoint: counter["endpoint"]}
+                ),
+            )
+        for stage in summary["stages"]:
+            singer.metrics.log(
+                logger,
+                singer.metrics.Point(
+                    "timer",
+                    f"{stage['stage']}_duration",
+                    stage["seconds"],
+                    {singer.metrics.Tag.endpoint: stage["stream"]},
+                ),
+            )
+
+    def write_summary(self, path: str):
+        with open(path, "w") as f:
+            json.dump(self.summary(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.latencies.clear()
+            self.counters.clear()
+            self.durations.clear()
+
+
+_INSTRUMENTATION = Instrumentation()
+
+
+def get_instrumentation() -> Instrumentation:
+    """Return the process-wide Instrumentation."""
+    return _INSTRUMENTATION
+
+
+def on_backoff(details: Dict):
+    """`backoff` handler recording retries with the process-wide Instrumentation."""
+    get_instrumentation().on_backoff(details)
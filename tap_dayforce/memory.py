@@ -0,0 +1,64 @@
+import os
+import time
+from typing import Dict, Optional
+
+import attr
+import singer
+
+LOGGER = singer.get_logger()
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss_mb() -> float:
+    """Resident set size of the process in MB. Read from /proc on Linux; elsewhere the peak RSS
+    is the best available approximation. 0 where neither is available (e.g. Windows), so a
+    memory budget is never exceeded there."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * _PAGE_SIZE / (1024 * 1024)
+    except (OSError, IndexError, ValueError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0.0
+    # ru_maxrss is in KB on Linux, but bytes on macOS.
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024) if peak > 1 << 32 else peak / 1024
+
+
+@attr.s
+class MemoryBudget(object):
+    """Soft limit of `limit_mb` on the resident memory of the tap.
+
+    Streams call `check` as they go. The process's RSS is read at most every `interval`
+    seconds, so checking is cheap enough to do for every record. Python rarely returns
+    memory to the OS, so once the budget is exceeded it stays exceeded, and the stream keeps
+    using its memory-saving behavior for the rest of its sync.
+    """
+
+    limit_mb: float = attr.ib()
+    interval: float = attr.ib(default=0.1)
+    exceeded: bool = attr.ib(init=False, default=False)
+    _checked_at: float = attr.ib(init=False, default=float("-inf"), repr=False)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> Optional["MemoryBudget"]:
+        """The budget set by the optional `memory_budget_mb` config, if any."""
+        limit = config.get("memory_budget_mb")
+        return cls(limit_mb=float(limit)) if limit is not None else None
+
+    def check(self) -> bool:
+        """Whether the budget has been exceeded."""
+        if self.exceeded:
+            return True
+        now = time.monotonic()
+        if now - self._checked_at < self.interval:
+            return False
+        self._checked_at = now
+        rss = current_rss_mb()
+        if rss > self.limit_mb:
+            self.exceeded = True
+            LOGGER.warning(f"Resident memory of {rss:,.0f} MB exceeds the budget of {self.limit_mb:,.0f} MB.")
+        return self.exceeded
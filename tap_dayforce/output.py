@@ -0,0 +1,281 @@
+import gzip
+import os
+import pathlib
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import attr
+import simplejson
+import singer
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+
+def format_message(message: Dict) -> bytes:
+    """Serialize a Singer message to a UTF-8 encoded line.
+
+    Uses orjson when it is installed; messages orjson can't encode (e.g. records with
+    Decimal values) fall back to the same simplejson call singer-python uses.
+    """
+    if orjson is not None:
+        try:
+            return orjson.dumps(message, option=orjson.OPT_APPEND_NEWLINE)
+        except TypeError:
+            pass
+    return (simplejson.dumps(message, use_decimal=True) + "\n").encode("utf-8")
+
+
+@attr.s
+class MessageWriter(object):
+    """Buffered, thread-safe writer for Singer messages on stdout.
+
+    RECORD messages are buffered and written in batches of `batch_size`. SCHEMA and STATE
+    messages flush the buffer first so messages keep their order, and are written
+    immediately. Use as a context manager to flush whatever is left on exit.
+
+    Messages are serialized and written while holding `lock`, so streams syncing on
+    different threads never interleave within a message. Hold it too while changing a
+    state dict that is written with `write_state`.
+    """
+
+    batch_size: int = attr.ib(default=500)
+    _buffer: List[bytes] = attr.ib(init=False, factory=list, repr=False)
+    _lock: threading.RLock = attr.ib(init=False, factory=threading.RLock, repr=False)
+    _time_extracted: Optional[datetime] = attr.ib(init=False, default=None, repr=False)
+    _time_extracted_str: str = attr.ib(init=False, default="", repr=False)
+
+    @property
+    def lock(self) -> threading.RLock:
+        return self._lock
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.flush()
+
+    def _format_time_extracted(self, time_extracted: datetime) -> str:
+        # time_extracted is shared by every record in a window, so only format it once.
+        if time_extracted is not self._time_extracted:
+            self._time_extracted = time_extracted
+            self._time_extracted_str = singer.utils.strftime(time_extracted.astimezone(timezone.utc))
+        return self._time_extracted_str
+
+    def _write(self, lines: List[bytes]):
+        stdout = sys.stdout
+        buffer = getattr(stdout, "buffer", None)
+        if buffer is None:
+            stdout.write(b"".join(lines).decode("utf-8"))
+        else:
+            stdout.flush()
+            buffer.write(b"".join(lines))
+            buffer.flush()
+        stdout.flush()
+
+    def release(self):
+        """Write the buffered RECORD messages now, so their memory is freed. Unlike `flush`, this
+        never ends a batch of files."""
+        with self._lock:
+            if self._buffer:
+                lines, self._buffer = self._buffer, []
+                self._write(lines)
+
+    def flush(self):
+        self.release()
+
+    def write_record(self, stream_name: str, record: Dict, time_extracted: Optional[datetime] = None):
+        message = {"type": "RECORD", "stream": stream_name, "record": record}
+        with self._lock:
+            if time_extracted is not None:
+                message["time_extracted"] = self._format_time_extracted(time_extracted)
+            self._buffer.append(format_message(message))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def write_serialized_record(self, stream_name: str, record: bytes, time_extracted: Optional[datetime] = None):
+        """Write a RECORD message for a `record` that was already serialized by `format_message`."""
+        parts = [b'{"type":"RECORD","stream":', simplejson.dumps(stream_name).encode("utf-8"), b',"record":']
+        parts.append(record.rstrip(b"\n"))
+        with self._lock:
+            if time_extracted is not None:
+                parts += [b',"time_extracted":"', self._format_time_extracted(time_extracted).encode("utf-8"), b'"']
+            parts.append(b"}\n")
+            self._buffer.append(b"".join(parts))
+            if len(self._buffer) >= self.batch_size:
+                self.flush()
+
+    def write_message(self, message: singer.messages.Message):
+        with self._lock:
+            self.flush()
+            self._write([format_message(message.asdict())])
+
+    def write_schema(self, stream_name: str, schema: Dict, key_properties: List[str]):
+        self.write_message(singer.SchemaMessage(stream=stream_name, schema=schema, key_properties=key_properties))
+
+    def write_state(self, value: Dict):
+        self.write_message(singer.StateMessage(value=value))
+
+
+# File name suffix added by every compression of JSONL batch files.
+COMPRESSION_SUFFIXES = {"gzip": ".gz", "zstd": ".zst", "none": ""}
+
+
+@attr.s
+class _BatchFile(object):
+    path: str = attr.ib()
+    handle: Any = attr.ib(default=None, repr=False)
+    rows: List[Dict] = attr.ib(factory=list, repr=False)
+    records: int = attr.ib(default=0)
+
+
+@attr.s
+class FileMessageWriter(MessageWriter):
+    """Writer that writes RECORD messages to files instead of stdout, for targets that bulk-load them.
+
+    The records of every stream are written to JSONL files (gzip or zstd compressed, or
+    uncompressed), or to Parquet files, under `output_dir/<stream>/<run_id>/window-<n>/`. A file
+    is closed after `max_records_per_file` records, and before every SCHEMA or STATE message,
+    which streams write after every sync window. The files closed since the last SCHEMA or
+    STATE are announced with one BATCH message per stream, written to stdout right before the
+    SCHEMA or STATE message, so a target never sees a state before the records it covers.
+    Records are written without their `time_extracted`.
+
+    zstd compression requires `zstandard`, and Parquet requires `pyarrow`
+    (`pip install tap-dayforce[batch]`).
+    """
+
+    output_dir: str = attr.ib(kw_only=True)
+    file_format: str = attr.ib(kw_only=True, default="jsonl", validator=attr.validators.in_(("jsonl", "parquet")))
+    compression: str = attr.ib(kw_only=True, default="gzip", validator=attr.validators.in_(COMPRESSION_SUFFIXES))
+    max_records_per_file: int = attr.ib(kw_only=True, default=100000)
+    run_id: str = attr.ib(kw_only=True, factory=lambda: datetime.now(timezone.utc).strftime("%Y%m%dT%H%M%S%fZ"))
+    _codec: Any = attr.ib(init=False, default=None, repr=False)
+    _files: Dict[str, _BatchFile] = attr.ib(init=False, factory=dict, repr=False)
+    _parts: Dict[str, int] = attr.ib(init=False, factory=dict, repr=False)
+    _windows: Dict[str, int] = attr.ib(init=False, factory=dict, repr=False)
+    _manifests: Dict[str, List[str]] = attr.ib(init=False, factory=dict, repr=False)
+
+    def __attrs_post_init__(self):
+        # Only import the optional dependency the configured format needs, and fail before any
+        # record has been fetched if it is missing.
+        try:
+            if self.file_format == "parquet":
+                import pyarrow
+                import pyarrow.parquet
+
+                self._codec = pyarrow
+            elif self.compression == "zstd":
+                import zstandard
+
+                self._codec = zstandard
+        except ImportError as e:
+            raise RuntimeError(f"Batch output with {self.encoding} requires {e.name}: pip install tap-dayforce[batch]")
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "FileMessageWriter":
+        return cls(
+            output_dir=config["batch_output_dir"],
+            file_format=config.get("batch_format", "jsonl"),
+            compression=config.get("batch_compression", "gzip"),
+            max_records_per_file=int(config.get("batch_max_records", 100000)),
+        )
+
+    @property
+    def encoding(self) -> Dict[str, str]:
+        return {"format": self.file_format, "compression": self.compression}
+
+    def _open(self, stream_name: str) -> _BatchFile:
+        window = self._windows.get(stream_name, 0)
+        part = self._parts.get(stream_name, 0)
+        self._parts[stream_name] = part + 1
+        directory = os.path.join(self.output_dir, stream_name, self.run_id, f"window-{window:05d}")
+        os.makedirs(directory, exist_ok=True)
+        if self.file_format == "parquet":
+            return _BatchFile(path=os.path.join(directory, f"part-{part:05d}.parquet"))
+
+        path = os.path.join(directory, f"part-{part:05d}.jsonl{COMPRESSION_SUFFIXES[self.compression]}")
+        handle: Any
+        if self.compression == "gzip":
+            handle = gzip.open(path, "wb", compresslevel=6)
+        elif self.compression == "zstd":
+            handle = self._codec.open(path, "wb")
+        else:
+            handle = open(path, "wb")
+        return _BatchFile(path=path, handle=handle)
+
+    def _close(self, stream_name: str):
+        batch_file = self._files.pop(stream_name)
+        if batch_file.handle is not None:
+            batch_file.handle.close()
+        else:
+            self._codec.parquet.write_table(
+                self._codec.Table.from_pylist(batch_file.rows),
+                batch_file.path,
+                compression=None if self.compression == "none" else self.compression,
+            )
+        self._manifests.setdefault(stream_name, []).append(pathlib.Path(batch_file.path).resolve().as_uri())
+
+    def flush(self):
+        """Close every open file and write the BATCH messages announcing the files closed so far."""
+        with self._lock:
+            super().flush()
+            for stream_name in list(self._files):
+                self._close(stream_name)
+            for stream_name, manifest in self._manifests.items():
+                self._windows[stream_name] = self._windows.get(stream_name, 0) + 1
+                self._parts[stream_name] = 0
+                message = {"type": "BATCH", "stream": stream_name, "encoding": self.encoding, "manifest": manifest}
+                self._write([format_message(message)])
+            self._manifests = {}
+
+    def _get_file(self, stream_name: str) -> _BatchFile:
+        batch_file = self._files.get(stream_name)
+        if batch_file is None:
+            batch_file = self._files[stream_name] = self._open(stream_name)
+        batch_file.records += 1
+        return batch_file
+
+    def _rotate(self, stream_name: str):
+        if self._files[stream_name].records >= self.max_records_per_file:
+            self._close(stream_name)
+
+    def write_record(self, stream_name: str, record: Dict, time_extracted: Optional[datetime] = None):
+        with self._lock:
+            batch_file = self._get_file(stream_name)
+            if batch_file.handle is not None:
+                batch_file.handle.write(format_message(record))
+            else:
+                batch_file.rows.append(record)
+            self._rotate(stream_name)
+
+    def write_serialized_record(self, stream_name: str, record: bytes, time_extracted: Optional[datetime] = None):
+        with self._lock:
+            batch_file = self._get_file(stream_name)
+            if batch_file.handle is not None:
+                batch_file.handle.write(record)
+            else:
+                batch_file.rows.append(simplejson.loads(record))
+            self._rotate(stream_name)
+
+
+_WRITER = MessageWriter()
+_FILE_WRITERS: Dict[str, FileMessageWriter] = {}
+_FILE_WRITERS_LOCK = threading.Lock()
+
+
+def get_writer(config: Optional[Dict] = None) -> MessageWriter:
+    """Return the process-wide MessageWriter, or the process-wide FileMessageWriter for the
+    `batch_output_dir` in `config`."""
+    config = config or {}
+    output_dir = config.get("batch_output_dir")
+    if output_dir is None:
+        return _WRITER
+    with _FILE_WRITERS_LOCK:
+        if output_dir not in _FILE_WRITERS:
+            _FILE_WRITERS[output_dir] = FileMessageWriter.from_config(config)
+        return _FILE_WRITERS[output_dir]
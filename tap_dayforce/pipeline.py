@@ -0,0 +1,87 @@
+import itertools
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+import attr
+from singer.transform import SchemaMismatch
+
+from .output import format_message
+from .transform import RecordTransformer
+from .utils import ordered_map
+from .whitelisting import WhitelistProjector
+
+# Per-process state of pool workers, set up once by `_init_worker` rather than sent with every chunk.
+_WORKER: Dict = {}
+
+
+def _init_worker(schema: Dict, whitelist: Optional[WhitelistProjector]):
+    _WORKER.update(schema=schema, whitelist=whitelist, transformer=RecordTransformer())
+
+
+def _transform_chunk(chunk: List[Tuple[Dict, Dict]]) -> Tuple[List[Optional[bytes]], float]:
+    """Whitelist, transform and serialize every `(record, fields)` of `chunk` in a pool worker.
+    `fields` are added to the record after it is whitelisted. Records that don't match the
+    schema are returned as None."""
+    started = time.perf_counter()
+    schema, whitelist, transformer = _WORKER["schema"], _WORKER["whitelist"], _WORKER["transformer"]
+    lines: List[Optional[bytes]] = []
+    for record, fields in chunk:
+        if whitelist is not None:
+            record = whitelist.project(record)
+        record.update(fields)
+        try:
+            lines.append(format_message(transformer.transform(data=record, schema=schema)))
+        except SchemaMismatch:
+            transformer.errors = []
+            lines.append(None)
+    return lines, time.perf_counter() - started
+
+
+@attr.s
+class TransformPipeline(object):
+    """Pool of `processes` worker processes that whitelist, transform and serialize records off
+    the GIL, while the calling thread keeps fetching and writing.
+
+    Records are sent to the workers in chunks of `chunk_size`. At most `2 * processes` chunks
+    are in flight at once, so the records buffered between fetching and writing stay bounded,
+    and results are returned in input order. Workers are started with the `spawn` method, so
+    they never inherit locks held by the tap's other threads. Use as a context manager.
+    """
+
+    schema: Dict = attr.ib(repr=False)
+    whitelist: Optional[WhitelistProjector] = attr.ib(default=None, repr=False)
+    processes: int = attr.ib(default=2)
+    chunk_size: int = attr.ib(default=64)
+    _executor: Optional[ProcessPoolExecutor] = attr.ib(init=False, default=None, repr=False)
+
+    def __enter__(self):
+        self._executor = ProcessPoolExecutor(
+            max_workers=self.processes,
+            mp_context=multiprocessing.get_context("spawn"),
+            initializer=_init_worker,
+            initargs=(self.schema, self.whitelist),
+        )
+        return self
+
+    def __exit__(self, *args):
+        assert self._executor is not None
+        self._executor.shutdown(wait=True)
+        self._executor = None
+
+    def map(self, items: Iterable[Tuple[Dict, Dict]]) -> Iterator[Tuple[Tuple[Dict, Dict], Optional[bytes], float]]:
+        """Yield `((record, fields), line, seconds)` for every item, in order. `line` is the record's
+        serialized transformation, or None if it didn't match the schema. `seconds` is the time
+        workers spent on the item's chunk, reported with the chunk's first item and 0 after."""
+        assert self._executor is not None, "TransformPipeline must be used as a context manager"
+        iterator = iter(items)
+        chunks = iter(lambda: list(itertools.islice(iterator, self.chunk_size)), [])
+        results = ordered_map(self._executor, _transform_chunk, chunks, prefetch=2 * self.processes)
+        try:
+            for chunk, (lines, seconds) in results:
+                for item, line in zip(chunk, lines):
+                    yield item, line, seconds
+                    seconds = 0.0
+        finally:
+            results.close()
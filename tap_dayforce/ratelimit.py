@@ -0,0 +1,128 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+
+import attr
+
+_RATE_LIMITERS: Dict[Tuple, "RateLimiter"] = {}
+_RATE_LIMITERS_LOCK = threading.Lock()
+
+
+@attr.s
+class RateLimiter(object):
+    """Thread-safe, adaptive token bucket shared by every request made to Dayforce.
+
+    Requests are paced ahead of time at `requests_per_second` (allowing bursts of up to
+    `burst` requests). Each 429 multiplies the current rate by `decrease_factor` and
+    blocks all callers for the `Retry-After` period; every `increase_after` consecutive
+    successful requests the rate is nudged back up towards `requests_per_second`.
+    If `requests_per_second` is None requests are not paced, but 429s still block callers.
+    With `max_concurrency` set, at most that many requests may be in flight at once; every
+    `acquire` must then be paired with a `release` once the request has finished.
+    """
+
+    requests_per_second: Optional[float] = attr.ib(default=None)
+    burst: int = attr.ib(default=1)
+    min_requests_per_second: float = attr.ib(default=0.1)
+    decrease_factor: float = attr.ib(default=0.5)
+    increase_after: int = attr.ib(default=20)
+    increase_step: float = attr.ib(default=0.1)
+    max_concurrency: Optional[int] = attr.ib(default=None)
+    rate: Optional[float] = attr.ib(init=False)
+    _tokens: float = attr.ib(init=False)
+    _updated: float = attr.ib(init=False, factory=time.monotonic)
+    _blocked_until: float = attr.ib(init=False, default=0.0)
+    _successes: int = attr.ib(init=False, default=0)
+    _lock: threading.Lock = attr.ib(init=False, factory=threading.Lock, repr=False)
+    _slots: Optional[threading.BoundedSemaphore] = attr.ib(init=False, default=None, repr=False)
+
+    def __attrs_post_init__(self):
+        self.rate = self.requests_per_second
+        self._tokens = float(self.burst)
+        if self.max_concurrency is not None:
+            self._slots = threading.BoundedSemaphore(self.max_concurrency)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "RateLimiter":
+        requests_per_second = config.get("requests_per_second")
+        max_concurrency = config.get("max_concurrent_requests")
+        return cls(
+            requests_per_second=float(requests_per_second) if requests_per_second is not None else None,
+            burst=int(config.get("rate_limit_burst", 1)),
+            max_concurrency=int(max_concurrency) if max_concurrency is not None else None,
+        )
+
+    def _refill(self, now: float):
+        if self.rate is not None:
+            self._tokens = min(float(self.burst), self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def try_acquire(self) -> float:
+        """Take a token without blocking. Returns 0 if the caller may issue a request now, or
+        else the number of seconds to wait before trying again. Does not take a concurrency slot."""
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            wait = self._blocked_until - now
+            if wait > 0:
+                return wait
+            if self.rate is None:
+                return 0.0
+            if self._tokens >= 1:
+                self._tokens -= 1
+                return 0.0
+            return (1 - self._tokens) / self.rate
+
+    def acquire_slot(self, blocking: bool = True) -> bool:
+        """Take a concurrency slot, if `max_concurrency` is set. Without `blocking`, returns
+        False instead of waiting when none is free. A slot taken must be given back by `release`."""
+        return self._slots is None or self._slots.acquire(blocking)
+
+    def acquire(self):
+        """Block until the caller is allowed to issue a request."""
+        self.acquire_slot()
+        while True:
+            wait = self.try_acquire()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def release(self):
+        """Give back the concurrency slot taken by `acquire`."""
+        if self._slots is not None:
+            self._slots.release()
+
+    def on_success(self):
+        """Record a successful request, speeding back up after a run of successes."""
+        with self._lock:
+            self._successes += 1
+            if self.rate is None or self.requests_per_second is None or self._successes < self.increase_after:
+                return
+            self._successes = 0
+            self.rate = min(self.requests_per_second, self.rate + self.requests_per_second * self.increase_step)
+
+    def on_rate_limited(self, retry_after: Optional[float] = None):
+        """Record a 429, slowing down and blocking callers for `retry_after` seconds."""
+        with self._lock:
+            now = time.monotonic()
+            self._successes = 0
+            self._tokens = 0.0
+            if self.rate is not None:
+                self.rate = max(self.min_requests_per_second, self.rate * self.decrease_factor)
+            self._blocked_until = max(self._blocked_until, now + (retry_after or 0))
+
+
+def get_rate_limiter(config: Dict) -> RateLimiter:
+    """Return the process-wide RateLimiter for the request budget described by `config`."""
+    limiter = RateLimiter.from_config(config)
+    key = (limiter.requests_per_second, limiter.burst, limiter.max_concurrency)
+    with _RATE_LIMITERS_LOCK:
+        return _RATE_LIMITERS.setdefault(key, limiter)
+
+
+def parse_retry_after(value: Optional[str]) -> float:
+    """Parse the number of seconds from a `Retry-After` header, defaulting to 1 second."""
+    try:
+        return max(float(value or ""), 0.0)
+    except ValueError:
+        return 1.0
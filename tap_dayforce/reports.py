@@ -0,0 +1,138 @@
+import codecs
+import json
+import re
+import tempfile
+from typing import IO, Dict, Iterable, Iterator, Optional
+
+import attr
+
+from .output import format_message
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover
+    orjson = None  # type: ignore
+
+# Start of the `Rows` array. Quotes inside JSON strings are escaped, so a string can't match.
+_ROWS_START = re.compile(r'(?<!\\)"Rows"\s*:\s*\[')
+_SEPARATORS = frozenset(" \t\r\n,")
+
+
+@attr.s
+class ReportPageReader(object):
+    """Incremental parser for a page of a Dayforce report, read as `chunks` of the response body.
+
+    Iterating yields the rows of the page's `Data.Rows` array one at a time while the body is
+    still being read, so only the row being parsed is ever held in memory rather than the whole
+    page. Once every row has been yielded, the rest of the page (e.g. `Paging`) is available
+    as `envelope`, with an empty `Data.Rows`.
+    """
+
+    chunks: Iterable[bytes] = attr.ib()
+    bytes_read: int = attr.ib(init=False, default=0)
+    envelope: Dict = attr.ib(init=False, factory=dict)
+    _iterator: Iterator[bytes] = attr.ib(init=False, repr=False)
+    _decoder: codecs.IncrementalDecoder = attr.ib(init=False, repr=False)
+    _buffer: str = attr.ib(init=False, default="", repr=False)
+    _eof: bool = attr.ib(init=False, default=False, repr=False)
+
+    def __attrs_post_init__(self):
+        self._iterator = iter(self.chunks)
+        self._decoder = codecs.getincrementaldecoder("utf-8")()
+
+    def _read(self) -> bool:
+        """Append the next chunk to the buffer. Returns False once the body is exhausted."""
+        if self._eof:
+            return False
+        chunk = next(self._iterator, None)
+        if chunk is None:
+            self._eof = True
+            self._buffer += self._decoder.decode(b"", final=True)
+            return False
+        self.bytes_read += len(chunk)
+        self._buffer += self._decoder.decode(chunk)
+        return True
+
+    def _read_all(self) -> str:
+        while self._read():
+            pass
+        return self._buffer
+
+    def __iter__(self) -> Iterator[Dict]:
+        decoder = json.JSONDecoder()
+        match = _ROWS_START.search(self._buffer)
+        while match is None and self._read():
+            match = _ROWS_START.search(self._buffer)
+        if match is None:
+            self.envelope = json.loads(self._read_all())
+            return
+
+        rows_start = match.end()
+        prefix, self._buffer = self._buffer[:rows_start], self._buffer[rows_start:]
+        position = 0
+        while True:
+            while position < len(self._buffer) and self._buffer[position] in _SEPARATORS:
+                position += 1
+            row, end = None, None
+            if position < len(self._buffer):
+                if self._buffer[position] == "]":
+                    break
+                try:
+                    row, end = decoder.raw_decode(self._buffer, position)
+                except ValueError:
+                    pass
+            # A row that runs up to the end of the buffer may be cut short (e.g. a number), so
+            # only trust it once more of the body has been read.
+            if end is None or (end == len(self._buffer) and not self._eof):
+                # Drop the rows parsed so far, so the buffer never holds much more than a chunk.
+                self._buffer, position = self._buffer[position:], 0
+                if not self._read() and end is None:
+                    raise ValueError("Report page ended inside Data.Rows")
+                continue
+            if row:
+                yield row
+            position = end
+
+        self._buffer = self._buffer[position:]
+        self.envelope = json.loads(prefix + self._read_all())
+
+
+@attr.s
+class RowSpool(object):
+    """Temporary on-disk list of rows. Used to count the rows of a report window before deciding
+    whether to emit it, without holding the window in memory."""
+
+    _file: IO[bytes] = attr.ib(init=False, factory=lambda: tempfile.TemporaryFile(), repr=False)
+    _count: int = attr.ib(init=False, default=0)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self) -> int:
+        return self._count
+
+    def append(self, row: Dict):
+        self._file.write(format_message(row))
+        self._count += 1
+
+    def extend(self, rows: Iterable[Dict]):
+        for row in rows:
+            self.append(row)
+
+    def __iter__(self) -> Iterator[Dict]:
+        self._file.flush()
+        self._file.seek(0)
+        loads = json.loads if orjson is None else orjson.loads
+        for line in self._file:
+            yield loads(line)
+
+    def close(self):
+        self._file.close()
+
+
+def paging_next(envelope: Dict) -> Optional[str]:
+    """URL of the page after the one `envelope` belongs to, if there is one."""
+    return (envelope.get("Paging") or {}).get("Next") or None
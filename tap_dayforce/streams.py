@@ -1,6 +1,8 @@
+import collections
+import contextlib
 import os
 from datetime import datetime, timedelta
-from typing import ClassVar, Dict, List, Optional, Union
+from typing import ClassVar, Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 import attr
 import backoff
@@ -9,13 +11,19 @@ import singer
 from dayforce_client import Dayforce
 from singer.transform import SchemaMismatch
 
-from .utils import handle_rate_limit, handle_unauthorized, is_fatal_code
-from .whitelisting import (
-    WHITELISTED_COLLECTIONS,
-    WHITELISTED_FIELDS,
-    WHITELISTED_PAY_CLASS_CODES,
-    WHITELISTED_PAY_POLICY_CODES,
-)
+from .aio import AsyncEmployeesEngine
+from .cache import DetailCache, get_detail_cache
+from .client import DayforceClient
+from .fingerprints import FingerprintStore, fingerprint, get_fingerprint_store
+from .instrumentation import Instrumentation, get_instrumentation, on_backoff
+from .memory import MemoryBudget
+from .output import MessageWriter, get_writer
+from .pipeline import TransformPipeline
+from .reports import RowSpool
+from .transform import MismatchReporter, RecordTransformer
+from .utils import bounded_ordered_map, date_windows, handle_unauthorized, is_fatal_code
+from .whitelisting import WhitelistProjector
+from .windows import AdaptiveWindow
 
 LOGGER = singer.get_logger()
 
@@ -23,6 +31,11 @@ LOGGER = singer.get_logger()
 @attr.s
 class DayforceStream(object):
 
+    tap_stream_id: ClassVar[str]
+    key_properties: ClassVar[List[str]]
+    bookmark_properties: ClassVar[Union[str, List[str]]]
+    replication_method: ClassVar[str]
+
     client: Dayforce = attr.ib(validator=attr.validators.instance_of(Dayforce))
     config: Dict = attr.ib(repr=False, validator=attr.validators.instance_of(Dict))
     config_path: Union[os.PathLike, str] = attr.ib()
@@ -33,23 +46,41 @@ class DayforceStream(object):
         default=None,
     )
     catalog_path: Optional[Union[os.PathLike, str]] = attr.ib(default=None)
+    fingerprints: Optional[FingerprintStore] = attr.ib(default=None, repr=False)
+    detail_cache: Optional[DetailCache] = attr.ib(default=None, repr=False)
+    writer: MessageWriter = attr.ib(
+        default=attr.Factory(lambda self: get_writer(self.config), takes_self=True), repr=False
+    )
+    instrumentation: Instrumentation = attr.ib(factory=get_instrumentation, repr=False)
+    _schema: Optional[Dict] = attr.ib(init=False, default=None, repr=False)
+    transformer: singer.Transformer = attr.ib(init=False, factory=RecordTransformer, repr=False)
+    mismatches: MismatchReporter = attr.ib(
+        init=False,
+        repr=False,
+        default=attr.Factory(
+            lambda self: MismatchReporter(
+                stream=self.tap_stream_id, limit=int(self.config.get("schema_mismatch_log_limit", 10))
+            ),
+            takes_self=True,
+        ),
+    )
+    memory_budget: Optional[MemoryBudget] = attr.ib(
+        init=False,
+        repr=False,
+        default=attr.Factory(lambda self: MemoryBudget.from_config(self.config), takes_self=True),
+    )
 
     @classmethod
     def from_args(cls, args, **kwargs):
         return cls(
-            client=Dayforce(
-                username=args.config.get("username"),
-                password=args.config.get("password"),
-                client_namespace=args.config.get("client_namespace"),
-                dayforce_release=args.config.get("dayforce_release", "241"),
-                api_version=args.config.get("api_version", "V1"),
-                test=args.config.get("test", False),
-            ),
+            client=getattr(args, "client", None) or DayforceClient.from_config(args.config),
             config=args.config,
             config_path=args.config_path,
             catalog=getattr(args, "catalog", None),
             catalog_path=getattr(args, "catalog_path", None),
             state=args.state,
+            fingerprints=get_fingerprint_store(args.config),
+            detail_cache=get_detail_cache(args.config),
             **kwargs,
         )
 
@@ -57,6 +88,112 @@ class DayforceStream(object):
     def get_schema(tap_stream_id: str, catalog: singer.catalog.Catalog) -> Dict:
         return catalog.get_stream(tap_stream_id).schema.to_dict()
 
+    @property
+    def schema(self) -> Dict:
+        """The stream's schema, resolved from the catalog once and reused for every record."""
+        if self._schema is None:
+            self._schema = self.get_schema(self.tap_stream_id, self.catalog)
+        return self._schema
+
+    def transform_record(self, record: Dict) -> Dict:
+        """Transform `record` against the cached schema with the stream's long-lived Transformer.
+        Records that don't match the schema are reported to `mismatches` before SchemaMismatch
+        is raised."""
+        try:
+            with self.instrumentation.timer(self.tap_stream_id, "transform"):
+                return self.transformer.transform(data=record, schema=self.schema)
+        except SchemaMismatch as e:
+            errors, self.transformer.errors = self.transformer.errors, []
+            key = record.get(self.key_properties[0]) if self.key_properties else None
+            self.mismatches.report(key, e, errors)
+            self.instrumentation.increment("schema_mismatches", self.tap_stream_id)
+            raise
+
+    def write_record(self, record: Dict, time_extracted: datetime):
+        with self.instrumentation.timer(self.tap_stream_id, "write"):
+            self.writer.write_record(stream_name=self.tap_stream_id, record=record, time_extracted=time_extracted)
+
+    @property
+    def record_whitelist(self) -> Optional[WhitelistProjector]:
+        """Projector applied to every record before it is transformed, if any."""
+        return None
+
+    def prepare_record(self, record: Dict, fields: Dict) -> Dict:
+        """Whitelist `record` and add the tap's own `fields` to it, ready to be transformed."""
+        record.update(fields)
+        return record
+
+    def write_serialized_record(self, record: Dict, line: bytes, time_extracted: datetime):
+        """Write `record`, already transformed and serialized to `line` by a pipeline worker."""
+        with self.instrumentation.timer(self.tap_stream_id, "write"):
+            self.writer.write_serialized_record(self.tap_stream_id, line, time_extracted)
+
+    def transform_and_write_record(self, record: Dict, time_extracted: datetime):
+        self.write_record(self.transform_record(record), time_extracted)
+
+    @property
+    def memory_constrained(self) -> bool:
+        """Whether the tap's resident memory has exceeded the optional `memory_budget_mb`."""
+        return self.memory_budget is not None and self.memory_budget.check()
+
+    @contextlib.contextmanager
+    def transform_pipeline(self) -> Iterator[Optional[TransformPipeline]]:
+        """Pool of `transform_processes` worker processes to transform records in, or None to
+        transform them in the calling thread (the default)."""
+        processes = int(self.config.get("transform_processes", 1))
+        if processes <= 1:
+            yield None
+            return
+        with TransformPipeline(
+            schema=self.schema,
+            whitelist=self.record_whitelist,
+            processes=processes,
+            chunk_size=int(self.config.get("transform_chunk_size", 64)),
+        ) as pipeline:
+            yield pipeline
+
+    def write_records(
+        self,
+        items: Iterable[Tuple[Dict, Dict]],
+        time_extracted: datetime,
+        counter: singer.metrics.Counter,
+        pipeline: Optional[TransformPipeline] = None,
+    ):
+        """Prepare, transform and write every `(record, fields)` of `items`, in order.
+
+        With a `pipeline`, records are transformed and serialized by its worker processes while
+        `items` are still being fetched. Records the workers couldn't transform are transformed
+        again in this thread, so schema mismatches are handled the same with or without one.
+        Once the memory budget is exceeded, every record is written out as soon as it's
+        transformed rather than buffered by the writer.
+        """
+        results = ((item, None, 0.0) for item in items) if pipeline is None else pipeline.map(items)
+        for (record, fields), line, seconds in results:
+            if line is None:
+                self.transform_and_write_record(self.prepare_record(record, fields), time_extracted)
+            else:
+                self.instrumentation.add_duration(self.tap_stream_id, "transform", seconds)
+                self.write_serialized_record(record, line, time_extracted)
+            counter.increment()
+            if self.memory_constrained:
+                self.writer.release()
+
+    def write_bookmark(self, key: str, value):
+        """Record `value` under `key` in the stream's bookmarks. The state may be shared with
+        streams syncing on other threads, so it is only changed while holding the writer's lock."""
+        with self.writer.lock:
+            singer.bookmarks.write_bookmark(state=self.state, tap_stream_id=self.tap_stream_id, key=key, val=value)
+
+    def clear_bookmark(self, key: str):
+        with self.writer.lock:
+            singer.bookmarks.clear_bookmark(state=self.state, tap_stream_id=self.tap_stream_id, key=key)
+
+    def write_checkpoint(self, key: str, value: str):
+        """Record `value` under `key` in the stream's bookmarks and emit the updated state."""
+        with self.writer.lock:
+            self.write_bookmark(key, value)
+            self.writer.write_state(self.state)
+
     @staticmethod
     def get_bookmark(config: Dict, tap_stream_id: str, state: Dict, bookmark_properties: str) -> Optional[str]:
         bookmark = singer.bookmarks.get_bookmark(state, tap_stream_id, key=bookmark_properties)
@@ -68,89 +205,149 @@ class DayforceStream(object):
 
 @attr.s
 class DayforcePunchStream(DayforceStream):
+    resource: ClassVar[str]
+    window_size_key: ClassVar[str] = "window_size_seconds"
+
+    _pending_fingerprints: Dict[str, str] = attr.ib(init=False, factory=dict, repr=False)
+
+    @property
+    def window_workers(self) -> int:
+        return int(self.config.get("window_workers", 1))
+
+    def _get_window(self) -> Optional[AdaptiveWindow]:
+        """With `punch_window_target_records`, an adaptive window starting from the size the
+        previous run settled on, falling back to 6 days. Otherwise None, for fixed 6 day windows."""
+        target = self.config.get("punch_window_target_records")
+        if target is None:
+            return None
+        size = singer.bookmarks.get_bookmark(self.state, self.tap_stream_id, self.window_size_key)
+        return AdaptiveWindow(
+            size=timedelta(seconds=int(size)) if size is not None else timedelta(days=6),
+            min_size=timedelta(hours=float(self.config.get("punch_min_window_hours", 1))),
+            max_size=timedelta(days=float(self.config.get("punch_max_window_days", 6))),
+            target_rows=int(target),
+        )
+
+    @backoff.on_exception(
+        backoff.expo,
+        requests.exceptions.HTTPError,
+        max_time=240,
+        giveup=is_fatal_code,
+        logger=LOGGER,
+        on_backoff=on_backoff,
+    )
+    @backoff.on_exception(
+        backoff.expo,
+        (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        max_time=240,
+        logger=LOGGER,
+        on_backoff=on_backoff,
+    )
+    def _get_records(self, start: datetime, end: datetime) -> List[Dict]:
+        """Fetch every page of the stream's `resource` for the window from `start` to `end`."""
+        return [
+            record
+            for _, record in self.client.get_resource(
+                resource=self.resource,
+                params={
+                    "filterTransactionStartTimeUTC": singer.utils.strftime(start),
+                    "filterTransactionEndTimeUTC": singer.utils.strftime(end),
+                },
+            ).yield_records()
+            if record
+        ]
+
+    @property
+    def dedupe(self) -> bool:
+        return self.fingerprints is not None and bool(self.config.get("dedupe_punches", False))
+
+    def _is_unchanged(self, record: Dict) -> bool:
+        """Whether `record` was already emitted with the same content, by this run or a previous one.
+        The fingerprints of changed records are kept pending until their window is checkpointed."""
+        assert self.fingerprints is not None
+        key = record.get(self.key_properties[0])
+        if key is None:
+            return False
+        key, digest = str(key), fingerprint(record)
+        previous = self._pending_fingerprints.get(key) or self.fingerprints.get(self.tap_stream_id, key)
+        if previous == digest:
+            return True
+        self._pending_fingerprints[key] = digest
+        return False
+
+    def _iter_changed_records(self, records: List[Dict]) -> Iterator[Dict]:
+        dedupe = self.dedupe
+        for record in records:
+            # Fingerprint the punch as Dayforce returned it, before the per-run SyncTimestampUtc is added.
+            if dedupe and self._is_unchanged(record):
+                self.instrumentation.increment("records_suppressed", self.tap_stream_id)
+                continue
+            yield record
+
+    def _transform_records(
+        self,
+        records: List[Dict],
+        sync_timestamp: str,
+        counter: singer.metrics.Counter,
+        pipeline: Optional[TransformPipeline] = None,
+    ):
+        time_extracted = singer.utils.now()
+        fields = {"SyncTimestampUtc": sync_timestamp}
+        self.write_records(
+            ((record, fields) for record in self._iter_changed_records(records)), time_extracted, counter, pipeline
+        )
+
     def sync(self):
         with singer.metrics.job_timer(job_type=f"sync_{self.tap_stream_id}"):
-            with singer.metrics.record_counter(endpoint=self.tap_stream_id) as counter:
+            with singer.metrics.record_counter(
+                endpoint=self.tap_stream_id
+            ) as counter, self.transformer, self.mismatches, self.writer, self.transform_pipeline() as pipeline:
                 start = singer.utils.strptime_to_utc(
                     self.get_bookmark(self.config, self.tap_stream_id, self.state, self.bookmark_properties)
                 )
                 new_bookmark = singer.utils.now()
-                singer.bookmarks.write_bookmark(
-                    state=self.state,
-                    tap_stream_id=self.tap_stream_id,
-                    key=self.bookmark_properties,
-                    val=singer.utils.strftime(new_bookmark),
-                )
-                step = timedelta(days=6)
-                while start < new_bookmark:
-                    end = start + step - timedelta(seconds=1)
-                    self._transform_records(start, end, counter)
-                    start += step
+                sync_timestamp = singer.utils.strftime(new_bookmark)
+                window = self._get_window()
+                if window is None:
+                    windows = date_windows(start, new_bookmark, step=timedelta(days=6))
+                else:
+                    windows = window.windows(start, new_bookmark)
+                for (window_start, end), records in bounded_ordered_map(
+                    lambda bounds: (bounds, self._get_records(*bounds)), windows, max_workers=self.window_workers
+                ):
+                    self._transform_records(records, sync_timestamp, counter, pipeline)
+                    if window is not None:
+                        # Windows already being fetched keep their size; `fit` sizes the ones after them.
+                        window.fit(len(records), end - window_start + timedelta(seconds=1))
+                        self.write_bookmark(self.window_size_key, int(window.size.total_seconds()))
+                    self.write_checkpoint(
+                        self.bookmark_properties, singer.utils.strftime(min(end + timedelta(seconds=1), new_bookmark))
+                    )
+                    # Only persist fingerprints once the window's records and checkpoint are written, so
+                    # punches are never suppressed by a run that failed before emitting them.
+                    if self.dedupe:
+                        self.fingerprints.save(self.tap_stream_id, self._pending_fingerprints)
+                        self._pending_fingerprints.clear()
+                self.write_bookmark(self.bookmark_properties, sync_timestamp)
 
 
 @attr.s
 class EmployeePunchesStream(DayforcePunchStream):
     tap_stream_id: ClassVar[str] = "employee_punches"
+    resource: ClassVar[str] = "EmployeePunches"
     key_properties: ClassVar[List[str]] = ["PunchXRefCode"]
     bookmark_properties: ClassVar[str] = "SyncTimestampUtc"
     replication_method: ClassVar[str] = "INCREMENTAL"
 
-    @backoff.on_exception(
-        backoff.expo, requests.exceptions.HTTPError, max_time=240, giveup=is_fatal_code, logger=LOGGER
-    )
-    @backoff.on_exception(
-        backoff.expo, (requests.exceptions.ConnectionError, requests.exceptions.Timeout), max_time=240, logger=LOGGER
-    )
-    def _transform_records(self, start, end, counter):
-        for _, record in self.client.get_employee_punches(
-            filterTransactionStartTimeUTC=singer.utils.strftime(start),
-            filterTransactionEndTimeUTC=singer.utils.strftime(end),
-        ).yield_records():
-            if record:
-                record["SyncTimestampUtc"] = self.get_bookmark(
-                    self.config, self.tap_stream_id, self.state, self.bookmark_properties
-                )
-                with singer.Transformer() as transformer:
-                    transformed_record = transformer.transform(
-                        data=record, schema=self.get_schema(self.tap_stream_id, self.catalog)
-                    )
-                    singer.write_record(
-                        stream_name=self.tap_stream_id, time_extracted=singer.utils.now(), record=transformed_record
-                    )
-                    counter.increment()
-
 
 @attr.s
 class EmployeeRawPunchesStream(DayforcePunchStream):
     tap_stream_id: ClassVar[str] = "employee_raw_punches"
+    resource: ClassVar[str] = "EmployeeRawPunches"
     key_properties: ClassVar[List[str]] = ["RawPunchXRefCode"]
     bookmark_properties: ClassVar[str] = "SyncTimestampUtc"
     replication_method: ClassVar[str] = "INCREMENTAL"
 
-    @backoff.on_exception(
-        backoff.expo, requests.exceptions.HTTPError, max_time=240, giveup=is_fatal_code, logger=LOGGER
-    )
-    @backoff.on_exception(
-        backoff.expo, (requests.exceptions.ConnectionError, requests.exceptions.Timeout), max_time=240, logger=LOGGER
-    )
-    def _transform_records(self, start, end, counter):
-        for _, record in self.client.get_employee_raw_punches(
-            filterTransactionStartTimeUTC=singer.utils.strftime(start),
-            filterTransactionEndTimeUTC=singer.utils.strftime(end),
-        ).yield_records():
-            if record:
-                record["SyncTimestampUtc"] = self.get_bookmark(
-                    self.config, self.tap_stream_id, self.state, self.bookmark_properties
-                )
-                with singer.Transformer() as transformer:
-                    transformed_record = transformer.transform(
-                        data=record, schema=self.get_schema(self.tap_stream_id, self.catalog)
-                    )
-                    singer.write_record(
-                        stream_name=self.tap_stream_id, time_extracted=singer.utils.now(), record=transformed_record
-                    )
-                    counter.increment()
-
 
 @attr.s
 class EmployeesStream(DayforceStream):
@@ -158,99 +355,331 @@ class EmployeesStream(DayforceStream):
     key_properties: ClassVar[List[str]] = ["XRefCode"]
     bookmark_properties: ClassVar[str] = "SyncTimestampUtc"
     replication_method: ClassVar[str] = "INCREMENTAL"
+    details_expand: ClassVar[str] = (
+        "WorkAssignments,Contacts,EmploymentStatuses,Roles,EmployeeManagers,CompensationSummary,Locations,"
+        "LastActiveManagers"
+    )
+    schedules_expand: ClassVar[str] = "Activities,Breaks,Skills,LaborMetrics"
+
+    whitelist: WhitelistProjector = attr.ib(
+        init=False,
+        repr=False,
+        default=attr.Factory(lambda self: WhitelistProjector.from_config(self.config), takes_self=True),
+    )
+    _changed_fingerprints: Dict[str, str] = attr.ib(init=False, factory=dict, repr=False)
+    _emitted_fingerprints: Dict[str, str] = attr.ib(init=False, factory=dict, repr=False)
+    _prefetched_details: Dict[str, Dict] = attr.ib(init=False, factory=dict, repr=False)
 
     def whitelist_sensitive_info(self, data: Dict) -> Dict:
-        for collection in WHITELISTED_COLLECTIONS:
-            if data.get(collection, {}).get("Items") is not None:
-                items = []
-                for i, item in enumerate(data.get(collection, {}).get("Items")):
-                    if (
-                        item.get("PayPolicy", {}).get("XRefCode") in WHITELISTED_PAY_POLICY_CODES
-                        and item.get("PayClass", {}).get("XRefCode") in WHITELISTED_PAY_CLASS_CODES
-                    ):
-                        items.append(item)
-                    else:
-                        safe_item = {field: item.get(field, None) for field in WHITELISTED_FIELDS}
-                        items.append(safe_item)
-                data[collection]["Items"] = items
-
-        return data
+        with self.instrumentation.timer(self.tap_stream_id, "whitelist"):
+            return self.whitelist.project(data)
+
+    @property
+    def record_whitelist(self) -> Optional[WhitelistProjector]:
+        return self.whitelist
+
+    def prepare_record(self, record: Dict, fields: Dict) -> Dict:
+        return super().prepare_record(self.whitelist_sensitive_info(data=record), fields)
+
+    def transform_and_write_record(self, record: Dict, time_extracted: datetime):
+        try:
+            transformed_record = self.transform_record(record)
+        except SchemaMismatch:
+            # Already reported by transform_record. Skip the employee rather than failing the sync.
+            return
+        LOGGER.debug(f"Writing record for XRefCode: {record.get('XRefCode')}")
+        self.write_record(transformed_record, time_extracted)
+
+    def _mark_emitted(self, xrefcode: Optional[str]):
+        """Keep the fingerprint of an employee whose record was written, to save once the sync succeeds.
+        Employees that were fingerprinted but never written (e.g. schema mismatches) are left out."""
+        if xrefcode is None:
+            return
+        digest = self._changed_fingerprints.pop(xrefcode, None)
+        if digest is not None:
+            self._emitted_fingerprints[xrefcode] = digest
+
+    def write_record(self, record: Dict, time_extracted: datetime):
+        super().write_record(record, time_extracted)
+        self._mark_emitted(record.get("XRefCode"))
+
+    def write_serialized_record(self, record: Dict, line: bytes, time_extracted: datetime):
+        super().write_serialized_record(record, line, time_extracted)
+        self._mark_emitted(record.get("XRefCode"))
+
+    @property
+    def max_workers(self) -> int:
+        return int(self.config.get("max_workers", 1))
+
+    @property
+    def prefetch(self) -> int:
+        """Number of employees fetched ahead of the one being written. Once the memory budget is
+        exceeded, only as many as there are workers."""
+        return self.max_workers if self.memory_constrained else 2 * self.max_workers
+
+    @property
+    def schedules_chunk(self) -> timedelta:
+        return timedelta(days=float(self.config.get("schedules_chunk_days", 7)))
+
+    @property
+    def engine(self) -> str:
+        return self.config.get("employees_engine", "threads")
+
+    @property
+    def dedupe(self) -> bool:
+        return self.fingerprints is not None and bool(self.config.get("dedupe_employees", False))
+
+    def _is_unchanged(self, employee: Dict) -> bool:
+        """Whether the employee looks the same as when it was last emitted, judged from a cheap
+        summary before its expanded details and schedules are fetched.
+
+        The summary is the listing record if it includes a LastModifiedTimestamp, and otherwise
+        the employee's details with the `employee_fingerprint_expand` expansions, which default
+        to all of `details_expand`. Those details are then reused for the record instead of being
+        requested again. A LastModifiedTimestamp read from the details is kept on `employee`, so
+        the detail cache doesn't request it again. The fingerprints of changed employees are only
+        stored once the sync succeeds, so employees are never suppressed by a failed attempt.
+        """
+        assert self.fingerprints is not None
+        xrefcode = employee["XRefCode"]
+        summary, expand = employee, None
+        if employee.get("LastModifiedTimestamp") is None:
+            expand = self.config.get("employee_fingerprint_expand", self.details_expand)
+            params = {"expand": expand} if expand else {}
+            summary = self.client.get_employee_details(xrefcode=xrefcode, **params).get("Data") or {}
+            if summary.get("LastModifiedTimestamp") is not None:
+                employee["LastModifiedTimestamp"] = summary["LastModifiedTimestamp"]
+        digest = fingerprint(summary)
+        if self.fingerprints.get(self.tap_stream_id, xrefcode) == digest:
+            return True
+        self._changed_fingerprints[xrefcode] = digest
+        if expand == self.details_expand:
+            self._prefetched_details[xrefcode] = summary
+        return False
+
+    def _get_employee_details(self, employee: Dict) -> Dict:
+        """Fetch the expanded details of a single employee.
+
+        With a `detail_cache` configured, the details are keyed by the employee's XRefCode and
+        LastModifiedTimestamp, which is taken from the listing record or, if the listing does not
+        include it, from the unexpanded details. Employees that haven't been modified since their
+        details were cached are served from the cache instead of the expanded request. Details
+        already fetched to fingerprint the employee are used as they are.
+        """
+        xrefcode = employee["XRefCode"]
+        prefetched = self._prefetched_details.pop(xrefcode, None)
+        if prefetched is not None:
+            version = employee.get("LastModifiedTimestamp")
+            if self.detail_cache is not None and version is not None and prefetched.get("XRefCode") is not None:
+                self.detail_cache.put(self.tap_stream_id, xrefcode, version, prefetched)
+            return prefetched
+
+        version = None
+        if self.detail_cache is not None:
+            version = employee.get("LastModifiedTimestamp")
+            if version is None:
+                version = (
+                    self.client.get_employee_details(xrefcode=xrefcode).get("Data", {}).get("LastModifiedTimestamp")
+                )
+            if version is not None:
+                cached = self.detail_cache.get(self.tap_stream_id, xrefcode, version)
+                if cached is not None:
+                    LOGGER.debug(f"Using cached details for XRefCode: {xrefcode}")
+                    return cached
+
+        details = (
+            self.client.get_employee_details(
+                xrefcode=xrefcode,
+                expand=self.details_expand,
+            ).get("Data")
+            or {}
+        )
+        if self.detail_cache is not None and version is not None and details.get("XRefCode") is not None:
+            self.detail_cache.put(self.tap_stream_id, xrefcode, version, details)
+        return details
+
+    def _get_employee_schedules(self, xrefcode: str, start: datetime, end: datetime) -> Dict:
+        return handle_unauthorized(
+            func=lambda: self.client.get_employee_schedules(
+                xrefcode=xrefcode,
+                filterScheduleStartDate=singer.utils.strftime(start),
+                filterScheduleEndDate=singer.utils.strftime(end),
+                expand=self.schedules_expand,
+            ),
+            xrefcode=xrefcode,
+            logger=LOGGER,
+        )
+
+    def _get_chunked_employee_schedules(self, xrefcode: str, start: datetime, end: datetime) -> Dict:
+        """Fetch an employee's schedules in `schedules_chunk_days` long chunks, so no single
+        response holds the schedules of the whole range."""
+        data: List[Dict] = []
+        for chunk_start, chunk_end in date_windows(start, end, step=self.schedules_chunk):
+            schedules = self._get_employee_schedules(xrefcode, chunk_start, min(chunk_end, end))
+            if "error" in schedules:
+                return schedules
+            data.extend(schedules.get("Data") or [])
+        return {"Data": data}
+
+    def _get_employee_payloads(
+        self, employee: Dict, start: datetime, end: datetime, fetch_schedules: bool = True
+    ) -> Tuple[Dict, Dict]:
+        """Fetch the expanded details and the schedules for a single employee. Once the memory
+        budget is exceeded, the schedules are fetched in chunks of the date range."""
+        xrefcode = employee["XRefCode"]
+        details = self._get_employee_details(employee)
+        if not fetch_schedules:
+            return details, {}
+
+        try:
+            if self.memory_constrained:
+                schedules = self._get_chunked_employee_schedules(xrefcode, start, end)
+            else:
+                schedules = self._get_employee_schedules(xrefcode, start, end)
+        except requests.exceptions.HTTPError as e:
+            LOGGER.warn(f"HTTP Error occurred on xrefcode: {xrefcode} with error {e}")
+            schedules = {"error": None}
+
+        return details, schedules
+
+    def _get_schedules_index(self, start: datetime, end: datetime) -> Dict[str, List[Dict]]:
+        """Fetch the schedules of all employees between `start` and `end` from the paged
+        `EmployeeSchedules` endpoint and index them by employee XRefCode. Schedules without an
+        EmployeeXRefCode can't be joined onto their employee, so they fail the sync rather than
+        leaving every employee without schedules."""
+        index: Dict[str, List[Dict]] = collections.defaultdict(list)
+        for _, schedule in self.client.get_resource(
+            resource="EmployeeSchedules",
+            params={
+                "filterScheduleStartDate": singer.utils.strftime(start),
+                "filterScheduleEndDate": singer.utils.strftime(end),
+                "expand": self.schedules_expand,
+            },
+        ).yield_records():
+            if schedule:
+                xrefcode = schedule.get("EmployeeXRefCode")
+                if xrefcode is None:
+                    raise RuntimeError(
+                        "EmployeeSchedules returned a schedule without an EmployeeXRefCode, so schedules can't be "
+                        "joined onto employees. Set schedules_mode to per_employee."
+                    )
+                index[xrefcode].append(schedule)
+        return index
+
+    def _iter_employee_payloads(self, start: datetime, end: datetime) -> Iterator[Tuple[str, Tuple[Dict, Dict]]]:
+        """Yield `(xrefcode, (details, schedules))` for every employee updated between `start` and
+        `end`, in listing order, fetched by the configured `employees_engine`. With
+        `schedules_mode: bulk` the schedules of all employees are fetched up front with paged
+        requests and joined onto the details by XRefCode. The bulk endpoint leaves out employees
+        whose schedules are unauthorized, so they get no schedules rather than an error. With `dedupe_employees`, employees
+        that haven't changed since they were last emitted are skipped before their details and
+        schedules are fetched. Once the memory budget is exceeded, the threads engine fetches
+        fewer employees ahead and splits their schedules into chunks."""
+        bulk_schedules = self.config.get("schedules_mode", "per_employee") == "bulk"
+        if self.engine == "async":
+            if self.dedupe:
+                LOGGER.warning("dedupe_employees is only supported by the threads employees_engine; ignoring it.")
+            engine = AsyncEmployeesEngine(
+                client=self.client,
+                details_expand=self.details_expand,
+                schedules_expand=self.schedules_expand,
+                concurrency=int(self.config.get("async_concurrency", 50)),
+                detail_cache=self.detail_cache,
+                cache_namespace=self.tap_stream_id,
+                fetch_schedules=not bulk_schedules,
+            )
+            payloads = engine.iter_employee_payloads(start, end)
+        else:
+            employees = (
+                record
+                for _, record in self.client.get_employees(
+                    filterUpdatedStartDate=singer.utils.strftime(start),
+                    filterUpdatedEndDate=singer.utils.strftime(end),
+                ).yield_records()
+                if record
+            )
+            dedupe = self.dedupe
+
+            def get_payloads(employee: Dict) -> Tuple[Optional[str], Optional[Tuple[Dict, Dict]]]:
+                if dedupe and self._is_unchanged(employee):
+                    self.instrumentation.increment("records_suppressed", self.tap_stream_id)
+                    return employee.get("XRefCode"), None
+                return (
+                    employee.get("XRefCode"),
+                    self._get_employee_payloads(employee, start, end, fetch_schedules=not bulk_schedules),
+                )
+
+            payloads = (
+                (xrefcode, payload)
+                for xrefcode, payload in bounded_ordered_map(
+                    get_payloads, employees, max_workers=self.max_workers, prefetch=lambda: self.prefetch
+                )
+                if payload is not None
+            )
+        if not bulk_schedules:
+            return payloads
+
+        schedules = self._get_schedules_index(start, end)
+        return ((xrefcode, (details, {"Data": schedules.get(xrefcode, [])})) for xrefcode, (details, _) in payloads)
+
+    def _iter_employee_records(self, start: datetime, end: datetime) -> Iterator[Tuple[Dict, Dict]]:
+        """Yield `(details, fields)` for every employee with an XRefCode, where `fields` are the
+        schedules and sync timestamp (`end`, the bookmark the sync will advance to) to add to the
+        details once they're whitelisted."""
+        sync_timestamp = singer.utils.strftime(end)
+        for _, (details, schedules) in self._iter_employee_payloads(start, end):
+            if details.get("XRefCode") is not None:
+                yield details, {
+                    "SyncTimestampUtc": sync_timestamp,
+                    "Schedules": schedules.get("error") if schedules.get("error", False) else schedules.get("Data"),
+                }
+            # Don't hold on to the payloads while the next employee is fetched.
+            del details, schedules
 
     @backoff.on_exception(
-        backoff.expo, requests.exceptions.HTTPError, max_time=240, giveup=is_fatal_code, logger=LOGGER
+        backoff.expo,
+        requests.exceptions.HTTPError,
+        max_time=240,
+        giveup=is_fatal_code,
+        logger=LOGGER,
+        on_backoff=on_backoff,
     )
     @backoff.on_exception(
-        backoff.expo, (requests.exceptions.ConnectionError, requests.exceptions.Timeout), max_time=240, logger=LOGGER
+        backoff.expo,
+        (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        max_time=240,
+        logger=LOGGER,
+        on_backoff=on_backoff,
     )
     def _transform_records(self, start, end, counter):
-        for _, record in self.client.get_employees(
-            filterUpdatedStartDate=singer.utils.strftime(start), filterUpdatedEndDate=singer.utils.strftime(end)
-        ).yield_records():
-            if record:
-
-                details = handle_rate_limit(
-                    func=self.client.get_employee_details(
-                        xrefcode=record.get("XRefCode"),
-                        expand="WorkAssignments,Contacts,EmploymentStatuses,Roles,EmployeeManagers,CompensationSummary,Locations,LastActiveManagers",
-                    ),
-                    logger=LOGGER,
-                ).get("Data")
-
-                try:
-                    schedules = handle_unauthorized(
-                        func=lambda: self.client.get_employee_schedules(
-                            xrefcode=record.get("XRefCode"),
-                            filterScheduleStartDate=singer.utils.strftime(start),
-                            filterScheduleEndDate=singer.utils.strftime(end),
-                            expand="Activities,Breaks,Skills,LaborMetrics",
-                        ),
-                        xrefcode=record.get("XRefCode"),
-                        logger=LOGGER,
-                    )
-                except requests.exceptions.HTTPError as e:
-                    LOGGER.warn(f"HTTP Error occurred on xrefcode: {record.get('XRefCode')} with error {e}")
-
-                if details.get("XRefCode") is not None:
-                    details["SyncTimestampUtc"] = self.get_bookmark(
-                        self.config, self.tap_stream_id, self.state, self.bookmark_properties
-                    )
-                    details = self.whitelist_sensitive_info(data=details)
-
-                    if schedules.get("error", False):
-                        details["Schedules"] = schedules.get("error")
-                    else:
-                        details["Schedules"] = schedules.get("Data")
-
-                    with singer.Transformer() as transformer:
-                        try:
-                            transformed_record = transformer.transform(
-                                data=details, schema=self.get_schema(self.tap_stream_id, self.catalog)
-                            )
-                        except SchemaMismatch as e:
-                            LOGGER.warn(f"Schema mismatch error: {str(e)} with record: {details}")
-                        else:
-                            LOGGER.debug(f"Writing record for XRefCode: {record.get('XRefCode')}")
-                            singer.write_record(
-                                stream_name=self.tap_stream_id,
-                                time_extracted=singer.utils.now(),
-                                record=transformed_record,
-                            )
-                        counter.increment()
+        time_extracted = singer.utils.now()
+        # Fingerprints of employees seen by a previous, failed attempt are stale.
+        self._changed_fingerprints.clear()
+        self._emitted_fingerprints.clear()
+        self._prefetched_details.clear()
+        with self.transform_pipeline() as pipeline:
+            self.write_records(self._iter_employee_records(start, end), time_extracted, counter, pipeline)
 
     def sync(self):
         with singer.metrics.job_timer(job_type=f"sync_{self.tap_stream_id}"):
-            with singer.metrics.record_counter(endpoint=self.tap_stream_id) as counter:
+            with singer.metrics.record_counter(
+                endpoint=self.tap_stream_id
+            ) as counter, self.transformer, self.mismatches, self.writer:
                 start = singer.utils.strptime_to_utc(
                     self.get_bookmark(self.config, self.tap_stream_id, self.state, self.bookmark_properties)
                 )
                 new_bookmark = singer.utils.now()
-                singer.bookmarks.write_bookmark(
-                    state=self.state,
-                    tap_stream_id=self.tap_stream_id,
-                    key=self.bookmark_properties,
-                    val=singer.utils.strftime(new_bookmark),
-                )
                 self._transform_records(start, new_bookmark, counter)
+                # The state is shared with streams syncing on other threads, which emit it with every
+                # checkpoint, so only advance the bookmark once every employee has been written.
+                self.write_checkpoint(self.bookmark_properties, singer.utils.strftime(new_bookmark))
+                if self.detail_cache is not None:
+                    self.detail_cache.commit()
+                # Only once the checkpoint has flushed their records, so a failed run never
+                # suppresses employees it didn't emit.
+                if self.dedupe:
+                    assert self.fingerprints is not None
+                    self.fingerprints.save(self.tap_stream_id, self._emitted_fingerprints)
 
 
 @attr.s
@@ -260,48 +689,138 @@ class PaySummaryReportStream(DayforceStream):
     bookmark_properties: ClassVar[List[str]] = []
     replication_method: ClassVar[str] = "FULL_TABLE"
     date_param_fmt: ClassVar[str] = "%m/%d/%Y %I:%M:%S %p"
+    checkpoint_key: ClassVar[str] = "window_start"
+    settled_key: ClassVar[str] = "settled_through"
+    row_limit: ClassVar[int] = 20000
+    window_size_key: ClassVar[str] = "window_size_seconds"
+
+    _pending_fingerprints: Dict[str, str] = attr.ib(init=False, factory=dict, repr=False)
+
+    @property
+    def incremental(self) -> bool:
+        return bool(self.config.get("pay_summary_incremental", False))
+
+    @property
+    def dedupe(self) -> bool:
+        return self.incremental and self.fingerprints is not None
+
+    @property
+    def lookback(self) -> timedelta:
+        """The trailing pay periods that are re-fetched on every incremental run."""
+        return int(self.config.get("pay_summary_lookback_pay_periods", 2)) * timedelta(
+            days=int(self.config.get("pay_period_days", 14))
+        )
+
+    def _get_start(self) -> datetime:
+        """Resume from an interrupted run's checkpoint if there is one. Incremental runs
+        otherwise skip the windows that were settled by the previous run."""
+        start_date = singer.utils.strptime_to_utc(self.config.get("start_date"))
+        checkpoint = singer.bookmarks.get_bookmark(self.state, self.tap_stream_id, self.checkpoint_key)
+        if checkpoint is not None:
+            LOGGER.info(f"Resuming Pay Summary Report from checkpoint {checkpoint} ..")
+            return singer.utils.strptime_to_utc(checkpoint)
+
+        settled_through = singer.bookmarks.get_bookmark(self.state, self.tap_stream_id, self.settled_key)
+        if self.incremental and settled_through is not None:
+            LOGGER.info(f"Skipping Pay Summary Report windows settled through {settled_through} ..")
+            return max(start_date, singer.utils.strptime_to_utc(settled_through))
+        return start_date
+
+    def _get_window(self) -> AdaptiveWindow:
+        """Start from the window size the previous run settled on, falling back to 6 days."""
+        size = singer.bookmarks.get_bookmark(self.state, self.tap_stream_id, self.window_size_key)
+        return AdaptiveWindow(
+            size=timedelta(seconds=int(size)) if size is not None else timedelta(days=6),
+            min_size=timedelta(hours=float(self.config.get("pay_summary_min_window_hours", 1))),
+            max_size=timedelta(days=float(self.config.get("pay_summary_max_window_days", 31))),
+            row_limit=self.row_limit,
+        )
 
     @backoff.on_exception(
-        backoff.expo, requests.exceptions.HTTPError, max_time=240, giveup=is_fatal_code, logger=LOGGER
+        backoff.expo,
+        requests.exceptions.HTTPError,
+        max_time=240,
+        giveup=is_fatal_code,
+        logger=LOGGER,
+        on_backoff=on_backoff,
     )
     @backoff.on_exception(
-        backoff.expo, (requests.exceptions.ConnectionError, requests.exceptions.Timeout), max_time=240, logger=LOGGER
+        backoff.expo,
+        (requests.exceptions.ConnectionError, requests.exceptions.Timeout),
+        max_time=240,
+        logger=LOGGER,
+        on_backoff=on_backoff,
     )
-    def _transform_records(
-        self, start: datetime, end: datetime, counter: singer.metrics.Counter, time_extracted: datetime
-    ):
+    def _get_rows(self, start: datetime, end: datetime) -> RowSpool:
+        """Spool the window's rows to disk as they stream in, so a 20,000-row window can be
+        counted (and split if it hit the row limit) without holding it in memory."""
         report_params = {
             "003cd1ea-5f11-4fe8-ae9c-d7af1e3a95d6": singer.utils.strftime(start, format_str=self.date_param_fmt),
             "b03cd1ea-5f11-4fe8-ae9c-d7af1e3a95d6": singer.utils.strftime(end, format_str=self.date_param_fmt),
         }
-        rows_returned = 0
-        for _, row in self.client.get_report(xrefcode="pay_summary_report", **report_params).yield_report_rows(
-            limit=(500, 3600)
-        ):
-            if row:
-                rows_returned += 1
-                with singer.Transformer() as transformer:
-                    transformed_record = transformer.transform(
-                        data=row, schema=self.get_schema(self.tap_stream_id, self.catalog)
-                    )
-                    singer.write_record(
-                        stream_name=self.tap_stream_id, record=transformed_record, time_extracted=time_extracted
-                    )
-                    counter.increment()
-
-        if 18000 <= rows_returned < 20000:
-            LOGGER.warning("Approaching maximum row limit of 20,000. Consider making request window smaller.")
-        elif rows_returned >= 20000:
-            LOGGER.error("Hit maximum row limit of 20,000. Make request window smaller for Pay Summary Report.")
+        rows = RowSpool()
+        try:
+            rows.extend(
+                self.client.iter_report_rows(xrefcode="pay_summary_report", params=report_params, limit=(500, 3600))
+            )
+        except BaseException:
+            rows.close()
+            raise
+        return rows
+
+    def _transform_records(self, rows: Iterable[Dict], counter: singer.metrics.Counter, time_extracted: datetime):
+        # Rows have no key, and identical rows are legitimate, so the n-th occurrence of a row in
+        # the window is keyed on its fingerprint and n. Only rows a previous run emitted are skipped.
+        # Their fingerprints are kept pending until the window is checkpointed.
+        occurrences: collections.Counter = collections.Counter()
+        dedupe = self.dedupe
+        for row in rows:
+            if dedupe:
+                assert self.fingerprints is not None
+                digest = fingerprint(row)
+                key = f"{digest}:{occurrences[digest]}"
+                occurrences[digest] += 1
+                if self.fingerprints.get(self.tap_stream_id, key) == digest:
+                    continue
+                self._pending_fingerprints[key] = digest
+            transformed_record = self.transform_record(row)
+            self.write_record(transformed_record, time_extracted)
+            counter.increment()
 
     def sync(self):
         with singer.metrics.job_timer(job_type=f"sync_{self.tap_stream_id}"):
-            with singer.metrics.record_counter(endpoint=self.tap_stream_id) as counter:
-                start = singer.utils.strptime_to_utc(self.config.get("start_date"))
+            with singer.metrics.record_counter(
+                endpoint=self.tap_stream_id
+            ) as counter, self.transformer, self.mismatches, self.writer:
+                start = self._get_start()
                 new_bookmark = singer.utils.now()
-                step = timedelta(days=6)
+                window = self._get_window()
                 while start < new_bookmark:
-                    end = start + step - timedelta(seconds=1)
+                    end = start + window.size - timedelta(seconds=1)
                     LOGGER.info(f"Running Pay Summary Report for {start} to {end} ..")
-                    self._transform_records(start=start, end=end, counter=counter, time_extracted=new_bookmark)
-                    start += step
+                    with self._get_rows(start=start, end=end) as rows:
+                        if window.is_full(len(rows)):
+                            if window.split():
+                                LOGGER.warning(
+                                    f"Hit maximum row limit of {self.row_limit:,}. "
+                                    f"Retrying with a window of {window.size} .."
+                                )
+                                continue
+                            LOGGER.error(
+                                f"Hit maximum row limit of {self.row_limit:,} with the minimum window of {window.size}. "
+                                "Rows for this window may be truncated."
+                            )
+
+                        self._transform_records(rows=rows, counter=counter, time_extracted=new_bookmark)
+                        window.observe(len(rows))
+                    start = end + timedelta(seconds=1)
+                    self.write_bookmark(self.window_size_key, int(window.size.total_seconds()))
+                    self.write_checkpoint(self.checkpoint_key, singer.utils.strftime(start))
+                    # Only persist fingerprints once the checkpoint has flushed the window's rows, so
+                    # rows are never suppressed by a run that failed before emitting them.
+                    if self.dedupe:
+                        self.fingerprints.save(self.tap_stream_id, self._pending_fingerprints)
+                        self._pending_fingerprints.clear()
+                self.clear_bookmark(self.checkpoint_key)
+                if self.incremental:
+                    self.write_bookmark(self.settled_key, singer.utils.strftime(new_bookmark - self.lookback))
@@ -0,0 +1,279 @@
+import collections
+import re
+from datetime import datetime
+from typing import Any, Callable, Dict, List, Optional, Set, Tuple
+
+import attr
+import singer
+from singer.transform import Error, SchemaMismatch, string_to_datetime
+
+LOGGER = singer.get_logger()
+
+# Date-times as Dayforce formats them, in UTC or without an offset (which singer treats as UTC).
+_DATETIME = re.compile(r"(\d{4})-(\d\d)-(\d\d)[T ](\d\d):(\d\d):(\d\d)(?:\.(\d{1,6}))?(?:Z|[+-]00:?00)?")
+
+_Coercer = Callable[[Any], Any]
+
+
+class _Anomaly(Exception):
+    """Raised by compiled coercers for values they leave to the generic transformer."""
+
+
+class _Unsupported(Exception):
+    """Raised while compiling a schema that uses keywords the compiler doesn't handle."""
+
+
+def _transform_datetime(value: str) -> Optional[str]:
+    match = _DATETIME.fullmatch(value)
+    if match is not None and match.group(1) >= "1000":
+        year, month, day, hour, minute, second, fraction = match.groups()
+        try:
+            datetime(int(year), int(month), int(day), int(hour), int(minute), int(second))
+        except ValueError:
+            pass
+        else:
+            return f"{year}-{month}-{day}T{hour}:{minute}:{second}.{(fraction or '').ljust(6, '0')}Z"
+    return string_to_datetime(value)
+
+
+def _compile(schema: Dict, path: Tuple[str, ...], removed: Set[str]) -> _Coercer:
+    if "anyOf" in schema or "$ref" in schema:
+        raise _Unsupported(".".join(path))
+    if "type" not in schema:
+        return lambda value: value
+
+    types = schema["type"] if isinstance(schema["type"], list) else [schema["type"]]
+    nullable = "null" in types
+    types = [typ for typ in types if typ != "null"]
+    if not types:
+        return _compile_null()
+    if len(types) > 1:
+        raise _Unsupported(".".join(path))
+    (typ,) = types
+
+    if schema.get("format") == "date-time":
+        return _compile_datetime(nullable)
+    if typ == "object":
+        if "patternProperties" in schema:
+            raise _Unsupported(".".join(path))
+        return _compile_object(schema.get("properties", {}), nullable, path, removed)
+    if typ == "array":
+        if "items" not in schema:
+            raise _Unsupported(".".join(path))
+        return _compile_array(_compile(schema["items"], path, removed), nullable)
+    if typ in _SCALARS:
+        return _SCALARS[typ](nullable)
+    raise _Unsupported(".".join(path))
+
+
+def _compile_null() -> _Coercer:
+    def coerce(value):
+        if value is None or value == "":
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_datetime(nullable: bool) -> _Coercer:
+    def coerce(value):
+        if type(value) is str and value:
+            transformed = _transform_datetime(value)
+            if transformed is not None:
+                return transformed
+        elif nullable and (value is None or value == ""):
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_object(properties: Dict, nullable: bool, path: Tuple[str, ...], removed: Set[str]) -> _Coercer:
+    # An object without properties is passed through untouched.
+    fields = {key: _compile(schema, path + (key,), removed) for key, schema in properties.items()} or None
+    prefix = "".join(f"{key}." for key in path)
+
+    def coerce(value):
+        if type(value) is dict:
+            if fields is None:
+                return value
+            result = {}
+            for key, item in value.items():
+                field = fields.get(key)
+                if field is None:
+                    removed.add(prefix + key)
+                else:
+                    result[key] = field(item)
+            return result
+        if nullable and (value is None or value == ""):
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_array(item: _Coercer, nullable: bool) -> _Coercer:
+    def coerce(value):
+        if type(value) is list:
+            return [item(element) for element in value]
+        if nullable and (value is None or value == ""):
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_string(nullable: bool) -> _Coercer:
+    def coerce(value):
+        if type(value) is str:
+            return value
+        if value is not None:
+            return str(value)
+        if nullable:
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_number(nullable: bool) -> _Coercer:
+    def coerce(value):
+        if type(value) is float:
+            return value
+        if type(value) is int:
+            return float(value)
+        if nullable and (value is None or value == ""):
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_integer(nullable: bool) -> _Coercer:
+    def coerce(value):
+        if type(value) is int:
+            return value
+        if nullable and (value is None or value == ""):
+            return None
+        raise _Anomaly
+
+    return coerce
+
+
+def _compile_boolean(nullable: bool) -> _Coercer:
+    # Like singer, coerce any value (including None) with bool(), except "false" in any case.
+    def coerce(value):
+        if type(value) is bool:
+            return value
+        if type(value) is str:
+            return value != "" and value.lower() != "false"
+        return bool(value)
+
+    return coerce
+
+
+_SCALARS: Dict[str, Callable[[bool], _Coercer]] = {
+    "string": _compile_string,
+    "number": _compile_number,
+    "integer": _compile_integer,
+    "boolean": _compile_boolean,
+}
+
+
+def compile_schema(schema: Dict, removed: Optional[Set[str]] = None) -> Optional[_Coercer]:
+    """Compile `schema` into a function that transforms a record the way `singer.Transformer`
+    does, without walking the schema for every value. The function raises `_Anomaly` for values
+    it doesn't handle (e.g. numbers sent as strings, or values that don't match the schema),
+    which are left to the generic transformer. Returns None for schemas that use keywords the
+    compiler doesn't support (`anyOf`, `$ref`, `patternProperties` or multiple non-null types).
+    Paths of properties missing from the schema are added to `removed`."""
+    try:
+        return _compile(schema, (), set() if removed is None else removed)
+    except _Unsupported as e:
+        LOGGER.debug(f"Transforming with the generic transformer, as {e or 'the schema'} can't be compiled.")
+        return None
+
+
+class RecordTransformer(singer.Transformer):
+    """`singer.Transformer` with a fast path. Every schema is compiled once by `compile_schema`,
+    and records are transformed by the compiled function. Only records it can't handle, or
+    that don't match the schema, go through the generic transformer, so they still raise
+    `SchemaMismatch` with the same errors."""
+
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.fallbacks = 0
+        # Keyed by id, holding on to the schema so that its id can't be reused.
+        self._compiled: Dict[int, Tuple[Dict, Optional[_Coercer]]] = {}
+
+    def _get_compiled(self, schema: Dict) -> Optional[_Coercer]:
+        compiled = self._compiled.get(id(schema))
+        if compiled is None:
+            compiled = self._compiled[id(schema)] = (schema, compile_schema(schema, self.removed))
+        return compiled[1]
+
+    def transform(self, data, schema, metadata=None):
+        compiled = self._get_compiled(schema) if metadata is None and self.pre_hook is None else None
+        if compiled is not None:
+            try:
+                return compiled(data)
+            except _Anomaly:
+                self.fallbacks += 1
+        return super().transform(data, schema, metadata)
+
+    def log_warning(self):
+        super().log_warning()
+        if self.fallbacks:
+            LOGGER.debug(f"Transformed {self.fallbacks} records with the generic transformer.")
+
+
+def _innermost_paths(errors: List[Error]) -> List[str]:
+    """Paths of the values that didn't match, without their enclosing objects and arrays, and
+    with array indices replaced by `*`."""
+    paths = {tuple(error.path) for error in errors}
+    innermost = set()
+    for path in paths:
+        depth = len(path)
+        if not any(len(other) > depth and other[:depth] == path for other in paths):
+            innermost.add(".".join("*" if isinstance(part, int) else str(part) for part in path) or ".")
+    return sorted(innermost)
+
+
+@attr.s
+class MismatchReporter(object):
+    """Capped, summarized reporting of records that don't match their stream's schema.
+
+    The first `limit` mismatches are logged with the record's key and the paths that didn't
+    match, rather than the whole record. Every mismatch is counted, and `log_summary` logs
+    the total and the most common paths.
+    """
+
+    stream: str = attr.ib()
+    limit: int = attr.ib(default=10)
+    count: int = attr.ib(init=False, default=0)
+    paths: collections.Counter = attr.ib(init=False, factory=collections.Counter, repr=False)
+
+    def report(self, key: Any, mismatch: SchemaMismatch, errors: List[Error]):
+        self.count += 1
+        paths = _innermost_paths(errors)
+        self.paths.update(paths)
+        if self.count > self.limit:
+            return
+        if errors:
+            LOGGER.warning(f"Schema mismatch in {self.stream} record {key} at: {', '.join(paths)}")
+        else:
+            LOGGER.warning(f"Schema mismatch in {self.stream} record {key}: {mismatch}")
+        if self.count == self.limit:
+            LOGGER.warning(f"Not logging further schema mismatches in {self.stream}; they're summarized at the end.")
+
+    def log_summary(self):
+        if not self.count:
+            return
+        common = ", ".join(f"{path} ({count:,})" for path, count in self.paths.most_common(10))
+        LOGGER.warning(f"{self.count:,} {self.stream} records did not match the schema. Most common paths: {common}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.log_summary()
@@ -1,13 +1,16 @@
 import argparse
+import collections
 import json
 import logging
 import os
-import time
-from typing import Callable, Dict, Set
+from concurrent.futures import Executor, ThreadPoolExecutor
+from datetime import datetime, timedelta
+from typing import Any, Callable, Dict, Generator, Iterable, Iterator, Set, Tuple, Union
 
 import requests
 import singer
-from dayforce_client.response import DayforceResponse
+
+from .instrumentation import get_instrumentation
 
 
 def get_abs_path(path: str) -> str:
@@ -85,21 +88,6 @@ def check_config(config: Dict, required_config_keys: Set[str]):
         raise Exception("Config is missing required keys: {}".format(missing_keys))
 
 
-def handle_rate_limit(func: Callable, logger: logging.Logger) -> DayforceResponse:
-    try:
-        response = func
-    except requests.exceptions.HTTPError as e:
-        if e.response.status_code == 429:
-            sleep_time = int(e.response.headers["Retry-After"]) + 1
-            logger.info(f"Rate limit reached. Retrying in {sleep_time} seconds..")
-            time.sleep(sleep_time)
-            response = func
-        else:
-            raise
-    finally:
-        return response
-
-
 def handle_unauthorized(func: Callable, xrefcode: str, logger: logging.Logger) -> Dict:
     """Handle unauthorized access to Dayforce API so not to break the tap.
     401 Responses can occur for certain xrefcodes/employees which will return null.
@@ -113,4 +101,65 @@ def handle_unauthorized(func: Callable, xrefcode: str, logger: logging.Logger) -
             raise
         else:
             logger.debug(f"Unauthorized access for XRefCode: {xrefcode}; returning null.")
+            get_instrumentation().increment("unauthorized_responses_handled", "Employees/{xrefcode}/Schedules")
             return {"error": None}
+
+
+def date_windows(start: datetime, end: datetime, step: timedelta) -> Iterator[Tuple[datetime, datetime]]:
+    """Split the range from `start` up to `end` into consecutive `step` sized windows. Each
+    window ends one second before the next one starts; the last one may extend past `end`."""
+    while start < end:
+        yield start, start + step - timedelta(seconds=1)
+        start += step
+
+
+def ordered_map(
+    executor: Executor, func: Callable[[Any], Any], iterable: Iterable, prefetch: Union[int, Callable[[], int]]
+) -> Generator[Tuple[Any, Any], None, None]:
+    """Submit `func(item)` to `executor` for every item in `iterable` and yield `(item, result)`
+    in input order. At most `prefetch` calls are in flight at once, so a slow head item bounds
+    the amount of buffered items and results. `prefetch` may be a function, to change the
+    limit as items are processed."""
+    pending: collections.deque = collections.deque()
+    try:
+        for item in iterable:
+            pending.append((item, executor.submit(func, item)))
+            while pending and len(pending) >= (prefetch() if callable(prefetch) else prefetch):
+                item, future = pending.popleft()
+                yield item, future.result()
+        while pending:
+            item, future = pending.popleft()
+            yield item, future.result()
+    finally:
+        for _, future in pending:
+            future.cancel()
+
+
+def bounded_ordered_map(
+    func: Callable[[Any], Any],
+    iterable: Iterable,
+    max_workers: int = 1,
+    prefetch: Union[int, Callable[[], int], None] = None,
+) -> Iterator:
+    """Apply `func` to every item in `iterable` on a pool of `max_workers` threads and
+    yield the results in input order. At most `prefetch` calls (default `2 * max_workers`, and
+    never fewer than `max_workers`) are in flight at once so a slow head item bounds the amount
+    of buffered results. `prefetch` may be a function, to change the limit as items are processed.
+    With `max_workers` <= 1 items are processed serially on the calling thread."""
+    if max_workers <= 1:
+        for item in iterable:
+            yield func(item)
+        return
+
+    def limit() -> int:
+        # Never fewer than max_workers, so every worker can be kept busy.
+        return max((prefetch() if callable(prefetch) else prefetch) or 2 * max_workers, max_workers)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = ordered_map(executor, func, iterable, limit)
+        try:
+            for _, result in results:
+                yield result
+        finally:
+            # Cancel whatever is still pending before the executor waits for it.
+            results.close()
@@ -1,4 +1,6 @@
-from typing import Set
+from typing import Any, Callable, Dict, FrozenSet, Set, Tuple
+
+import attr
 
 WHITELISTED_COLLECTIONS: Set = {"CompensationSummary", "EmploymentStatuses"}
 
@@ -7,3 +9,81 @@ WHITELISTED_PAY_POLICY_CODES: Set = {"USA_CA_HNE", "USA_CA_HNE_4", "USA_CA_HNEWH
 WHITELISTED_PAY_CLASS_CODES: Set = {"FT", "PT", "VAR"}
 
 WHITELISTED_FIELDS: Set = {"EmploymentStatus", "PayPolicy", "PayClass"}
+
+_MISSING: Dict = {}
+
+WHITELISTED_XREFCODES: Dict[str, Set] = {
+    "PayPolicy": WHITELISTED_PAY_POLICY_CODES,
+    "PayClass": WHITELISTED_PAY_CLASS_CODES,
+}
+
+
+_PROJECT_TEMPLATE = """
+def project(data):
+    for collection in collections:
+        items = data.get(collection, _MISSING).get("Items")
+        if items is None:
+            continue
+        for i, item in enumerate(items):
+            get = item.get
+            if {rejected}:
+                items[i] = {{{projection}}}
+    return data
+"""
+
+
+def _compile_project(collections: Tuple[str, ...], fields: Tuple[str, ...], xrefcodes: Tuple) -> Callable:
+    """Compile the rules into a `project` function with the XRefCode checks unrolled and the
+    projected fields built by a dict display, which avoids a loop per item. Field names are
+    embedded as literals through their repr."""
+    namespace: Dict[str, Any] = {"collections": collections, "_MISSING": _MISSING}
+    checks = []
+    for n, (field, codes) in enumerate(xrefcodes):
+        namespace[f"codes_{n}"] = codes
+        checks.append(f"get({field!r}, _MISSING).get('XRefCode') not in codes_{n}")
+    source = _PROJECT_TEMPLATE.format(
+        rejected=" or ".join(checks) or "False",
+        projection=", ".join(f"{field!r}: get({field!r})" for field in fields),
+    )
+    exec(compile(source, "<whitelist projector>", "exec"), namespace)
+    return namespace["project"]
+
+
+@attr.s(frozen=True)
+class WhitelistProjector(object):
+    """Compiled whitelisting rules for the items of an employee's sensitive collections.
+
+    An item of one of `collections` is whitelisted when, for every field in `xrefcodes`, the
+    XRefCode of that field is one of the field's whitelisted codes. Whitelisted items are left
+    untouched. Every other item is replaced, within its collection's list, by a projection down
+    to `fields` with missing fields set to None.
+    """
+
+    collections: Tuple[str, ...] = attr.ib(converter=tuple)
+    fields: FrozenSet[str] = attr.ib(converter=frozenset)
+    xrefcodes: Tuple[Tuple[str, FrozenSet[str]], ...] = attr.ib(
+        converter=lambda xrefcodes: tuple((field, frozenset(codes)) for field, codes in dict(xrefcodes).items())
+    )
+    _project: Callable[[Dict], Dict] = attr.ib(init=False, repr=False, eq=False)
+
+    @_project.default
+    def _default_project(self):
+        return _compile_project(self.collections, tuple(sorted(self.fields)), self.xrefcodes)
+
+    def __reduce__(self):
+        # The compiled function can't be pickled, so pipeline workers compile their own.
+        return type(self), (self.collections, self.fields, self.xrefcodes)
+
+    @classmethod
+    def from_config(cls, config: Dict) -> "WhitelistProjector":
+        """Build a projector from the optional `whitelisted_collections`, `whitelisted_fields` and
+        `whitelisted_xrefcodes` config, falling back to the rules defined in this module."""
+        return cls(
+            collections=config.get("whitelisted_collections", WHITELISTED_COLLECTIONS),
+            fields=config.get("whitelisted_fields", WHITELISTED_FIELDS),
+            xrefcodes=config.get("whitelisted_xrefcodes", WHITELISTED_XREFCODES),
+        )
+
+    def project(self, data: Dict) -> Dict:
+        """Project the items of `data`'s sensitive collections that are not whitelisted, in place."""
+        return self._project(data)
@@ -0,0 +1,62 @@
+from datetime import datetime, timedelta
+from typing import Iterator, Optional, Tuple
+
+import attr
+
+
+@attr.s
+class AdaptiveWindow(object):
+    """Request window that adapts its size to the number of rows Dayforce returns for it.
+
+    A window that hits `row_limit` is truncated by Dayforce, so it should be split in two
+    and fetched again (see `split`). After a window is accepted `observe` shrinks the next
+    window when it came close to the limit and grows it when it came back sparse, always
+    staying between `min_size` and `max_size`. Alternatively, `fit` sizes the next window
+    to return about `target_rows` rows at the rate the last one returned them.
+    """
+
+    size: timedelta = attr.ib()
+    min_size: timedelta = attr.ib(default=timedelta(hours=1))
+    max_size: timedelta = attr.ib(default=timedelta(days=31))
+    row_limit: int = attr.ib(default=20000)
+    sparse_fraction: float = attr.ib(default=0.25)
+    dense_fraction: float = attr.ib(default=0.9)
+    target_rows: Optional[int] = attr.ib(default=None)
+
+    def __attrs_post_init__(self):
+        self.size = self._clamp(self.size)
+
+    def _clamp(self, size: timedelta) -> timedelta:
+        return max(self.min_size, min(self.max_size, timedelta(seconds=round(size.total_seconds()))))
+
+    def is_full(self, rows: int) -> bool:
+        return rows >= self.row_limit
+
+    def split(self) -> bool:
+        """Halve the window. Returns False if it is already as small as it may get."""
+        if self.size <= self.min_size:
+            return False
+        self.size = self._clamp(self.size / 2)
+        return True
+
+    def observe(self, rows: int):
+        """Adjust the size of the next window from the number of `rows` the last one returned."""
+        if rows >= self.row_limit * self.dense_fraction:
+            self.size = self._clamp(self.size / 2)
+        elif rows < self.row_limit * self.sparse_fraction:
+            self.size = self._clamp(self.size * 2)
+
+    def fit(self, rows: int, span: timedelta):
+        """Size the next window to return about `target_rows` rows, at the rate of `rows` per
+        `span` observed for the last one. Windows at most double at a time, so a quiet stretch
+        (e.g. a weekend) doesn't make the next one overshoot."""
+        assert self.target_rows is not None, "fit requires target_rows"
+        self.size = self._clamp(span * min(2.0, self.target_rows / rows) if rows else span * 2)
+
+    def windows(self, start: datetime, end: datetime) -> Iterator[Tuple[datetime, datetime]]:
+        """Like `date_windows`, but every window is as large as the window's size when it is
+        generated, so the windows follow `fit` and `observe` as they are consumed."""
+        while start < end:
+            size = self.size
+            yield start, start + size - timedelta(seconds=1)
+            start += size
@@ -2,9 +2,9 @@ import argparse
 import json
 
 import pytest
-from dayforce_client import Dayforce
 from singer.catalog import Catalog
 
+from tap_dayforce.client import DayforceClient
 from tap_dayforce.streams import (
     EmployeePunchesStream,
     EmployeeRawPunchesStream,
@@ -13,6 +13,21 @@ from tap_dayforce.streams import (
 )
 
 
+def pytest_addoption(parser):
+    parser.addoption(
+        "--run-benchmarks", action="store_true", default=False, help="Run tests marked with @pytest.mark.benchmark."
+    )
+
+
+def pytest_collection_modifyitems(config, items):
+    if config.getoption("--run-benchmarks"):
+        return
+    skip_benchmark = pytest.mark.skip(reason="Benchmarks only run with --run-benchmarks.")
+    for item in items:
+        if "benchmark" in item.keywords:
+            item.add_marker(skip_benchmark)
+
+
 @pytest.fixture(scope="function")
 def config(shared_datadir):
     with open(shared_datadir / "test.config.json") as f:
@@ -38,11 +53,7 @@ def employee_record(shared_datadir):
 
 @pytest.fixture(scope="function")
 def dayforce_client(config):
-    return Dayforce(
-        username=config.get("username"),
-        password=config.get("password"),
-        client_namespace=config.get("client_namespace"),
-    )
+    return DayforceClient.from_config(config)
 
 
 @pytest.fixture(scope="function")
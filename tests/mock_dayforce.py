@@ -0,0 +1,358 @@
+"""A small in-process stand-in for the Dayforce REST API used by the tests."""
+
+import asyncio
+import json
+import random
+import re
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, List, Optional, Set, Tuple
+from urllib.parse import parse_qs, urlparse
+
+PAY_POLICY_CODES = ("USA_CA_HNE", "USA_CA_HNE_4", "SALARIED", "CONTRACTOR", None)
+PAY_CLASS_CODES = ("FT", "PT", "VAR", "TEMP", None)
+PUNCH_KEYS = {"EmployeePunches": "PunchXRefCode", "EmployeeRawPunches": "RawPunchXRefCode"}
+REPORT_PARAMS = ("003cd1ea-5f11-4fe8-ae9c-d7af1e3a95d6", "b03cd1ea-5f11-4fe8-ae9c-d7af1e3a95d6")
+REPORT_START_PARAM = REPORT_PARAMS[0]
+REPORT_DATE_FMT = "%m/%d/%Y %I:%M:%S %p"
+PUNCH_DATE_FMT = "%Y-%m-%dT%H:%M:%S.%fZ"
+
+
+def synthetic_employee(xrefcode: str, items: int = 4, seed: int = 0) -> Dict:
+    """Build expanded employee details with `items` mixed-sensitivity items in every whitelisted collection."""
+    rng = random.Random(f"{seed}/{xrefcode}")
+    details: Dict = {"XRefCode": xrefcode, "FirstName": f"First {xrefcode}", "LastName": f"Last {xrefcode}"}
+    for collection in ("CompensationSummary", "EmploymentStatuses"):
+        collection_items = []
+        for i in range(items):
+            item = {
+                "EffectiveStart": "2019-12-30T17:13:33.852Z",
+                "BaseRate": rng.random() * 100,
+                "BaseSalary": rng.random() * 100000,
+                "PayGrade": {"XRefCode": f"G{i}", "ShortName": "Grade"},
+                "EmploymentStatus": {"XRefCode": rng.choice(("ACTIVE", "TERMINATED"))},
+            }
+            for field, codes in (("PayPolicy", PAY_POLICY_CODES), ("PayClass", PAY_CLASS_CODES)):
+                code = rng.choice(codes)
+                if code is not None:
+                    item[field] = {"XRefCode": code, "ShortName": code}
+            collection_items.append(item)
+        details[collection] = {"Items": collection_items}
+    return details
+
+
+class MockDayforceApi(object):
+    """Synthetic Dayforce resources, served by `MockDayforce` or `AioMockDayforce`.
+
+    Args:
+        employees (List[str]): XRefCodes returned by the `Employees` listing.
+        latency (float): Seconds every request sleeps before responding.
+        rate_limited_requests (int): Number of detail/schedule/punch requests answered with a 429
+                                     before the server starts serving them normally.
+        retry_after (int): Value of the `Retry-After` header sent along with every 429.
+        punches_per_window (int): Number of punches returned for every punch window.
+        punches_per_hour (int): If set, punch windows instead return this many punches for every hour they span.
+        punch_fields (Dict): Extra fields included in every punch.
+        rows_per_window (int): Number of rows returned for every pay summary report window.
+        rows_per_day (int): If set, pay summary report windows instead return this many rows for every
+                            past midnight they contain.
+        report_row_limit (int): Maximum number of rows returned for a pay summary report window.
+        failing_windows (Set[str]): Punch `filterTransactionStartTimeUTC` or report start date values
+                                    answered with a 400.
+        last_modified (Dict[str, str]): `LastModifiedTimestamp` of employee details by XRefCode.
+        unauthorized_schedules (Set[str]): XRefCodes whose schedules are answered with a 401.
+        schedules_page_size (int): Number of schedules on every page of the bulk `EmployeeSchedules` resource.
+        schedules_xrefcode_field (str): Field of bulk `EmployeeSchedules` that holds the employee's XRefCode.
+        schedules_per_day (int): If set, an employee's schedules instead include this many schedules for every
+                                 past midnight in the requested range.
+        page_size (int): If set, the `Employees` listing, punches and pay summary report rows are split into
+                         pages of this many records, linked by `Paging.Next`.
+        detail_items (int): If set, employee details are built by `synthetic_employee` with this many items in
+                            every whitelisted collection.
+        expanded_fields (Dict[str, Dict]): Fields only included in employee details requested with `expand`,
+                                           by XRefCode.
+        details_without_data (Set[str]): XRefCodes whose expanded details are answered without `Data`.
+    """
+
+    def __init__(
+        self,
+        employees: Optional[List[str]] = None,
+        latency: float = 0.0,
+        rate_limited_requests: int = 0,
+        retry_after: int = 0,
+        punches_per_window: int = 1,
+        punches_per_hour: Optional[int] = None,
+        punch_fields: Optional[Dict] = None,
+        rows_per_window: int = 1,
+        rows_per_day: Optional[int] = None,
+        report_row_limit: int = 20000,
+        failing_windows: Optional[Set[str]] = None,
+        last_modified: Optional[Dict[str, str]] = None,
+        unauthorized_schedules: Optional[Set[str]] = None,
+        schedules_page_size: int = 50,
+        schedules_xrefcode_field: str = "EmployeeXRefCode",
+        schedules_per_day: Optional[int] = None,
+        page_size: Optional[int] = None,
+        detail_items: int = 0,
+        expanded_fields: Optional[Dict[str, Dict]] = None,
+        details_without_data: Optional[Set[str]] = None,
+    ):
+        self.employees = employees or []
+        self.latency = latency
+        self.rate_limited_requests = rate_limited_requests
+        self.retry_after = retry_after
+        self.punches_per_window = punches_per_window
+        self.punches_per_hour = punches_per_hour
+        self.punch_fields = punch_fields or {}
+        self.rows_per_window = rows_per_window
+        self.rows_per_day = rows_per_day
+        self.report_row_limit = report_row_limit
+        self.failing_windows = failing_windows or set()
+        self.last_modified = last_modified or {}
+        self.unauthorized_schedules = unauthorized_schedules or set()
+        self.schedules_page_size = schedules_page_size
+        self.schedules_xrefcode_field = schedules_xrefcode_field
+        self.schedules_per_day = schedules_per_day
+        self.page_size = page_size
+        self.detail_items = detail_items
+        self.expanded_fields = expanded_fields or {}
+        self.details_without_data = details_without_data or set()
+        self.requests: List[str] = []
+        self.expanded_detail_requests: List[str] = []
+        self._lock = threading.Lock()
+
+    @property
+    def url(self) -> str:
+        raise NotImplementedError
+
+    def _should_rate_limit(self) -> bool:
+        with self._lock:
+            if self.rate_limited_requests > 0:
+                self.rate_limited_requests -= 1
+                return True
+            return False
+
+    def _page(self, resource: str, records: List, params: Dict[str, List[str]], page_size: Optional[int]) -> Tuple:
+        """Return the page of `records` requested by the `page` param, and its `Paging`."""
+        if page_size is None:
+            return records, {"Next": ""}
+        page = int(params.get("page", ["0"])[0])
+        start, end = page * page_size, (page + 1) * page_size
+        return records[start:end], {"Next": f"{self.url}/{resource}?page={page + 1}" if end < len(records) else ""}
+
+    def _report_rows(self, params: Dict[str, List[str]]) -> List[Dict]:
+        window_start = params[REPORT_START_PARAM][0]
+        if self.rows_per_day is None:
+            return [
+                {"Employee_DisplayName": f"{window_start}/{i}", "EmployeePaySummary_PayAmount": 1.0}
+                for i in range(self.rows_per_window)
+            ]
+
+        start, end = (datetime.strptime(params[param][0], REPORT_DATE_FMT) for param in REPORT_PARAMS)
+        day = datetime(start.year, start.month, start.day) + (timedelta(days=1) if start.time() else timedelta())
+        rows: List[Dict] = []
+        while day <= min(end, datetime.utcnow()):
+            rows.extend(
+                {"Employee_DisplayName": f"{day:%Y-%m-%d}/{i}", "EmployeePaySummary_PayDate": day.isoformat()}
+                for i in range(self.rows_per_day)
+            )
+            day += timedelta(days=1)
+        return rows
+
+    def _punch_count(self, params: Dict[str, List[str]]) -> int:
+        if self.punches_per_hour is None:
+            return self.punches_per_window
+        start, end = (
+            datetime.strptime(params[param][0], PUNCH_DATE_FMT)
+            for param in ("filterTransactionStartTimeUTC", "filterTransactionEndTimeUTC")
+        )
+        return round((end - start + timedelta(seconds=1)) / timedelta(hours=1) * self.punches_per_hour)
+
+    def _schedules(self, params: Dict[str, List[str]]) -> List[Dict]:
+        if self.schedules_per_day is None:
+            return [{"TimeStart": params.get("filterScheduleStartDate", [None])[0], "NetHours": 8.0}]
+
+        start, end = (
+            datetime.strptime(params[param][0], PUNCH_DATE_FMT)
+            for param in ("filterScheduleStartDate", "filterScheduleEndDate")
+        )
+        day = datetime(start.year, start.month, start.day) + (timedelta(days=1) if start.time() else timedelta())
+        schedules: List[Dict] = []
+        while day <= min(end, datetime.utcnow()):
+            for i in range(self.schedules_per_day):
+                time_start, time_end = day + timedelta(hours=i), day + timedelta(hours=i + 8)
+                schedules.append(
+                    {
+                        "TimeStart": time_start.isoformat(),
+                        "TimeEnd": time_end.isoformat(),
+                        "NetHours": 7.5,
+                        "DepartmentXRefCode": f"D{i}",
+                        "Breaks": [{"TimeStart": (time_start + timedelta(hours=4)).isoformat(), "Type": "Meal"}],
+                        "Activities": [{"TimeStart": time_start.isoformat(), "XRefCode": f"A{i}"}],
+                    }
+                )
+            day += timedelta(days=1)
+        return schedules
+
+    def handle(self, path: str, params: Dict[str, List[str]]) -> Tuple[int, Dict, Dict]:
+        with self._lock:
+            self.requests.append(path)
+        time.sleep(self.latency)
+
+        resource = path.split("/Api/mock/V1/", 1)[-1].rstrip("/")
+        if resource == "Employees":
+            employees, paging = self._page(
+                resource, [{"XRefCode": xrefcode} for xrefcode in self.employees], params, self.page_size
+            )
+            return 200, {"Data": employees, "Paging": paging}, {}
+
+        if self._should_rate_limit():
+            return 429, {"Message": "Too many requests"}, {"Retry-After": str(self.retry_after)}
+
+        window_start = params.get("filterTransactionStartTimeUTC", params.get(REPORT_START_PARAM, [None]))[0]
+        if window_start in self.failing_windows:
+            return 400, {"Message": "Bad request"}, {}
+
+        if resource == "Reports/pay_summary_report":
+            rows, paging = self._page(
+                resource, self._report_rows(params)[: self.report_row_limit], params, self.page_size
+            )
+            return 200, {"Data": {"Rows": rows}, "Paging": paging}, {}
+
+        if resource == "EmployeeSchedules":
+            bulk_schedules = [
+                {self.schedules_xrefcode_field: xrefcode, "TimeStart": params.get("filterScheduleStartDate", [None])[0]}
+                for xrefcode in self.employees
+                if xrefcode not in self.unauthorized_schedules
+            ]
+            bulk_schedules, paging = self._page(resource, bulk_schedules, params, self.schedules_page_size)
+            return 200, {"Data": bulk_schedules, "Paging": paging}, {}
+
+        if resource in PUNCH_KEYS:
+            punches = [
+                {PUNCH_KEYS[resource]: f"{window_start}/{i}", "EmployeeXRefCode": "E000", **self.punch_fields}
+                for i in range(self._punch_count(params))
+            ]
+            punches, paging = self._page(resource, punches, params, self.page_size)
+            return 200, {"Data": punches, "Paging": paging}, {}
+
+        match = re.fullmatch(r"Employees/([^/]+)", resource)
+        if match is not None:
+            xrefcode = match.group(1)
+            details = synthetic_employee(xrefcode, self.detail_items) if self.detail_items else {}
+            details.update(
+                XRefCode=xrefcode,
+                FirstName=f"First {xrefcode}",
+                LastModifiedTimestamp=self.last_modified.get(xrefcode, "2019-01-01T00:00:00"),
+            )
+            if "expand" in params:
+                details.update(self.expanded_fields.get(xrefcode, {}))
+                with self._lock:
+                    self.expanded_detail_requests.append(xrefcode)
+                if xrefcode in self.details_without_data:
+                    return 200, {}, {}
+            return 200, {"Data": details}, {}
+
+        match = re.fullmatch(r"Employees/([^/]+)/Schedules", resource)
+        if match is not None:
+            if match.group(1) in self.unauthorized_schedules:
+                return 401, {"Message": "Unauthorized"}, {}
+            return 200, {"Data": self._schedules(params)}, {}
+
+        return 404, {"Message": "Not found"}, {}
+
+
+class MockDayforce(MockDayforceApi):
+    """Serves MockDayforceApi from a local threading HTTP server."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self._server = ThreadingHTTPServer(("127.0.0.1", 0), type("Handler", (_MockDayforceHandler,), {"mock": self}))
+        self._server.daemon_threads = True
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._server.server_address[1]}/Api/mock/V1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._server.shutdown()
+        self._server.server_close()
+        self._thread.join()
+
+
+class AioMockDayforce(MockDayforceApi):
+    """Serves MockDayforceApi from a local aiohttp server running on its own event loop thread.
+    Requires aiohttp. The Authorization headers it received are kept in `authorizations`."""
+
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.authorizations: Set[str] = set()
+        self._loop = asyncio.new_event_loop()
+        self._loop.set_default_executor(ThreadPoolExecutor(max_workers=64))
+        self._thread = threading.Thread(target=self._loop.run_forever, daemon=True)
+        self._port = 0
+
+    @property
+    def url(self) -> str:
+        return f"http://127.0.0.1:{self._port}/Api/mock/V1"
+
+    async def _handle(self, request):
+        from aiohttp import web
+
+        self.authorizations.add(request.headers.get("Authorization"))
+        status, body, headers = await self._loop.run_in_executor(
+            None, self.handle, request.path, parse_qs(request.query_string)
+        )
+        return web.json_response(body, status=status, headers=headers)
+
+    async def _start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        app.router.add_route("GET", "/{path:.*}", self._handle)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        self._port = self._runner.addresses[0][1]
+
+    def __enter__(self):
+        self._thread.start()
+        asyncio.run_coroutine_threadsafe(self._start(), self._loop).result()
+        return self
+
+    def __exit__(self, *args):
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop.close()
+
+
+class _MockDayforceHandler(BaseHTTPRequestHandler):
+
+    mock: MockDayforce
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        status, body, headers = self.mock.handle(url.path, parse_qs(url.query))
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        for key, value in headers.items():
+            self.send_header(key, value)
+        self.end_headers()
+        self.wfile.write(payload)
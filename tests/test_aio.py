@@ -0,0 +1,134 @@
+import base64
+import time
+
+import pytest
+import requests
+import singer
+from mock_dayforce import AioMockDayforce
+
+from tap_dayforce import EmployeesStream
+from tap_dayforce.aio import AsyncEmployeesEngine
+from tap_dayforce.ratelimit import RateLimiter
+
+pytest.importorskip("aiohttp")
+
+
+def engine_against_mock(args, mock, **kwargs):
+    args.client.url = mock.url
+    return AsyncEmployeesEngine(
+        client=args.client,
+        details_expand=EmployeesStream.details_expand,
+        schedules_expand=EmployeesStream.schedules_expand,
+        **kwargs,
+    )
+
+
+def employee_payloads(engine):
+    now = singer.utils.now()
+    return list(engine.iter_employee_payloads(now, now))
+
+
+def sync_with_async_engine(args, mock, capsys, **config):
+    args.config.update({"employees_engine": "async", **config})
+    args.client.url = mock.url
+    stream = EmployeesStream.from_args(args)
+    capsys.readouterr()
+    stream.sync()
+    return [
+        message.record
+        for message in map(singer.parse_message, capsys.readouterr().out.splitlines())
+        if isinstance(message, singer.RecordMessage)
+    ]
+
+
+def test_async_engine_emits_records_in_listing_order(args, capsys):
+    xrefcodes = [f"E{i:03d}" for i in range(40)]
+    with AioMockDayforce(employees=xrefcodes) as mock:
+        records = sync_with_async_engine(args, mock, capsys, async_concurrency=8)
+
+    assert [record["XRefCode"] for record in records] == xrefcodes
+    assert [record["FirstName"] for record in records] == [f"First {xrefcode}" for xrefcode in xrefcodes]
+    assert sum(path.endswith("/Schedules") for path in mock.requests) == len(xrefcodes)
+    assert sorted(mock.expanded_detail_requests) == xrefcodes
+
+
+@pytest.mark.parametrize("engine", ["threads", "async"])
+def test_employees_without_details_data_are_skipped(args, capsys, engine):
+    with AioMockDayforce(employees=["E001", "E002", "E003"], details_without_data={"E002"}) as mock:
+        records = sync_with_async_engine(args, mock, capsys, employees_engine=engine)
+
+    assert [record["XRefCode"] for record in records] == ["E001", "E003"]
+
+
+def test_async_engine_authenticates_every_request(args):
+    with AioMockDayforce(employees=["E001", "E002"]) as mock:
+        employee_payloads(engine_against_mock(args, mock))
+
+    credentials = base64.b64encode(f"{args.client.username}:{args.client.password}".encode()).decode()
+    assert mock.authorizations == {f"Basic {credentials}"}
+
+
+def test_async_engine_bounds_concurrency(args):
+    xrefcodes = [f"E{i:03d}" for i in range(16)]
+    with AioMockDayforce(employees=xrefcodes, latency=0.05) as mock:
+        started = time.monotonic()
+        employee_payloads(engine_against_mock(args, mock, concurrency=32))
+        unbounded_elapsed = time.monotonic() - started
+
+        started = time.monotonic()
+        employee_payloads(engine_against_mock(args, mock, concurrency=2))
+        bounded_elapsed = time.monotonic() - started
+
+    assert bounded_elapsed >= 2 * len(xrefcodes) / 2 * 0.05
+    assert unbounded_elapsed < bounded_elapsed / 3
+
+
+def test_async_engine_shares_the_rate_limiters_concurrency_cap(args, monkeypatch):
+    xrefcodes = [f"E{i:03d}" for i in range(16)]
+    rate_limiter = RateLimiter(max_concurrency=2)
+    monkeypatch.setattr(args.client, "rate_limiter", rate_limiter)
+    with AioMockDayforce(employees=xrefcodes, latency=0.05) as mock:
+        started = time.monotonic()
+        employee_payloads(engine_against_mock(args, mock, concurrency=32))
+        elapsed = time.monotonic() - started
+
+    assert elapsed >= 2 * len(xrefcodes) / 2 * 0.05
+    # Every slot was given back.
+    assert rate_limiter.acquire_slot(blocking=False) and rate_limiter.acquire_slot(blocking=False)
+
+
+def test_async_engine_respects_retry_after(args):
+    xrefcodes = [f"E{i:03d}" for i in range(8)]
+    with AioMockDayforce(employees=xrefcodes, rate_limited_requests=3) as mock:
+        payloads = employee_payloads(engine_against_mock(args, mock, concurrency=4))
+
+    assert [xrefcode for xrefcode, _ in payloads] == xrefcodes
+    assert len(mock.requests) == 1 + 2 * len(xrefcodes) + 3
+
+
+def test_async_engine_returns_null_schedules_when_unauthorized(args):
+    with AioMockDayforce(employees=["E001", "E002"], unauthorized_schedules={"E002"}) as mock:
+        payloads = dict(employee_payloads(engine_against_mock(args, mock)))
+
+    assert payloads["E001"][1]["Data"][0]["NetHours"] == 8.0
+    assert payloads["E002"] == (
+        {"XRefCode": "E002", "FirstName": "First E002", "LastModifiedTimestamp": "2019-01-01T00:00:00"},
+        {"error": None},
+    )
+
+
+def test_async_engine_raises_requests_errors(args):
+    with AioMockDayforce(employees=["E001"], latency=0.5) as mock:
+        args.client.timeout = 0.1
+        with pytest.raises(requests.exceptions.Timeout):
+            employee_payloads(engine_against_mock(args, mock))
+
+
+def test_async_engine_joins_bulk_schedules(args, capsys):
+    xrefcodes = [f"E{i:03d}" for i in range(12)]
+    with AioMockDayforce(employees=xrefcodes, schedules_page_size=5) as mock:
+        records = sync_with_async_engine(args, mock, capsys, schedules_mode="bulk")
+
+    assert [record["XRefCode"] for record in records] == xrefcodes
+    assert sum(path.endswith("/EmployeeSchedules") for path in mock.requests) == 3
+    assert not any(path.endswith("/Schedules") for path in mock.requests)
@@ -0,0 +1,369 @@
+import argparse
+import contextlib
+import copy
+import multiprocessing
+import os
+import resource
+import statistics
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from datetime import timedelta
+from typing import Dict, Tuple
+
+import pytest
+import singer
+from mock_dayforce import MockDayforce, synthetic_employee
+from singer.catalog import Catalog
+from test_whitelisting import legacy_whitelist
+
+from tap_dayforce import (
+    EmployeePunchesStream,
+    EmployeeRawPunchesStream,
+    EmployeesStream,
+    PaySummaryReportStream,
+    get_catalog,
+)
+from tap_dayforce.instrumentation import get_instrumentation
+from tap_dayforce.memory import current_rss_mb
+from tap_dayforce.output import MessageWriter
+from tap_dayforce.transform import RecordTransformer
+from tap_dayforce.utils import date_windows
+from tap_dayforce.whitelisting import WhitelistProjector
+
+
+def records_per_second(func, records) -> float:
+    started = time.perf_counter()
+    func(records)
+    return len(records) / (time.perf_counter() - started)
+
+
+def report(capsys, name, **results):
+    with capsys.disabled():
+        print(f"\n{name}: " + ", ".join(f"{key}={value:,.1f}" for key, value in results.items()))
+
+
+class RecordCountingStdout(object):
+    """Stand-in for stdout that only counts the RECORD messages written to it."""
+
+    def __init__(self):
+        self.records = 0
+
+    def write(self, data: str):
+        self.records += data.count('"type":"RECORD"') + data.count('"type": "RECORD"')
+
+    def flush(self):
+        pass
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of the process. VmHWM is reset by exec, unlike ru_maxrss, which a spawned process
+    inherits from its parent."""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class RssSampler(object):
+    """Samples the process's current RSS every `interval` seconds while in use as a context
+    manager. Unlike the process's peak RSS, which earlier tests may already have pushed higher,
+    `peak_mb - baseline_mb` is the growth during the block."""
+
+    def __init__(self, interval: float = 0.005):
+        self.interval = interval
+        self.baseline_mb = self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+    def __enter__(self):
+        self.baseline_mb = self.peak_mb = current_rss_mb()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *args):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, current_rss_mb())
+
+
+@pytest.mark.benchmark
+def test_benchmark_cached_schema_transform(args, employee_record, capsys):
+    stream = EmployeesStream.from_args(args)
+    records = [copy.deepcopy(employee_record) for _ in range(500)]
+
+    def transform_with_schema_per_record(records):
+        for record in records:
+            with singer.Transformer() as transformer:
+                transformer.transform(data=record, schema=stream.get_schema(stream.tap_stream_id, stream.catalog))
+
+    def transform_with_cached_schema(records):
+        with stream.transformer:
+            for record in records:
+                stream.transform_record(record)
+
+    before = records_per_second(transform_with_schema_per_record, records)
+    after = records_per_second(transform_with_cached_schema, records)
+    report(capsys, "employees transform records/sec", before=before, after=after)
+
+    assert after > before
+
+
+@pytest.mark.benchmark
+def test_benchmark_compiled_schema_transform(args, capsys):
+    stream = EmployeesStream.from_args(args)
+    employees = [synthetic_employee(f"E{i:05d}", items=4) for i in range(2000)]
+
+    def generic(records):
+        transformer = singer.Transformer()
+        for record in records:
+            transformer.transform(data=record, schema=stream.schema)
+
+    def compiled(records):
+        transformer = RecordTransformer()
+        for record in records:
+            transformer.transform(data=record, schema=stream.schema)
+
+    before = max(records_per_second(generic, employees) for _ in range(3))
+    after = max(records_per_second(compiled, employees) for _ in range(3))
+    report(capsys, "employees compiled transform records/sec", before=before, after=after)
+
+    generic_transformer, compiled_transformer = singer.Transformer(), RecordTransformer()
+    assert [compiled_transformer.transform(data=record, schema=stream.schema) for record in employees] == [
+        generic_transformer.transform(data=record, schema=stream.schema) for record in employees
+    ]
+    assert compiled_transformer.fallbacks == 0
+    assert after > 3 * before
+
+
+@pytest.mark.benchmark
+def test_benchmark_message_writer_throughput(employee_record, capsys, monkeypatch):
+    records = [employee_record] * 1000
+    record_bytes = sum(len(singer.format_message(singer.RecordMessage("employees", record))) for record in records)
+    time_extracted = singer.utils.now()
+
+    def singer_write_record(records):
+        for record in records:
+            singer.write_record("employees", record, time_extracted=singer.utils.now())
+
+    def message_writer(records):
+        with MessageWriter() as writer:
+            for record in records:
+                writer.write_record("employees", record, time_extracted=time_extracted)
+
+    with open(os.devnull, "w") as devnull:
+        monkeypatch.setattr(sys, "stdout", devnull)
+        before = records_per_second(singer_write_record, records)
+        after = records_per_second(message_writer, records)
+    megabytes_per_record = record_bytes / len(records) / 1e6
+    report(capsys, "RECORD MB/sec", before=before * megabytes_per_record, after=after * megabytes_per_record)
+
+    assert after > before
+
+
+@pytest.mark.benchmark
+def test_benchmark_whitelist_projection(capsys):
+    employees = [synthetic_employee(f"E{i:05d}", items=8) for i in range(5000)]
+    projector = WhitelistProjector.from_config({})
+
+    def legacy(records):
+        for record in records:
+            legacy_whitelist(record)
+
+    def projected(records):
+        for record in records:
+            projector.project(record)
+
+    before = max(records_per_second(legacy, copy.deepcopy(employees)) for _ in range(5))
+    after = max(records_per_second(projected, copy.deepcopy(employees)) for _ in range(5))
+    report(capsys, "employees whitelisting records/sec", before=before, after=after)
+
+    assert [projector.project(record) for record in copy.deepcopy(employees)] == [
+        legacy_whitelist(record) for record in copy.deepcopy(employees)
+    ]
+    assert after > 1.2 * before
+
+
+BENCHMARK_DAYS = 60
+
+# Every stream is synced against a mock that answers after `latency` seconds, splits listings into
+# pages of 250 records and answers the first requests with 429s. `min_records_per_second` is a
+# conservative floor: a run below it means a change made the stream markedly slower.
+STREAM_BENCHMARKS = {
+    EmployeesStream: {
+        "mock": {"employees": [f"E{i:05d}" for i in range(1000)], "detail_items": 4},
+        "config": {"max_workers": 8},
+        "min_records_per_second": 200,
+    },
+    EmployeePunchesStream: {
+        "mock": {"punches_per_window": 2000},
+        "config": {"window_workers": 4},
+        "min_records_per_second": 5000,
+    },
+    EmployeeRawPunchesStream: {
+        "mock": {"punches_per_window": 2000},
+        "config": {"window_workers": 4},
+        "min_records_per_second": 5000,
+    },
+    PaySummaryReportStream: {
+        "mock": {"rows_per_day": 200},
+        "config": {},
+        "min_records_per_second": 5000,
+    },
+}
+
+
+@pytest.mark.benchmark
+@pytest.mark.parametrize("transform_processes", [1, 2])
+@pytest.mark.parametrize("pt_stream", list(STREAM_BENCHMARKS))
+def test_benchmark_stream_end_to_end(pt_stream, transform_processes, args, capsys, monkeypatch):
+    if pt_stream is PaySummaryReportStream and transform_processes > 1:
+        pytest.skip("The pay summary report isn't transformed in a process pool.")
+    benchmark = STREAM_BENCHMARKS[pt_stream]
+    start = singer.utils.now() - timedelta(days=BENCHMARK_DAYS)
+    args.config.update(
+        start_date=singer.utils.strftime(start), transform_processes=transform_processes, **benchmark["config"]
+    )
+    if isinstance(pt_stream.bookmark_properties, str):
+        singer.bookmarks.write_bookmark(
+            args.state, pt_stream.tap_stream_id, pt_stream.bookmark_properties, singer.utils.strftime(start)
+        )
+    instrumentation = get_instrumentation()
+    instrumentation.reset()
+    stdout = RecordCountingStdout()
+
+    with MockDayforce(latency=0.002, page_size=250, rate_limited_requests=5, **benchmark["mock"]) as mock:
+        stream = pt_stream.from_args(args)
+        stream.client.url = mock.url
+        monkeypatch.setattr(sys, "stdout", stdout)
+        with RssSampler() as rss:
+            started = time.perf_counter()
+            stream.sync()
+            elapsed = time.perf_counter() - started
+        monkeypatch.undo()
+
+    summary = instrumentation.summary()
+    requests = sum(latency["count"] for latency in summary["endpoints"].values())
+    retries = sum(counter["value"] for counter in summary["counters"] if counter["metric"] == "rate_limit_retries")
+    p95 = max(latency["p95"] for latency in summary["endpoints"].values())
+    report(
+        capsys,
+        f"{pt_stream.tap_stream_id} end to end, {transform_processes} transform process(es)",
+        records=stdout.records,
+        records_per_sec=stdout.records / elapsed,
+        requests=requests,
+        rate_limit_retries=retries,
+        p95_request_ms=p95 * 1000,
+        peak_rss_growth_mb=rss.peak_mb - rss.baseline_mb,
+        peak_rss_mb=rss.peak_mb,
+    )
+
+    if pt_stream is EmployeesStream:
+        expected = len(mock.employees)
+    elif pt_stream is PaySummaryReportStream:
+        expected = BENCHMARK_DAYS * mock.rows_per_day
+    else:
+        expected = len(list(date_windows(start, singer.utils.now(), timedelta(days=6)))) * mock.punches_per_window
+    assert stdout.records == expected
+    assert requests == len(mock.requests)
+    assert retries == 5
+    assert stdout.records / elapsed > benchmark["min_records_per_second"]
+
+
+def sync_employees_in_fresh_process(url: str, config: Dict, state: Dict) -> Tuple[int, float, float]:
+    """Sync the employees stream against the mock at `url` and return the records written, the
+    seconds taken and the process's peak RSS in MB. Run in a spawned process, so the peak RSS
+    is that of the sync alone."""
+    args = argparse.Namespace(
+        config=config,
+        config_path="config.json",
+        state=state,
+        catalog=Catalog.from_dict(get_catalog()),
+    )
+    stream = EmployeesStream.from_args(args)
+    stream.client.url = url
+    stdout = RecordCountingStdout()
+    with contextlib.redirect_stdout(stdout):  # type: ignore
+        started = time.perf_counter()
+        stream.sync()
+        elapsed = time.perf_counter() - started
+    return stdout.records, elapsed, peak_rss_mb()
+
+
+@pytest.mark.benchmark
+def test_benchmark_employees_peak_rss_for_large_tenant(args, capsys):
+    # A tenant whose employees have large details and hourly schedules around the clock. A budget
+    # of 1 MB is exceeded from the start, so the whole sync runs in its memory-saving mode.
+    start = singer.utils.now() - timedelta(days=BENCHMARK_DAYS)
+    state = copy.deepcopy(args.state)
+    singer.bookmarks.write_bookmark(state, "employees", "SyncTimestampUtc", singer.utils.strftime(start))
+    xrefcodes = [f"E{i:05d}" for i in range(200)]
+
+    peaks = {}
+    for memory_budget_mb in (None, 1):
+        config = dict(args.config, max_workers=8, schedules_chunk_days=7)
+        if memory_budget_mb is not None:
+            config["memory_budget_mb"] = memory_budget_mb
+        with MockDayforce(employees=xrefcodes, detail_items=20, schedules_per_day=24) as mock:
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                records, elapsed, peaks[memory_budget_mb] = executor.submit(
+                    sync_employees_in_fresh_process, mock.url, config, state
+                ).result()
+
+        report(
+            capsys,
+            f"employees large tenant, memory_budget_mb={memory_budget_mb}",
+            records=records,
+            records_per_sec=records / elapsed,
+            schedule_requests=sum(path.endswith("/Schedules") for path in mock.requests),
+            peak_rss_mb=peaks[memory_budget_mb],
+        )
+        assert records == len(xrefcodes)
+
+    assert peaks[1] < peaks[None] / 2
+
+
+def startup_seconds(code: str, runs: int = 7) -> float:
+    """Median wall time of a fresh interpreter running `code`."""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        subprocess.run([sys.executable, "-c", code], check=True, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        timings.append(time.perf_counter() - started)
+    return statistics.median(timings)
+
+
+@pytest.mark.benchmark
+def test_benchmark_import_and_discover_startup(shared_datadir, capsys):
+    discover = (
+        "import sys, tap_dayforce; "
+        f"sys.argv = ['tap-dayforce', '--config', {str(shared_datadir / 'test.config.json')!r}, '--discover']; "
+        "tap_dayforce.main()"
+    )
+    interpreter = startup_seconds("pass")
+    # rollbar and aiohttp used to be imported along with the tap on every startup.
+    eager_import = startup_seconds("import rollbar, aiohttp, tap_dayforce")
+    lazy_import = startup_seconds("import tap_dayforce")
+    eager_discover = startup_seconds("import rollbar, aiohttp; " + discover)
+    lazy_discover = startup_seconds(discover)
+    report(
+        capsys,
+        "startup ms (excluding interpreter)",
+        import_before=(eager_import - interpreter) * 1000,
+        import_after=(lazy_import - interpreter) * 1000,
+        discover_before=(eager_discover - interpreter) * 1000,
+        discover_after=(lazy_discover - interpreter) * 1000,
+    )
+
+    assert lazy_import < eager_import
+    assert lazy_discover < eager_discover
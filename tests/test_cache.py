@@ -0,0 +1,54 @@
+import time
+
+from tap_dayforce.cache import DetailCache, get_detail_cache
+
+
+def test_detail_cache_only_serves_the_cached_version(tmp_path):
+    cache = DetailCache(path=str(tmp_path / "details.db"))
+    assert cache.get("employees", "E001", "v1") is None
+
+    cache.put("employees", "E001", "v1", {"XRefCode": "E001", "Items": [1, 2]})
+    assert cache.get("employees", "E001", "v1") == {"XRefCode": "E001", "Items": [1, 2]}
+    assert cache.get("employees", "E001", "v2") is None
+    assert cache.get("punches", "E001", "v1") is None
+
+
+def test_detail_cache_expires_entries_after_ttl(tmp_path, monkeypatch):
+    cache = DetailCache(path=str(tmp_path / "details.db"), ttl_seconds=60)
+    cache.put("employees", "E001", "v1", {"XRefCode": "E001"})
+
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 61)
+    assert cache.get("employees", "E001", "v1") is None
+    cache.commit()
+    assert cache._connection.execute("SELECT COUNT(*) FROM responses").fetchone() == (0,)
+
+
+def test_detail_cache_evicts_least_recently_used_entries_above_max_bytes(tmp_path):
+    cache = DetailCache(path=str(tmp_path / "details.db"))
+    for xrefcode in ("E001", "E002", "E003"):
+        cache.put("employees", xrefcode, "v1", {"XRefCode": xrefcode})
+    cache.get("employees", "E001", "v1")
+    (size,) = cache._connection.execute("SELECT MAX(size) FROM responses").fetchone()
+    cache.max_bytes = 2 * size
+    cache.commit()
+
+    assert cache.get("employees", "E001", "v1") is not None
+    assert cache.get("employees", "E002", "v1") is None
+    assert cache.get("employees", "E003", "v1") is not None
+
+
+def test_detail_cache_persists_committed_entries(tmp_path):
+    path = str(tmp_path / "details.db")
+    cache = DetailCache(path=path)
+    cache.put("employees", "E001", "v1", {"XRefCode": "E001"})
+    cache.commit()
+    cache.close()
+
+    assert DetailCache(path=path).get("employees", "E001", "v1") == {"XRefCode": "E001"}
+
+
+def test_get_detail_cache_requires_a_path(tmp_path):
+    assert get_detail_cache({}) is None
+    config = {"detail_cache_path": str(tmp_path / "details.db")}
+    assert get_detail_cache(config) is get_detail_cache(config)
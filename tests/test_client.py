@@ -0,0 +1,26 @@
+from mock_dayforce import MockDayforce
+
+from tap_dayforce.client import DayforceClient
+
+
+def test_client_reuses_kept_alive_connections(config):
+    client = DayforceClient.from_config(config)
+    with MockDayforce(employees=["E001"]) as mock:
+        client.url = mock.url
+        for _ in range(5):
+            client.get_employees()
+
+    assert client.connection_stats() == {"requests": 5, "connections_opened": 1, "connections_reused": 4}
+
+
+def test_client_pool_size_is_configurable(config):
+    config["http_pool_size"] = 32
+    client = DayforceClient.from_config(config)
+
+    assert {adapter._pool_maxsize for adapter in client.session.adapters.values()} == {32}
+
+
+def test_client_sends_gzip_accept_encoding(config):
+    client = DayforceClient.from_config(config)
+
+    assert "gzip" in client._construct_headers()["Accept-Encoding"]
@@ -0,0 +1,41 @@
+from tap_dayforce.fingerprints import FingerprintStore, fingerprint, get_fingerprint_store
+
+
+def test_fingerprint_ignores_key_order():
+    assert fingerprint({"a": 1, "b": [1, 2]}) == fingerprint({"b": [1, 2], "a": 1})
+    assert fingerprint({"a": 1}) != fingerprint({"a": 2})
+
+
+def test_fingerprint_store_get_returns_saved_fingerprints(tmp_path):
+    store = FingerprintStore(path=str(tmp_path / "fingerprints.db"))
+    assert store.get("employees", "E1") is None
+    store.save("employees", {"E1": "abc"})
+    assert store.get("employees", "E1") == "abc"
+    assert store.get("punches", "E1") is None
+
+
+def test_fingerprint_store_save_persists_fingerprints(tmp_path):
+    path = str(tmp_path / "fingerprints.db")
+    store = FingerprintStore(path=path)
+    store.save("punches", {"P1": "abc", "P2": "def"})
+    store.close()
+
+    store = FingerprintStore(path=path)
+    assert store.get("punches", "P1") == "abc"
+    assert store.get("punches", "P2") == "def"
+    assert store.get("raw_punches", "P1") is None
+
+
+def test_fingerprint_store_evicts_least_recently_seen(tmp_path):
+    store = FingerprintStore(path=str(tmp_path / "fingerprints.db"), max_entries=2)
+    for key in ("P1", "P2", "P3"):
+        store.save("punches", {key: "abc"})
+
+    assert store.get("punches", "P1") is None
+    assert store.get("punches", "P3") == "abc"
+
+
+def test_get_fingerprint_store_requires_a_path(tmp_path):
+    assert get_fingerprint_store({}) is None
+    config = {"fingerprint_db_path": str(tmp_path / "fingerprints.db")}
+    assert get_fingerprint_store(config) is get_fingerprint_store(config)
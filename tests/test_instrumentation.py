@@ -0,0 +1,96 @@
+import json
+
+import pytest
+from mock_dayforce import MockDayforce
+
+from tap_dayforce import EmployeesStream, sync
+from tap_dayforce.instrumentation import Histogram, Instrumentation, endpoint_name, get_instrumentation
+
+
+@pytest.fixture(scope="function")
+def instrumentation():
+    instrumentation = get_instrumentation()
+    instrumentation.reset()
+    yield instrumentation
+    instrumentation.reset()
+
+
+def counters(summary):
+    return {(counter["metric"], counter["endpoint"]): counter["value"] for counter in summary["counters"]}
+
+
+def test_endpoint_name_groups_employees_by_resource():
+    base_url = "https://us241-services.dayforcehcm.com/Api/foobar/V1"
+    assert endpoint_name(f"{base_url}/Employees", base_url) == "Employees"
+    assert endpoint_name(f"{base_url}/Employees/E001?expand=Roles", base_url) == "Employees/{xrefcode}"
+    assert endpoint_name(f"{base_url}/Employees/E001/Schedules", base_url) == "Employees/{xrefcode}/Schedules"
+    assert endpoint_name(f"{base_url}/Reports/pay_summary_report", base_url) == "Reports/pay_summary_report"
+
+
+def test_histogram_reports_bucket_quantiles():
+    histogram = Histogram(buckets=(0.1, 1.0))
+    for value in [0.05] * 90 + [0.5] * 9 + [3.0]:
+        histogram.observe(value)
+
+    assert histogram.counts == [90, 9, 1]
+    assert histogram.quantile(0.5) == 0.1
+    assert histogram.quantile(0.95) == 1.0
+    assert histogram.quantile(1.0) == 3.0
+    assert histogram.asdict()["count"] == 100
+
+
+def test_instrumentation_counts_backoff_retries():
+    instrumentation = Instrumentation()
+    instrumentation.on_backoff({"target": EmployeesStream.sync, "wait": 0.5})
+    instrumentation.on_backoff({"target": EmployeesStream.sync, "wait": 1.5})
+
+    assert counters(instrumentation.summary()) == {
+        ("backoff_retries", "EmployeesStream.sync"): 2,
+        ("backoff_seconds", "EmployeesStream.sync"): 2.0,
+    }
+
+
+def test_employees_stream_records_requests_and_stages(args, instrumentation):
+    xrefcodes = [f"E{i:03d}" for i in range(5)]
+    with MockDayforce(employees=xrefcodes, rate_limited_requests=2, unauthorized_schedules={"E001"}) as mock:
+        stream = EmployeesStream.from_args(args)
+        stream.client.url = mock.url
+        stream.sync()
+
+    summary = instrumentation.summary()
+    assert summary["endpoints"]["Employees"]["count"] == 1
+    assert (
+        summary["endpoints"]["Employees/{xrefcode}"]["count"]
+        + summary["endpoints"]["Employees/{xrefcode}/Schedules"]["count"]
+        == 2 * len(xrefcodes) + 2
+    )
+    assert (
+        counters(summary)[("rate_limit_retries", "Employees/{xrefcode}")]
+        + counters(summary).get(("rate_limit_retries", "Employees/{xrefcode}/Schedules"), 0)
+        == 2
+    )
+    assert counters(summary)[("unauthorized_responses_handled", "Employees/{xrefcode}/Schedules")] == 1
+    assert counters(summary)[("http_bytes_received", "Employees")] > 0
+    assert {(stage["stream"], stage["stage"]) for stage in summary["stages"]} == {
+        ("employees", "transform"),
+        ("employees", "whitelist"),
+        ("employees", "write"),
+    }
+
+
+def test_sync_emits_metrics_and_writes_summary(args, instrumentation, capfd, tmp_path):
+    summary_path = tmp_path / "metrics.json"
+    args.config.update(metrics_summary_path=str(summary_path))
+    args.catalog.streams = [entry for entry in args.catalog.streams if entry.tap_stream_id == "employees"]
+    with MockDayforce(employees=["E001"]) as mock:
+        args.client.url = mock.url
+        sync(args)
+
+    metrics = [
+        json.loads(line.split("METRIC: ", 1)[1]) for line in capfd.readouterr().err.splitlines() if "METRIC: " in line
+    ]
+    assert {"endpoint": "Employees", "count": 1}.items() <= next(
+        metric["tags"] for metric in metrics if metric["metric"] == "http_request_duration"
+    ).items()
+    assert {metric["metric"] for metric in metrics} >= {"transform_duration", "write_duration", "http_bytes_received"}
+    assert json.loads(summary_path.read_text())["endpoints"]["Employees"]["count"] == 1
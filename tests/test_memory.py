@@ -0,0 +1,59 @@
+import builtins
+import resource
+
+from tap_dayforce import memory
+from tap_dayforce.memory import MemoryBudget, current_rss_mb
+
+
+def test_current_rss_mb_is_at_most_the_peak():
+    peak_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    assert 0 < current_rss_mb() <= peak_mb + 1
+
+
+def test_current_rss_mb_without_proc_or_resource(monkeypatch):
+    real_open, real_import = builtins.open, builtins.__import__
+
+    def no_proc(path, *args, **kwargs):
+        if str(path).startswith("/proc/"):
+            raise FileNotFoundError(path)
+        return real_open(path, *args, **kwargs)
+
+    def no_resource(name, *args, **kwargs):
+        if name == "resource":
+            raise ImportError(name)
+        return real_import(name, *args, **kwargs)
+
+    monkeypatch.setattr(builtins, "open", no_proc)
+    assert current_rss_mb() > 0
+    monkeypatch.setattr(builtins, "__import__", no_resource)
+    assert current_rss_mb() == 0
+
+
+def test_memory_budget_from_config():
+    assert MemoryBudget.from_config({}) is None
+    assert MemoryBudget.from_config({"memory_budget_mb": "512"}) == MemoryBudget(limit_mb=512.0)
+
+
+def test_memory_budget_is_checked_at_most_every_interval(monkeypatch):
+    rss = [100.0]
+    monkeypatch.setattr(memory, "current_rss_mb", lambda: rss[0])
+    budget = MemoryBudget(limit_mb=200, interval=3600)
+    assert not budget.check()
+
+    rss[0] = 300.0
+    assert not budget.check()
+    budget.interval = 0
+    assert budget.check()
+
+
+def test_memory_budget_stays_exceeded_and_warns_once(monkeypatch, caplog):
+    rss = [300.0]
+    monkeypatch.setattr(memory, "current_rss_mb", lambda: rss[0])
+    budget = MemoryBudget(limit_mb=200, interval=0)
+    assert budget.check()
+
+    rss[0] = 100.0
+    assert budget.check()
+    assert [message for message in caplog.messages if "exceeds the budget" in message] == [
+        "Resident memory of 300 MB exceeds the budget of 200 MB."
+    ]
@@ -0,0 +1,192 @@
+import decimal
+import gzip
+import json
+import os
+import sys
+from datetime import timedelta
+from urllib.parse import urlparse
+
+import pytest
+import singer
+from mock_dayforce import MockDayforce
+
+from tap_dayforce import EmployeePunchesStream, output
+from tap_dayforce.output import FileMessageWriter, MessageWriter, format_message, get_writer
+
+RECORD = {"XRefCode": "E001", "NetHours": 8.5, "Schedules": [{"TimeStart": "2019-12-30T17:13:33.851000Z"}]}
+
+
+def singer_record_line(record, time_extracted=None):
+    message = singer.RecordMessage(stream="employees", record=record, time_extracted=time_extracted)
+    return singer.format_message(message) + "\n"
+
+
+def test_format_message_matches_singer_python():
+    time_extracted = singer.utils.now()
+    writer = MessageWriter()
+    message = {
+        "type": "RECORD",
+        "stream": "employees",
+        "record": RECORD,
+        "time_extracted": writer._format_time_extracted(time_extracted),
+    }
+    assert json.loads(format_message(message)) == json.loads(singer_record_line(RECORD, time_extracted))
+
+
+def test_format_message_without_orjson_is_byte_identical_to_singer_python(monkeypatch):
+    monkeypatch.setattr(output, "orjson", None)
+    message = {"type": "RECORD", "stream": "employees", "record": RECORD}
+    assert format_message(message) == singer_record_line(RECORD).encode("utf-8")
+
+
+def test_format_message_falls_back_for_decimals():
+    record = {"Amount": decimal.Decimal("1.10")}
+    message = {"type": "RECORD", "stream": "employees", "record": record}
+    assert format_message(message) == singer_record_line(record).encode("utf-8")
+
+
+def test_message_writer_flushes_records_in_batches(capsys):
+    writer = MessageWriter(batch_size=3)
+    for _ in range(2):
+        writer.write_record("employees", RECORD)
+    assert capsys.readouterr().out == ""
+
+    writer.write_record("employees", RECORD)
+    assert len(capsys.readouterr().out.splitlines()) == 3
+
+    with writer:
+        writer.write_record("employees", RECORD)
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+def test_message_writer_release_writes_buffered_records(capsys):
+    writer = MessageWriter(batch_size=3)
+    writer.write_record("employees", RECORD)
+    writer.release()
+    assert len(capsys.readouterr().out.splitlines()) == 1
+
+
+@pytest.mark.parametrize("time_extracted", [None, singer.utils.now()])
+def test_message_writer_writes_serialized_records_like_records(capsys, time_extracted):
+    writer = MessageWriter()
+    with writer:
+        writer.write_record("employees", RECORD, time_extracted)
+        writer.write_serialized_record("employees", format_message(RECORD), time_extracted)
+
+    record_line, serialized_line = capsys.readouterr().out.splitlines()
+    assert json.loads(serialized_line) == json.loads(record_line)
+
+
+@pytest.mark.parametrize("write", [lambda w: w.write_state({"bookmarks": {}}), lambda w: w.write_schema("e", {}, [])])
+def test_message_writer_flushes_records_before_other_messages(capsys, write):
+    writer = MessageWriter()
+    writer.write_record("employees", RECORD)
+    write(writer)
+    types = [json.loads(line)["type"] for line in capsys.readouterr().out.splitlines()]
+    assert types[0] == "RECORD" and len(types) == 2
+
+
+def read_batch_file(uri, compression="gzip"):
+    path = urlparse(uri).path
+    if compression == "zstd":
+        import zstandard
+
+        opener = zstandard.open
+    else:
+        opener = gzip.open if compression == "gzip" else open
+    with opener(path, "rb") as f:
+        return [json.loads(line) for line in f]
+
+
+@pytest.mark.parametrize("compression", ["gzip", "none", "zstd"])
+def test_file_message_writer_announces_rotated_files_before_state(capsys, tmp_path, compression):
+    if compression == "zstd":
+        pytest.importorskip("zstandard")
+    writer = FileMessageWriter(output_dir=str(tmp_path), compression=compression, max_records_per_file=2)
+    for i in range(5):
+        writer.write_record("employees", {**RECORD, "XRefCode": f"E{i}"})
+    writer.write_record("employee_punches", {"PunchXRefCode": "P0"})
+    assert capsys.readouterr().out == ""
+
+    writer.write_state({"bookmarks": {}})
+    employees, punches, state = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert state == {"type": "STATE", "value": {"bookmarks": {}}}
+    assert employees["encoding"] == punches["encoding"] == {"format": "jsonl", "compression": compression}
+    assert len(employees["manifest"]) == 3
+    assert [record["XRefCode"] for uri in employees["manifest"] for record in read_batch_file(uri, compression)] == [
+        f"E{i}" for i in range(5)
+    ]
+    assert [record for uri in punches["manifest"] for record in read_batch_file(uri, compression)] == [
+        {"PunchXRefCode": "P0"}
+    ]
+
+
+def test_file_message_writer_partitions_files_by_stream_and_window(capsys, tmp_path):
+    writer = FileMessageWriter(output_dir=str(tmp_path), max_records_per_file=2, run_id="run")
+    for i in range(5):
+        writer.write_record("employees", {"XRefCode": f"E{i}"})
+    writer.write_record("employee_punches", {"PunchXRefCode": "P0"})
+    writer.write_state({"bookmarks": {}})
+    writer.write_record("employees", {"XRefCode": "E5"})
+    writer.flush()
+
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [(message["type"], message.get("stream")) for message in messages] == [
+        ("BATCH", "employees"),
+        ("BATCH", "employee_punches"),
+        ("STATE", None),
+        ("BATCH", "employees"),
+    ]
+    manifests = [message["manifest"] for message in messages if message["type"] == "BATCH"]
+    assert [[os.path.relpath(urlparse(uri).path, tmp_path) for uri in manifest] for manifest in manifests] == [
+        [
+            "employees/run/window-00000/part-00000.jsonl.gz",
+            "employees/run/window-00000/part-00001.jsonl.gz",
+            "employees/run/window-00000/part-00002.jsonl.gz",
+        ],
+        ["employee_punches/run/window-00000/part-00000.jsonl.gz"],
+        ["employees/run/window-00001/part-00000.jsonl.gz"],
+    ]
+    assert [record["XRefCode"] for uri in manifests[0] + manifests[2] for record in read_batch_file(uri)] == [
+        f"E{i}" for i in range(6)
+    ]
+
+
+def test_file_message_writer_writes_parquet(capsys, tmp_path):
+    parquet = pytest.importorskip("pyarrow.parquet")
+    writer = FileMessageWriter(output_dir=str(tmp_path), file_format="parquet", compression="zstd")
+    with writer:
+        for i in range(3):
+            writer.write_record("employee_punches", {"PunchXRefCode": f"P{i}", "NetHours": 8.0})
+
+    (batch,) = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert batch["encoding"] == {"format": "parquet", "compression": "zstd"}
+    table = parquet.read_table(urlparse(batch["manifest"][0]).path)
+    assert table.column("PunchXRefCode").to_pylist() == ["P0", "P1", "P2"]
+
+
+def test_file_message_writer_requires_optional_codecs(monkeypatch, tmp_path):
+    monkeypatch.setitem(sys.modules, "zstandard", None)
+    with pytest.raises(RuntimeError, match="zstandard"):
+        FileMessageWriter(output_dir=str(tmp_path), compression="zstd")
+
+
+def test_punch_stream_writes_records_to_batch_files(args, capsys, tmp_path):
+    start = singer.utils.now() - timedelta(days=20)
+    singer.bookmarks.write_bookmark(
+        args.state, "employee_punches", EmployeePunchesStream.bookmark_properties, singer.utils.strftime(start)
+    )
+    args.config.update(batch_output_dir=str(tmp_path))
+    with MockDayforce(punches_per_window=3) as mock:
+        stream = EmployeePunchesStream.from_args(args)
+        stream.client.url = mock.url
+        stream.sync()
+
+    assert stream.writer is get_writer(args.config)
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    assert [message["type"] for message in messages] == ["BATCH", "STATE"] * 4
+    records = [record for message in messages[::2] for record in read_batch_file(message["manifest"][0])]
+    assert len(records) == 4 * 3
+    assert {record["SyncTimestampUtc"] for record in records} == {
+        args.state["bookmarks"]["employee_punches"]["SyncTimestampUtc"]
+    }
@@ -0,0 +1,34 @@
+from tap_dayforce.pipeline import TransformPipeline
+from tap_dayforce.whitelisting import WhitelistProjector
+
+SCHEMA = {
+    "type": "object",
+    "properties": {
+        "XRefCode": {"type": "string"},
+        "Hours": {"type": ["null", "number"]},
+        "CompensationSummary": {"type": ["null", "object"]},
+    },
+}
+
+
+def test_transform_pipeline_yields_lines_in_order_and_none_for_mismatches():
+    items = [({"XRefCode": f"E{i:03d}", "Hours": "bad" if i == 7 else i}, {"Hours": i * 0.5}) for i in range(20)]
+    items[11] = ({"XRefCode": "E011"}, {"Hours": "bad"})
+    with TransformPipeline(schema=SCHEMA, processes=2, chunk_size=3) as pipeline:
+        results = list(pipeline.map(items))
+
+    assert [item for item, _, _ in results] == items
+    lines = [line for _, line, _ in results]
+    assert lines[11] is None
+    assert lines[7] == b'{"XRefCode":"E007","Hours":3.5}\n'
+    assert sum(seconds > 0 for _, _, seconds in results) <= 7
+
+
+def test_transform_pipeline_whitelists_before_adding_fields():
+    whitelist = WhitelistProjector(collections=["CompensationSummary"], fields=["PayClass"], xrefcodes={"PayClass": []})
+    record = {"XRefCode": "E001", "CompensationSummary": {"Items": [{"PayClass": {"XRefCode": "FT"}, "Rate": 1}]}}
+    with TransformPipeline(schema=SCHEMA, whitelist=whitelist, processes=1) as pipeline:
+        [(_, line, _)] = pipeline.map([(record, {"Hours": 1})])
+
+    assert b'"Rate"' not in line
+    assert b'"Hours":1' in line
@@ -0,0 +1,84 @@
+import threading
+import time
+
+import pytest
+
+from tap_dayforce.ratelimit import RateLimiter, get_rate_limiter, parse_retry_after
+
+
+def test_rate_limiter_paces_requests_ahead_of_time():
+    limiter = RateLimiter(requests_per_second=50)
+    started = time.monotonic()
+    for _ in range(11):
+        limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+
+def test_rate_limiter_without_budget_does_not_pace():
+    limiter = RateLimiter()
+    started = time.monotonic()
+    for _ in range(1000):
+        limiter.acquire()
+    assert time.monotonic() - started < 0.1
+
+
+def test_rate_limiter_blocks_and_slows_down_after_429():
+    limiter = RateLimiter(requests_per_second=100)
+    limiter.on_rate_limited(retry_after=0.2)
+    assert limiter.rate == 50
+
+    started = time.monotonic()
+    limiter.acquire()
+    assert time.monotonic() - started >= 0.19
+
+
+def test_rate_limiter_speeds_back_up_after_successes():
+    limiter = RateLimiter(requests_per_second=100, increase_after=5, increase_step=0.25)
+    limiter.on_rate_limited()
+    limiter.on_rate_limited()
+    assert limiter.rate == 25
+
+    for _ in range(5):
+        limiter.on_success()
+    assert limiter.rate == 50
+
+    for _ in range(50):
+        limiter.on_success()
+    assert limiter.rate == 100
+
+
+def test_get_rate_limiter_is_shared_per_budget():
+    assert get_rate_limiter({"requests_per_second": 3}) is get_rate_limiter({"requests_per_second": 3})
+    assert get_rate_limiter({"requests_per_second": 3}) is not get_rate_limiter({"requests_per_second": 4})
+
+
+@pytest.mark.parametrize("value, expected", [("3", 3.0), ("0", 0.0), (None, 1.0), ("Wed, 21 Oct 2015", 1.0)])
+def test_parse_retry_after(value, expected):
+    assert parse_retry_after(value) == expected
+
+
+def test_rate_limiter_bounds_concurrent_requests():
+    limiter = RateLimiter(max_concurrency=2)
+    in_flight = []
+    peak = []
+    lock = threading.Lock()
+
+    def request():
+        limiter.acquire()
+        try:
+            with lock:
+                in_flight.append(1)
+                peak.append(len(in_flight))
+            time.sleep(0.02)
+            with lock:
+                in_flight.pop()
+        finally:
+            limiter.release()
+
+    threads = [threading.Thread(target=request) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert max(peak) == 2
@@ -0,0 +1,99 @@
+import json
+import tracemalloc
+
+import pytest
+from mock_dayforce import REPORT_START_PARAM, MockDayforce
+
+from tap_dayforce.client import DayforceClient
+from tap_dayforce.instrumentation import get_instrumentation
+from tap_dayforce.reports import ReportPageReader, RowSpool
+
+
+def report_row(i: int):
+    return {
+        "Employee_DisplayName": f"Émployee {i}",
+        "EmployeePaySummary_PayAmount": i * 1.5,
+        "EmployeePaySummary_PayDate": "2020-01-01T00:00:00",
+        "EmployeePaySummary_NetHours": i,
+    }
+
+
+def chunked(payload: bytes, chunk_size: int):
+    chunks = []
+    for start in range(0, len(payload), chunk_size):
+        end = start + chunk_size
+        chunks.append(payload[start:end])
+    return chunks
+
+
+def large_report_page(rows: int, chunk_size: int = 64 * 1024):
+    """Lazily yield the body of a report page with `rows` rows, as `chunk_size` chunks."""
+    chunk = b'{"Data": {"Rows": ['
+    for i in range(rows):
+        chunk += (b"," if i else b"") + json.dumps(report_row(i)).encode("utf-8")
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = b""
+    yield chunk + b'], "Name": "pay_summary_report"}, "Paging": {"Next": ""}}'
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 4096])
+@pytest.mark.parametrize(
+    "page",
+    [
+        {"Data": {"Rows": [report_row(i) for i in range(25)]}, "Paging": {"Next": "https://next"}},
+        {"Paging": {"Next": ""}, "Data": {"Name": "Rows", "Rows": [report_row(0), None, {}, report_row(1)]}},
+        {"Data": {"Rows": []}, "Paging": {"Next": ""}},
+        {"Data": None, "Paging": None},
+    ],
+)
+def test_report_page_reader_yields_rows_and_envelope(page, chunk_size):
+    for payload in (json.dumps(page), json.dumps(page, indent=2)):
+        reader = ReportPageReader(chunked(payload.encode("utf-8"), chunk_size))
+
+        assert list(reader) == [row for row in (page["Data"] or {}).get("Rows", []) if row]
+        assert reader.envelope["Paging"] == page["Paging"]
+        assert reader.bytes_read == len(payload.encode("utf-8"))
+
+
+def test_report_page_reader_rejects_truncated_pages():
+    payload = json.dumps({"Data": {"Rows": [report_row(0), report_row(1)]}}).encode("utf-8")
+    with pytest.raises(ValueError):
+        list(ReportPageReader(chunked(payload[:-20], 16)))
+
+
+def test_row_spool_replays_rows():
+    with RowSpool() as rows:
+        rows.extend(report_row(i) for i in range(10))
+        assert len(rows) == 10
+        assert list(rows) == list(rows) == [report_row(i) for i in range(10)]
+
+
+def test_large_report_page_is_spooled_in_constant_memory():
+    rows = 100000
+    body_size = sum(len(chunk) for chunk in large_report_page(rows))
+
+    tracemalloc.start()
+    try:
+        with RowSpool() as spool:
+            spool.extend(ReportPageReader(large_report_page(rows)))
+            _, peak = tracemalloc.get_traced_memory()
+            assert len(spool) == rows
+    finally:
+        tracemalloc.stop()
+
+    assert body_size > 10 * 1024 * 1024
+    assert peak < 1024 * 1024
+
+
+def test_client_streams_report_rows_across_pages(config):
+    instrumentation = get_instrumentation()
+    instrumentation.reset()
+    client = DayforceClient.from_config(config)
+    with MockDayforce(rows_per_window=25, page_size=10) as mock:
+        client.url = mock.url
+        rows = list(client.iter_report_rows(xrefcode="pay_summary_report", params={REPORT_START_PARAM: "W"}))
+
+    assert [row["Employee_DisplayName"] for row in rows] == [f"W/{i}" for i in range(25)]
+    assert len(mock.requests) == 3
+    assert instrumentation.counters[("http_bytes_received", "Reports/pay_summary_report")] > 0
@@ -1,8 +1,20 @@
+import collections
+import contextlib
 import copy
+import json
+import sqlite3
+import time
+from datetime import timedelta
 
 import pytest
+import requests
+import singer
+from mock_dayforce import MockDayforce
+from singer.transform import SchemaMismatch
 
 from tap_dayforce import EmployeePunchesStream, EmployeeRawPunchesStream, EmployeesStream, PaySummaryReportStream
+from tap_dayforce.fingerprints import get_fingerprint_store
+from tap_dayforce.utils import date_windows
 from tap_dayforce.whitelisting import WHITELISTED_COLLECTIONS, WHITELISTED_FIELDS
 
 
@@ -59,3 +71,525 @@ def test_employee_stream_whitelist(args, employee_record, pay_policy_xrefcode):
     output = stream.whitelist_sensitive_info(data=employee_record)
 
     assert expected == output
+
+
+def read_messages(capsys, message_type):
+    messages = [json.loads(line) for line in capsys.readouterr().out.splitlines()]
+    return [message for message in messages if message["type"] == message_type]
+
+
+def sync_against_mock(pt_stream, args, mock, capsys, **config):
+    args.config.update(config)
+    stream = pt_stream.from_args(args)
+    stream.client.url = mock.url
+    capsys.readouterr()
+    started = time.monotonic()
+    stream.sync()
+    elapsed = time.monotonic() - started
+    return [message["record"] for message in read_messages(capsys, "RECORD")], elapsed
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_employees_stream_emits_records_in_listing_order(args, capsys, max_workers):
+    xrefcodes = [f"E{i:03d}" for i in range(25)]
+    with MockDayforce(employees=xrefcodes) as mock:
+        records, _ = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=max_workers)
+
+    assert [record["XRefCode"] for record in records] == xrefcodes
+    assert [record["FirstName"] for record in records] == [f"First {xrefcode}" for xrefcode in xrefcodes]
+    assert sum(path.endswith("/Schedules") for path in mock.requests) == len(xrefcodes)
+
+
+def test_employees_stream_transform_processes_emit_identical_records(args, capsys):
+    xrefcodes = [f"E{i:03d}" for i in range(25)]
+    with MockDayforce(employees=xrefcodes) as mock:
+        serial, _ = sync_against_mock(EmployeesStream, args, mock, capsys)
+        pooled, _ = sync_against_mock(
+            EmployeesStream, args, mock, capsys, transform_processes=2, transform_chunk_size=4
+        )
+
+    for record in serial + pooled:
+        record.pop("SyncTimestampUtc")
+    assert pooled == serial
+    assert [record["XRefCode"] for record in pooled] == xrefcodes
+
+
+def test_employees_stream_worker_pool_scales_with_max_workers(args, capsys):
+    xrefcodes = [f"E{i:03d}" for i in range(16)]
+    with MockDayforce(employees=xrefcodes, latency=0.05) as mock:
+        _, serial_elapsed = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=1)
+        _, parallel_elapsed = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=8)
+
+    assert parallel_elapsed < serial_elapsed / 3
+
+
+def test_employees_stream_worker_pool_respects_retry_after(args, capsys):
+    xrefcodes = [f"E{i:03d}" for i in range(8)]
+    with MockDayforce(employees=xrefcodes, rate_limited_requests=3) as mock:
+        records, _ = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=4)
+
+    assert [record["XRefCode"] for record in records] == xrefcodes
+    assert len(mock.requests) == 1 + 2 * len(xrefcodes) + 3
+
+
+def test_employees_stream_serves_unmodified_details_from_detail_cache(args, capsys, tmp_path):
+    xrefcodes = [f"E{i:03d}" for i in range(6)]
+    with MockDayforce(employees=xrefcodes) as mock:
+        cache_path = str(tmp_path / "details.db")
+        first, _ = sync_against_mock(EmployeesStream, args, mock, capsys, detail_cache_path=cache_path)
+        mock.last_modified["E002"] = "2020-01-01T00:00:00"
+        second, _ = sync_against_mock(EmployeesStream, args, mock, capsys, detail_cache_path=cache_path)
+
+    assert [record["FirstName"] for record in second] == [record["FirstName"] for record in first]
+    assert mock.expanded_detail_requests == xrefcodes + ["E002"]
+
+
+def test_employees_stream_retries_after_connection_errors(args, capsys, monkeypatch):
+    xrefcodes = [f"E{i:03d}" for i in range(3)]
+    get_employee_payloads = EmployeesStream._get_employee_payloads
+    failures = ["E001"]
+
+    def flaky_get_employee_payloads(self, employee, *args, **kwargs):
+        if employee["XRefCode"] in failures:
+            failures.remove(employee["XRefCode"])
+            raise requests.exceptions.ConnectionError("Connection reset")
+        return get_employee_payloads(self, employee, *args, **kwargs)
+
+    monkeypatch.setattr(EmployeesStream, "_get_employee_payloads", flaky_get_employee_payloads)
+    with MockDayforce(employees=xrefcodes) as mock:
+        records, _ = sync_against_mock(EmployeesStream, args, mock, capsys)
+
+    assert [record["XRefCode"] for record in records] == ["E000"] + xrefcodes
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_employees_stream_skips_unchanged_employees_when_rerun(args, capsys, tmp_path, max_workers):
+    args.config.update(dedupe_employees=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    xrefcodes = [f"E{i:03d}" for i in range(6)]
+    with MockDayforce(employees=xrefcodes) as mock:
+        first, _ = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=max_workers)
+        second, _ = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=max_workers)
+        mock.last_modified["E002"] = "2020-01-01T00:00:00"
+        third, _ = sync_against_mock(EmployeesStream, args, mock, capsys, max_workers=max_workers)
+
+    assert [record["XRefCode"] for record in first] == xrefcodes
+    assert second == []
+    assert [record["XRefCode"] for record in third] == ["E002"]
+    # The expanded details fetched to fingerprint a changed employee are not requested again.
+    assert len(mock.expanded_detail_requests) == 3 * len(xrefcodes)
+    assert sum(path.endswith("/Schedules") for path in mock.requests) == len(xrefcodes) + 1
+
+
+def test_employees_stream_fingerprints_expanded_collections_by_default(args, capsys, tmp_path):
+    args.config.update(dedupe_employees=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    xrefcodes = [f"E{i:03d}" for i in range(3)]
+    with MockDayforce(employees=xrefcodes) as mock:
+        sync_against_mock(EmployeesStream, args, mock, capsys)
+        mock.expanded_fields["E001"] = {"Contacts": {"Items": [{"ElectronicAddress": "e001@example.com"}]}}
+        records, _ = sync_against_mock(EmployeesStream, args, mock, capsys)
+
+    assert [record["XRefCode"] for record in records] == ["E001"]
+    assert records[0]["Contacts"] == {"Items": [{"ElectronicAddress": "e001@example.com"}]}
+
+
+def test_employees_stream_only_stores_fingerprints_of_emitted_employees(args, capsys, tmp_path, monkeypatch):
+    args.config.update(dedupe_employees=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    xrefcodes = [f"E{i:03d}" for i in range(4)]
+    get_employee_payloads = EmployeesStream._get_employee_payloads
+    failures = ["E002"]
+
+    def flaky_get_employee_payloads(self, employee, *args, **kwargs):
+        if employee["XRefCode"] in failures:
+            failures.remove(employee["XRefCode"])
+            raise requests.exceptions.ConnectionError("Connection reset")
+        return get_employee_payloads(self, employee, *args, **kwargs)
+
+    monkeypatch.setattr(EmployeesStream, "_get_employee_payloads", flaky_get_employee_payloads)
+    with MockDayforce(employees=xrefcodes) as mock:
+        records, _ = sync_against_mock(EmployeesStream, args, mock, capsys)
+
+    # The retry re-emits E000 and E001, and must not skip E002 even though its summary was fingerprinted.
+    assert [record["XRefCode"] for record in records] == ["E000", "E001"] + xrefcodes
+
+
+def test_employees_stream_only_stores_fingerprints_of_written_employees(args, capsys, tmp_path, monkeypatch):
+    args.config.update(dedupe_employees=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    xrefcodes = [f"E{i:03d}" for i in range(4)]
+    transform_record = EmployeesStream.transform_record
+
+    def mismatched_transform_record(self, record):
+        if record["XRefCode"] == "E002":
+            raise SchemaMismatch([])
+        return transform_record(self, record)
+
+    with MockDayforce(employees=xrefcodes) as mock:
+        with monkeypatch.context() as patch:
+            patch.setattr(EmployeesStream, "transform_record", mismatched_transform_record)
+            first, _ = sync_against_mock(EmployeesStream, args, mock, capsys)
+        # E002 was skipped, so once the schema is fixed it is emitted, here through the transform pipeline.
+        second, _ = sync_against_mock(EmployeesStream, args, mock, capsys, transform_processes=2)
+        third, _ = sync_against_mock(EmployeesStream, args, mock, capsys, transform_processes=2)
+
+    assert [record["XRefCode"] for record in first] == ["E000", "E001", "E003"]
+    assert [record["XRefCode"] for record in second] == ["E002"]
+    assert third == []
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_employees_stream_bulk_schedules_are_fetched_per_page(args, capsys, max_workers):
+    xrefcodes = [f"E{i:03d}" for i in range(25)]
+    with MockDayforce(employees=xrefcodes, unauthorized_schedules={"E003"}, schedules_page_size=10) as mock:
+        records, _ = sync_against_mock(
+            EmployeesStream, args, mock, capsys, max_workers=max_workers, schedules_mode="bulk"
+        )
+
+    assert [record["XRefCode"] for record in records] == xrefcodes
+    assert sum(path.endswith("/EmployeeSchedules") for path in mock.requests) == 3
+    assert not any(path.endswith("/Schedules") for path in mock.requests)
+
+
+def test_employees_stream_unauthorized_schedules_are_empty_in_bulk_mode(args):
+    now = singer.utils.now()
+    schedules = {}
+    with MockDayforce(employees=["E001", "E002", "E003"], unauthorized_schedules={"E002"}) as mock:
+        for mode in ("per_employee", "bulk"):
+            args.config.update(schedules_mode=mode)
+            stream = EmployeesStream.from_args(args)
+            stream.client.url = mock.url
+            schedules[mode] = [fields["Schedules"] for _, fields in stream._iter_employee_records(now, now)]
+
+    # The bulk endpoint leaves out unauthorized employees instead of answering with a 401.
+    assert [employee_schedules is None for employee_schedules in schedules["per_employee"]] == [False, True, False]
+    assert [employee_schedules == [] for employee_schedules in schedules["bulk"]] == [False, True, False]
+
+
+def test_employees_stream_joins_bulk_schedules_by_xrefcode(args):
+    xrefcodes = ["E001", "E002", "E003"]
+    args.config.update(schedules_mode="bulk")
+    stream = EmployeesStream.from_args(args)
+    with MockDayforce(employees=xrefcodes, unauthorized_schedules={"E002"}, schedules_page_size=2) as mock:
+        stream.client.url = mock.url
+        now = singer.utils.now()
+        payloads = list(stream._iter_employee_payloads(now, now))
+
+    assert [xrefcode for xrefcode, _ in payloads] == xrefcodes
+    assert {xrefcode: [s["EmployeeXRefCode"] for s in schedules["Data"]] for xrefcode, (_, schedules) in payloads} == {
+        "E001": ["E001"],
+        "E002": [],
+        "E003": ["E003"],
+    }
+
+
+def test_employees_stream_fails_on_bulk_schedules_without_employee_xrefcode(args):
+    args.config.update(schedules_mode="bulk")
+    stream = EmployeesStream.from_args(args)
+    with MockDayforce(employees=["E001", "E002"], schedules_xrefcode_field="XRefCode") as mock:
+        stream.client.url = mock.url
+        now = singer.utils.now()
+        with pytest.raises(RuntimeError, match="without an EmployeeXRefCode"):
+            list(stream._iter_employee_payloads(now, now))
+
+
+@pytest.mark.parametrize("max_workers", [1, 4])
+def test_employees_stream_chunks_schedules_once_over_memory_budget(args, max_workers):
+    xrefcodes = [f"E{i:03d}" for i in range(5)]
+    end = singer.utils.now()
+    start = end - timedelta(days=20)
+    runs = []
+    with MockDayforce(employees=xrefcodes, schedules_per_day=2) as mock:
+        for config in ({}, {"memory_budget_mb": 1, "schedules_chunk_days": 7}):
+            args.config.update(max_workers=max_workers, **config)
+            stream = EmployeesStream.from_args(args)
+            stream.client.url = mock.url
+            mock.requests.clear()
+            records = list(stream._iter_employee_records(start, end))
+            runs.append((records, sum(path.endswith("/Schedules") for path in mock.requests)))
+
+    (unbounded, unbounded_requests), (bounded, bounded_requests) = runs
+    assert bounded == unbounded
+    assert [len(fields["Schedules"]) for _, fields in bounded] == [40] * len(xrefcodes)
+    assert unbounded_requests == len(xrefcodes)
+    assert bounded_requests == 3 * len(xrefcodes)
+
+
+def punch_windows(pt_stream, state, days):
+    start = singer.utils.strptime_to_utc(singer.utils.strftime(singer.utils.now() - timedelta(days=days)))
+    singer.bookmarks.write_bookmark(
+        state, pt_stream.tap_stream_id, pt_stream.bookmark_properties, singer.utils.strftime(start)
+    )
+    return [window_start for window_start, _ in date_windows(start, start + timedelta(days=days), timedelta(days=6))]
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+@pytest.mark.parametrize("window_workers", [1, 4])
+def test_punch_streams_emit_windows_in_order(pt_stream, args, capsys, window_workers):
+    windows = punch_windows(pt_stream, args.state, days=57)
+    with MockDayforce(punches_per_window=2, latency=0.01) as mock:
+        records, _ = sync_against_mock(pt_stream, args, mock, capsys, window_workers=window_workers)
+
+    expected = [f"{singer.utils.strftime(window_start)}/{i}" for window_start in windows for i in range(2)]
+    assert [record[pt_stream.key_properties[0]] for record in records] == expected
+    assert {record["SyncTimestampUtc"] for record in records} == {
+        args.state["bookmarks"][pt_stream.tap_stream_id][pt_stream.bookmark_properties]
+    }
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_transform_processes_emit_identical_records(pt_stream, args, capsys):
+    windows = punch_windows(pt_stream, args.state, days=20)
+    bookmarks = copy.deepcopy(args.state["bookmarks"])
+    with MockDayforce(punches_per_window=5) as mock:
+        serial, _ = sync_against_mock(pt_stream, args, mock, capsys)
+        args.state["bookmarks"] = bookmarks
+        pooled, _ = sync_against_mock(pt_stream, args, mock, capsys, transform_processes=2, transform_chunk_size=3)
+
+    for record in serial + pooled:
+        record.pop("SyncTimestampUtc")
+    assert pooled == serial
+    assert len(pooled) == 5 * len(windows)
+
+
+def punch_window_sizes(pt_stream, records):
+    starts = sorted(
+        {singer.utils.strptime_to_utc(record[pt_stream.key_properties[0]].split("/")[0]) for record in records}
+    )
+    return [end - start for start, end in zip(starts, starts[1:])]
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_size_windows_by_volume(pt_stream, args, capsys):
+    punch_windows(pt_stream, args.state, days=8)
+    with MockDayforce(punches_per_hour=10) as mock:
+        records, _ = sync_against_mock(pt_stream, args, mock, capsys, punch_window_target_records=50)
+
+    # The first window is the default 6 days. The windows after it shrink to 5 hours' worth of punches.
+    sizes = punch_window_sizes(pt_stream, records)
+    assert sizes[0] == timedelta(days=6)
+    assert set(sizes[1:]) == {timedelta(hours=5)}
+    assert len(records) == 10 * 24 * 6 + 50 * len(sizes)
+    assert args.state["bookmarks"][pt_stream.tap_stream_id]["window_size_seconds"] == 5 * 3600
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_resume_from_the_previous_window_size(pt_stream, args, capsys):
+    windows = punch_windows(pt_stream, args.state, days=2)
+    args.state["bookmarks"][pt_stream.tap_stream_id]["window_size_seconds"] = 4 * 3600
+    with MockDayforce(punches_per_hour=1) as mock:
+        records, _ = sync_against_mock(
+            pt_stream, args, mock, capsys, window_workers=4, punch_window_target_records=8, punch_max_window_days=1
+        )
+
+    # The 8 windows fetched ahead by the 4 workers keep the previous size. The windows after them grow to
+    # 8 hours' worth of punches.
+    sizes = punch_window_sizes(pt_stream, records)
+    assert sizes[:8] == [timedelta(hours=4)] * 8
+    assert set(sizes[8:]) == {timedelta(hours=8)}
+    assert [record[pt_stream.key_properties[0]] for record in records][:4] == [
+        f"{singer.utils.strftime(windows[0])}/{i}" for i in range(4)
+    ]
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_only_advance_bookmark_past_finished_windows(pt_stream, args, capsys):
+    windows = punch_windows(pt_stream, args.state, days=57)
+    failing_window = singer.utils.strftime(windows[4])
+    with MockDayforce(failing_windows={failing_window}) as mock:
+        with pytest.raises(requests.exceptions.HTTPError):
+            sync_against_mock(pt_stream, args, mock, capsys, window_workers=4)
+
+    records = [message["record"] for message in read_messages(capsys, "RECORD")]
+    assert [record[pt_stream.key_properties[0]] for record in records] == [
+        f"{singer.utils.strftime(window_start)}/0" for window_start in windows[:4]
+    ]
+    assert args.state["bookmarks"][pt_stream.tap_stream_id][pt_stream.bookmark_properties] == failing_window
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_checkpoint_state_after_every_window(pt_stream, args, capsys):
+    windows = punch_windows(pt_stream, args.state, days=57)
+    with MockDayforce() as mock:
+        args.config.update(window_workers=2)
+        stream = pt_stream.from_args(args)
+        stream.client.url = mock.url
+        stream.sync()
+
+    states = read_messages(capsys, "STATE")
+    assert [
+        state["value"]["bookmarks"][pt_stream.tap_stream_id][pt_stream.bookmark_properties] for state in states[:-1]
+    ] == [singer.utils.strftime(window_start) for window_start in windows[1:]]
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_suppress_unchanged_punches_when_rerun(pt_stream, args, capsys, tmp_path):
+    args.config.update(dedupe_punches=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    key = pt_stream.key_properties[0]
+
+    windows = punch_windows(pt_stream, args.state, days=20)
+    bookmarks = copy.deepcopy(args.state["bookmarks"])
+    with MockDayforce(punches_per_window=2) as mock:
+        first, _ = sync_against_mock(pt_stream, args, mock, capsys)
+    assert len(first) == 2 * len(windows)
+
+    args.state["bookmarks"] = copy.deepcopy(bookmarks)
+    with MockDayforce(punches_per_window=3) as mock:
+        second, _ = sync_against_mock(pt_stream, args, mock, capsys)
+    assert [record[key] for record in second] == [
+        f"{singer.utils.strftime(window_start)}/2" for window_start in windows
+    ]
+
+    args.state["bookmarks"] = copy.deepcopy(bookmarks)
+    with MockDayforce(punches_per_window=3, punch_fields={"PunchStatus": "Approved"}) as mock:
+        third, _ = sync_against_mock(pt_stream, args, mock, capsys)
+    assert len(third) == 3 * len(windows)
+    assert (
+        args.state["bookmarks"][pt_stream.tap_stream_id][pt_stream.bookmark_properties] == third[0]["SyncTimestampUtc"]
+    )
+
+
+@pytest.mark.parametrize("pt_stream", [EmployeePunchesStream, EmployeeRawPunchesStream])
+def test_punch_streams_never_persist_fingerprints_of_unwritten_punches(pt_stream, args, capsys, tmp_path, monkeypatch):
+    path = str(tmp_path / "fingerprints.db")
+    args.config.update(dedupe_punches=True, fingerprint_db_path=path)
+    punch_windows(pt_stream, args.state, days=4)
+    store = get_fingerprint_store(args.config)
+    write_record = pt_stream.write_record
+    written = []
+
+    def write_record_then_fail(self, record, time_extracted):
+        written.append(record)
+        if len(written) == 3:
+            # Another stream, syncing concurrently, saves its fingerprints before the window fails.
+            store.save("employees", {"E001": "abc"})
+            raise RuntimeError("Failed halfway through the window")
+        write_record(self, record, time_extracted)
+
+    monkeypatch.setattr(pt_stream, "write_record", write_record_then_fail)
+    with MockDayforce(punches_per_window=5) as mock:
+        with pytest.raises(RuntimeError):
+            sync_against_mock(pt_stream, args, mock, capsys)
+
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        assert connection.execute("SELECT namespace, key FROM fingerprints").fetchall() == [("employees", "E001")]
+
+
+def test_pay_summary_report_resumes_from_last_finished_window(args, capsys):
+    start = singer.utils.strptime_to_utc(singer.utils.strftime(singer.utils.now() - timedelta(days=27)))
+    windows = [window_start for window_start, _ in date_windows(start, start + timedelta(days=27), timedelta(days=6))]
+    args.config.update(start_date=singer.utils.strftime(start), pay_summary_max_window_days=6)
+    date_param_fmt = PaySummaryReportStream.date_param_fmt
+    failing_window = singer.utils.strftime(windows[3], format_str=date_param_fmt)
+
+    with MockDayforce(failing_windows={failing_window}) as mock:
+        with pytest.raises(requests.exceptions.HTTPError):
+            sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+    assert args.state["bookmarks"]["pay_summary_report"]["window_start"] == singer.utils.strftime(windows[3])
+
+    with MockDayforce() as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+    assert [record["Employee_DisplayName"] for record in records] == [
+        f"{singer.utils.strftime(window_start, format_str=date_param_fmt)}/0" for window_start in windows[3:]
+    ]
+    assert "window_start" not in args.state["bookmarks"]["pay_summary_report"]
+
+
+def test_pay_summary_report_splits_windows_that_hit_the_row_limit(args, capsys, monkeypatch):
+    monkeypatch.setattr(PaySummaryReportStream, "row_limit", 100)
+    args.config.update(start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=30)))
+    with MockDayforce(rows_per_day=20, report_row_limit=100) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+
+    rows_per_day = collections.Counter(record["Employee_DisplayName"].split("/")[0] for record in records)
+    assert len(rows_per_day) >= 30
+    assert set(rows_per_day.values()) == {20}
+    assert args.state["bookmarks"]["pay_summary_report"]["window_size_seconds"] <= 6 * 24 * 60 * 60
+
+
+def test_pay_summary_report_grows_sparse_windows(args, capsys, monkeypatch):
+    monkeypatch.setattr(PaySummaryReportStream, "row_limit", 100)
+    args.config.update(start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=120)))
+    with MockDayforce(rows_per_day=1, report_row_limit=100) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+
+    assert len(mock.requests) < 120 / 6
+    assert len(records) >= 120
+    assert args.state["bookmarks"]["pay_summary_report"]["window_size_seconds"] == 31 * 24 * 60 * 60
+
+
+def test_pay_summary_report_incremental_mode_skips_settled_windows_and_unchanged_rows(args, capsys, tmp_path):
+    args.config.update(
+        start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=90)),
+        pay_summary_incremental=True,
+        pay_summary_lookback_pay_periods=1,
+        pay_period_days=14,
+        fingerprint_db_path=str(tmp_path / "fingerprints.db"),
+    )
+    with MockDayforce(rows_per_day=1) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+    assert len(records) >= 90
+
+    with MockDayforce(rows_per_day=1) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+    assert records == []
+    assert len(mock.requests) == 1
+
+    with MockDayforce(rows_per_day=2) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+    assert 14 <= len(records) <= 15
+    assert {record["Employee_DisplayName"].split("/")[1] for record in records} == {"1"}
+
+
+def test_pay_summary_report_incremental_mode_emits_identical_rows(args, capsys, tmp_path):
+    args.config.update(pay_summary_incremental=True, fingerprint_db_path=str(tmp_path / "fingerprints.db"))
+    stream = PaySummaryReportStream.from_args(args)
+    row = {"Employee_DisplayName": "E001", "EmployeePaySummary_PayAmount": 1.0}
+    capsys.readouterr()
+    with stream.writer:
+        stream._transform_records(
+            rows=[row, dict(row)], counter=singer.metrics.Counter("rows"), time_extracted=singer.utils.now()
+        )
+    assert len(read_messages(capsys, "RECORD")) == 2
+    stream.fingerprints.save(stream.tap_stream_id, stream._pending_fingerprints)
+    stream._pending_fingerprints.clear()
+
+    with stream.writer:
+        stream._transform_records(
+            rows=[row, dict(row), dict(row)], counter=singer.metrics.Counter("rows"), time_extracted=singer.utils.now()
+        )
+    assert len(read_messages(capsys, "RECORD")) == 1
+
+
+def test_pay_summary_report_only_persists_fingerprints_after_the_checkpoint(args, capsys, tmp_path, monkeypatch):
+    path = str(tmp_path / "fingerprints.db")
+    args.config.update(
+        start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=10)),
+        pay_summary_incremental=True,
+        fingerprint_db_path=path,
+    )
+
+    def crash(self, key, value):
+        raise RuntimeError("Crashed before the checkpoint")
+
+    monkeypatch.setattr(PaySummaryReportStream, "write_checkpoint", crash)
+    with MockDayforce(rows_per_day=1) as mock:
+        with pytest.raises(RuntimeError):
+            sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+
+    # A later run opens the database afresh, so it only sees committed fingerprints.
+    with contextlib.closing(sqlite3.connect(path)) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM fingerprints").fetchone() == (0,)
+
+
+def test_pay_summary_report_leaves_the_fingerprint_store_alone_unless_incremental(args, capsys, tmp_path, monkeypatch):
+    args.config.update(
+        start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=10)),
+        fingerprint_db_path=str(tmp_path / "fingerprints.db"),
+    )
+    store = get_fingerprint_store(args.config)
+    calls = []
+    for method in ("get", "save"):
+        monkeypatch.setattr(store, method, lambda *args, method=method: calls.append(method))
+    with MockDayforce(rows_per_day=1) as mock:
+        records, _ = sync_against_mock(PaySummaryReportStream, args, mock, capsys)
+
+    assert len(records) >= 10
+    assert calls == []
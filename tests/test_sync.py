@@ -0,0 +1,100 @@
+import collections
+import json
+import subprocess
+import sys
+import time
+from datetime import timedelta
+
+import pytest
+import singer
+from mock_dayforce import MockDayforce
+
+from tap_dayforce import AVAILABLE_STREAMS, get_stream_order, sync
+
+
+@pytest.fixture(scope="function")
+def mock(args):
+    with MockDayforce(employees=["E001", "E002"], latency=0.05) as mock:
+        args.client.url = mock.url
+        yield mock
+
+
+def sync_all_streams(args, capsys, **config):
+    args.config.update(start_date=singer.utils.strftime(singer.utils.now() - timedelta(days=10)), **config)
+    args.state = {}
+    capsys.readouterr()
+    started = time.monotonic()
+    sync(args)
+    elapsed = time.monotonic() - started
+    return [json.loads(line) for line in capsys.readouterr().out.splitlines()], elapsed
+
+
+def test_get_stream_order_defaults_to_available_streams():
+    assert get_stream_order({}) == list(AVAILABLE_STREAMS)
+
+
+def test_get_stream_order_puts_configured_streams_first():
+    order = get_stream_order({"stream_order": ["pay_summary_report", "employee_raw_punches"]})
+    assert [stream.tap_stream_id for stream in order] == [
+        "pay_summary_report",
+        "employee_raw_punches",
+        "employees",
+        "employee_punches",
+    ]
+
+
+def test_get_stream_order_rejects_unknown_streams():
+    with pytest.raises(Exception, match="unknown streams"):
+        get_stream_order({"stream_order": ["employee_schedules"]})
+
+
+def test_sync_runs_streams_in_configured_order(args, capsys, mock):
+    stream_order = ["employee_punches", "pay_summary_report", "employees", "employee_raw_punches"]
+    messages, _ = sync_all_streams(args, capsys, stream_order=stream_order)
+
+    assert [message["stream"] for message in messages if message["type"] == "SCHEMA"] == stream_order
+    assert args.state["currently_syncing"] is None
+
+
+def test_sync_runs_streams_concurrently_with_stream_workers(args, capsys, mock):
+    serial_messages, serial_elapsed = sync_all_streams(args, capsys)
+    parallel_messages, parallel_elapsed = sync_all_streams(args, capsys, stream_workers=4)
+
+    def records_per_stream(messages):
+        return collections.Counter(message["stream"] for message in messages if message["type"] == "RECORD")
+
+    assert records_per_stream(parallel_messages) == records_per_stream(serial_messages)
+    assert len(records_per_stream(parallel_messages)) == len(AVAILABLE_STREAMS)
+    assert parallel_elapsed < serial_elapsed * 0.75
+    assert parallel_messages[-1] == {"type": "STATE", "value": args.state}
+    assert args.state["currently_syncing"] is None
+
+
+def test_sync_only_emits_the_new_employees_bookmark_after_its_records(args, capsys):
+    with MockDayforce(employees=[f"E{i:03d}" for i in range(20)], latency=0.05) as mock:
+        args.client.url = mock.url
+        messages, _ = sync_all_streams(args, capsys, stream_workers=4)
+
+    new_bookmark = args.state["bookmarks"]["employees"]["SyncTimestampUtc"]
+    last_record = max(
+        i for i, message in enumerate(messages) if message["type"] == "RECORD" and message["stream"] == "employees"
+    )
+    assert not [
+        message
+        for message in messages[:last_record]
+        if message["type"] == "STATE"
+        and message["value"].get("bookmarks", {}).get("employees", {}).get("SyncTimestampUtc") == new_bookmark
+    ]
+    assert sum(message["type"] == "STATE" for message in messages[:last_record]) > 1
+
+
+def test_import_defers_optional_and_error_reporting_dependencies():
+    modules = subprocess.run(
+        [sys.executable, "-c", "import sys, tap_dayforce; print(' '.join(sys.modules))"],
+        check=True,
+        capture_output=True,
+        text=True,
+    ).stdout.split()
+    assert "tap_dayforce" in modules
+    assert "rollbar" not in modules
+    assert "aiohttp" not in modules
@@ -0,0 +1,137 @@
+import copy
+from typing import Any, Dict, List
+
+import pytest
+import singer
+from mock_dayforce import synthetic_employee
+from singer.transform import SchemaMismatch
+
+from tap_dayforce import EmployeesStream
+from tap_dayforce.transform import MismatchReporter, RecordTransformer, compile_schema
+
+
+def nullable(typ, **schema):
+    return {"type": ["null", typ], **schema}
+
+
+SCHEMA: Dict = {
+    "type": ["null", "object"],
+    "additionalProperties": False,
+    "properties": {
+        "Name": nullable("string"),
+        "Hours": nullable("number"),
+        "Count": nullable("integer"),
+        "Active": nullable("boolean"),
+        "Updated": nullable("string", format="date-time"),
+        "Strict": {"type": "integer"},
+        "Extra": nullable("object"),
+        "Items": nullable("array", items=nullable("object", properties={"Code": nullable("string")})),
+    },
+}
+
+VALUES: List[Any] = [
+    None,
+    "",
+    "abc",
+    "FALSE",
+    "1,234.5",
+    0,
+    1,
+    7,
+    2.5,
+    True,
+    False,
+    {},
+    {"Code": 1, "Other": 2},
+    [],
+    [{}],
+]
+DATETIMES = [
+    "2019-12-30T17:13:33",
+    "2019-12-30T17:13:33.8",
+    "2019-12-30T17:13:33.851000Z",
+    "2019-12-30 17:13:33+00:00",
+    "2019-12-30T17:13:33.1234567",
+    "2019-12-30T17:13:33-05:00",
+    "2019-02-30T00:00:00",
+    "0001-01-01T00:00:00",
+    "12/30/2019",
+    "not a date",
+]
+
+
+def generic_transform(record):
+    try:
+        return singer.Transformer().transform(copy.deepcopy(record), SCHEMA)
+    except SchemaMismatch:
+        return SchemaMismatch
+
+
+def compiled_transform(record):
+    try:
+        return RecordTransformer().transform(copy.deepcopy(record), SCHEMA)
+    except SchemaMismatch:
+        return SchemaMismatch
+
+
+@pytest.mark.parametrize("field", [field for field in SCHEMA["properties"] if field != "Updated"])
+@pytest.mark.parametrize("value", VALUES)
+def test_record_transformer_matches_singer(field, value):
+    record = {field: value}
+    if field != "Strict":
+        record["Strict"] = 1
+    assert compiled_transform(record) == generic_transform(record)
+
+
+@pytest.mark.parametrize("value", DATETIMES + VALUES)
+def test_record_transformer_matches_singer_for_datetimes(value):
+    record = {"Updated": value, "Strict": 1}
+    assert compiled_transform(record) == generic_transform(record)
+
+
+def test_record_transformer_matches_singer_for_every_stream_schema(catalog, employee_record):
+    for stream in catalog.streams:
+        assert compile_schema(stream.schema.to_dict()) is not None
+
+    schema = catalog.get_stream("employees").schema.to_dict()
+    transformer = RecordTransformer()
+    for record in [employee_record] + [synthetic_employee(f"E{i:03d}", 3) for i in range(20)]:
+        assert transformer.transform(copy.deepcopy(record), schema) == singer.Transformer().transform(
+            copy.deepcopy(record), schema
+        )
+    assert transformer.fallbacks == 0
+
+
+def test_record_transformer_falls_back_for_unsupported_schemas():
+    schema = {"type": "object", "properties": {"Value": {"anyOf": [{"type": "integer"}, {"type": "string"}]}}}
+    assert compile_schema(schema) is None
+    assert RecordTransformer().transform({"Value": "1"}, schema) == {"Value": 1}
+
+
+def test_mismatch_reporter_logs_paths_up_to_its_limit(caplog):
+    reporter = MismatchReporter(stream="employees", limit=2)
+    transformer = singer.Transformer()
+    records = [{"Strict": None, "Items": [{"Code": "A"}], "Name": "Sensitive"}] * 5
+    for record in records:
+        with pytest.raises(SchemaMismatch) as e:
+            transformer.transform(record, SCHEMA)
+        reporter.report("E001", e.value, transformer.errors)
+        transformer.errors = []
+    reporter.log_summary()
+
+    logged = [message for message in caplog.messages if "employees" in message]
+    assert len(logged) == 4
+    assert "E001 at: Strict" in logged[0]
+    assert not any("Sensitive" in line for line in logged)
+    assert "5 employees records did not match the schema. Most common paths: Strict (5)" in logged[-1]
+
+
+def test_employees_stream_reports_mismatches_without_the_record(args, employee_record, caplog):
+    stream = EmployeesStream.from_args(args)
+    employee_record.update(XRefCode="E001", FirstName="Sensitive", WorkAssignments="not an object")
+    with stream.transformer, stream.mismatches:
+        with pytest.raises(SchemaMismatch):
+            stream.transform_record(employee_record)
+
+    assert "Schema mismatch in employees record E001 at: WorkAssignments" in caplog.text
+    assert "Sensitive" not in caplog.text
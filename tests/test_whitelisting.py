@@ -0,0 +1,87 @@
+import copy
+import pickle
+
+import pytest
+from mock_dayforce import synthetic_employee
+
+from tap_dayforce.whitelisting import (
+    WHITELISTED_COLLECTIONS,
+    WHITELISTED_FIELDS,
+    WHITELISTED_PAY_CLASS_CODES,
+    WHITELISTED_PAY_POLICY_CODES,
+    WhitelistProjector,
+)
+
+
+def legacy_whitelist(data):
+    """The dict-rebuilding whitelisting EmployeesStream used before WhitelistProjector."""
+    for collection in WHITELISTED_COLLECTIONS:
+        if data.get(collection, {}).get("Items") is not None:
+            items = []
+            for item in data.get(collection, {}).get("Items"):
+                if (
+                    item.get("PayPolicy", {}).get("XRefCode") in WHITELISTED_PAY_POLICY_CODES
+                    and item.get("PayClass", {}).get("XRefCode") in WHITELISTED_PAY_CLASS_CODES
+                ):
+                    items.append(item)
+                else:
+                    items.append({field: item.get(field, None) for field in WHITELISTED_FIELDS})
+            data[collection]["Items"] = items
+    return data
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_projector_matches_legacy_whitelisting(seed):
+    projector = WhitelistProjector.from_config({})
+    for i in range(200):
+        details = synthetic_employee(f"E{i:04d}", items=6, seed=seed)
+        assert projector.project(copy.deepcopy(details)) == legacy_whitelist(copy.deepcopy(details))
+
+
+def test_projector_matches_legacy_whitelisting_on_sample_record(employee_record):
+    projector = WhitelistProjector.from_config({})
+    assert projector.project(copy.deepcopy(employee_record)) == legacy_whitelist(copy.deepcopy(employee_record))
+
+
+def test_projector_keeps_whitelisted_items_and_projects_the_rest():
+    whitelisted = {"PayPolicy": {"XRefCode": "USA_CA_HNE"}, "PayClass": {"XRefCode": "FT"}, "BaseRate": 20.0}
+    sensitive = {"PayPolicy": {"XRefCode": "SALARIED"}, "PayClass": {"XRefCode": "FT"}, "BaseSalary": 100000}
+    data = {"CompensationSummary": {"Items": [whitelisted, sensitive]}, "EmploymentStatuses": {"Items": None}}
+
+    WhitelistProjector.from_config({}).project(data)
+
+    assert data["CompensationSummary"]["Items"][0] is whitelisted
+    assert data["CompensationSummary"]["Items"][1] == {
+        "PayPolicy": {"XRefCode": "SALARIED"},
+        "PayClass": {"XRefCode": "FT"},
+        "EmploymentStatus": None,
+    }
+
+
+def test_projector_reads_rules_from_config():
+    projector = WhitelistProjector.from_config(
+        {
+            "whitelisted_collections": ["CompensationSummary"],
+            "whitelisted_fields": ["PayClass"],
+            "whitelisted_xrefcodes": {"PayClass": ["FT"]},
+        }
+    )
+    data = {
+        "CompensationSummary": {"Items": [{"PayClass": {"XRefCode": "FT"}, "BaseRate": 1}, {"BaseRate": 2}]},
+        "EmploymentStatuses": {"Items": [{"BaseRate": 3}]},
+    }
+
+    projector.project(data)
+
+    assert data["CompensationSummary"]["Items"] == [{"PayClass": {"XRefCode": "FT"}, "BaseRate": 1}, {"PayClass": None}]
+    assert data["EmploymentStatuses"]["Items"] == [{"BaseRate": 3}]
+
+
+def test_projector_survives_pickling():
+    projector = WhitelistProjector.from_config({"whitelisted_xrefcodes": {"PayClass": ["FT"]}})
+    details = synthetic_employee("E0001", items=6)
+
+    unpickled = pickle.loads(pickle.dumps(projector))
+
+    assert unpickled == projector
+    assert unpickled.project(copy.deepcopy(details)) == projector.project(copy.deepcopy(details))
@@ -0,0 +1,47 @@
+from datetime import datetime, timedelta
+
+from tap_dayforce.windows import AdaptiveWindow
+
+
+def test_adaptive_window_is_clamped_to_its_bounds():
+    window = AdaptiveWindow(size=timedelta(days=90), max_size=timedelta(days=31))
+    assert window.size == timedelta(days=31)
+
+
+def test_adaptive_window_splits_full_windows_down_to_the_minimum():
+    window = AdaptiveWindow(size=timedelta(hours=4), min_size=timedelta(hours=1), row_limit=100)
+    assert window.is_full(100)
+    assert window.split() and window.size == timedelta(hours=2)
+    assert window.split() and window.size == timedelta(hours=1)
+    assert not window.split()
+
+
+def test_adaptive_window_observe_grows_sparse_and_shrinks_dense_windows():
+    window = AdaptiveWindow(size=timedelta(days=6), row_limit=100)
+    window.observe(10)
+    assert window.size == timedelta(days=12)
+    window.observe(50)
+    assert window.size == timedelta(days=12)
+    window.observe(95)
+    assert window.size == timedelta(days=6)
+
+
+def test_adaptive_window_fit_targets_rows_at_the_observed_rate():
+    window = AdaptiveWindow(size=timedelta(days=6), target_rows=100)
+    window.fit(rows=1440, span=timedelta(days=6))
+    assert window.size == timedelta(hours=10)
+    window.fit(rows=10, span=timedelta(hours=10))
+    assert window.size == timedelta(hours=20)
+    window.fit(rows=0, span=timedelta(hours=20))
+    assert window.size == timedelta(hours=40)
+    window.fit(rows=100000, span=timedelta(hours=40))
+    assert window.size == window.min_size
+
+
+def test_adaptive_window_windows_follow_the_window_size():
+    start = datetime(2020, 1, 1)
+    window = AdaptiveWindow(size=timedelta(days=1))
+    windows = window.windows(start, start + timedelta(days=2))
+    assert next(windows) == (start, start + timedelta(days=1, seconds=-1))
+    window.size = timedelta(hours=6)
+    assert [window_start.hour for window_start, _ in windows] == [0, 6, 12, 18]